@@ -29,6 +29,8 @@ from logging import (
 )
 from uvloop import install
 
+from bot.helper.ext_utils.task_registry import TaskRegistry
+
 # from faulthandler import enable as faulthandler_enable
 # faulthandler_enable()
 
@@ -97,7 +99,7 @@ status_reply_dict_lock = Lock()
 queue_dict_lock = Lock()
 qb_listener_lock = Lock()
 status_reply_dict = {}
-download_dict = {}
+download_dict = TaskRegistry()
 rss_dict = {}
 
 BOT_TOKEN = environ.get("BOT_TOKEN", "")
@@ -422,9 +424,15 @@ QUEUE_UPLOAD = "" if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 INCOMPLETE_TASK_NOTIFIER = environ.get("INCOMPLETE_TASK_NOTIFIER", "")
 INCOMPLETE_TASK_NOTIFIER = INCOMPLETE_TASK_NOTIFIER.lower() == "true"
 
+RESUME_TASKS = environ.get("RESUME_TASKS", "")
+RESUME_TASKS = RESUME_TASKS.lower() == "true"
+
 STOP_DUPLICATE = environ.get("STOP_DUPLICATE", "")
 STOP_DUPLICATE = STOP_DUPLICATE.lower() == "true"
 
+GDRIVE_DEDUPE = environ.get("GDRIVE_DEDUPE", "")
+GDRIVE_DEDUPE = GDRIVE_DEDUPE.lower() == "true"
+
 IS_TEAM_DRIVE = environ.get("IS_TEAM_DRIVE", "")
 IS_TEAM_DRIVE = IS_TEAM_DRIVE.lower() == "true"
 
@@ -723,6 +731,7 @@ config_dict = {
     "JIODRIVE_TOKEN": JIODRIVE_TOKEN,
     "EQUAL_SPLITS": EQUAL_SPLITS,
     "EXTENSION_FILTER": EXTENSION_FILTER,
+    "GDRIVE_DEDUPE": GDRIVE_DEDUPE,
     "GDRIVE_ID": GDRIVE_ID,
     "INCOMPLETE_TASK_NOTIFIER": INCOMPLETE_TASK_NOTIFIER,
     "INDEX_URL": INDEX_URL,
@@ -752,6 +761,7 @@ config_dict = {
     "RCLONE_SERVE_USER": RCLONE_SERVE_USER,
     "RCLONE_SERVE_PASS": RCLONE_SERVE_PASS,
     "RCLONE_SERVE_PORT": RCLONE_SERVE_PORT,
+    "RESUME_TASKS": RESUME_TASKS,
     "RSS_CHAT": RSS_CHAT,
     "RSS_DELAY": RSS_DELAY,
     "SAVE_MSG": SAVE_MSG,
@@ -45,6 +45,7 @@ from .helper.ext_utils.bot_utils import (
     get_stats,
 )
 from .helper.ext_utils.db_handler import DbManger
+from .helper.ext_utils.resume_manager import resume_manager
 from .helper.telegram_helper.bot_commands import BotCommands
 from .helper.telegram_helper.message_utils import (
     sendMessage,
@@ -95,6 +96,11 @@ from .modules import (
 )
 
 
+async def load_user_data(_, update):
+    if user := update.from_user:
+        await DbManger().load_user(user.id)
+
+
 async def stats(client, message):
     msg, btns = await get_stats(message)
     await sendMessage(message, msg, btns, photo="IMAGES")
@@ -177,6 +183,8 @@ async def restart(client, message):
     if scheduler.running:
         scheduler.shutdown(wait=False)
     await delete_all_messages()
+    if DATABASE_URL:
+        await DbManger().flush_user_data()
     for interval in [QbInterval, Interval]:
         if interval:
             interval[0].cancel()
@@ -328,6 +336,15 @@ async def restart_notification():
         await aioremove(".restartmsg")
 
 
+def resume_task(message, task):
+    if task["ytdlp"]:
+        ytdlp._ytdl(bot, message, isLeech=task["leech"])
+    else:
+        mirror_leech._mirror_leech(
+            bot, message, isQbit=task["qbit"], isLeech=task["leech"]
+        )
+
+
 async def log_check():
     if config_dict["LEECH_LOG_ID"]:
         for chat_id in config_dict["LEECH_LOG_ID"].split():
@@ -381,8 +398,9 @@ async def log_check():
 
 
 async def main():
+    await resume_manager.load()
     await gather(
-        start_cleanup(),
+        start_cleanup(resume_manager.kept_paths()),
         torrent_search.initiate_search_tools(),
         restart_notification(),
         search_images(),
@@ -391,6 +409,11 @@ async def main():
     )
     await sync_to_async(start_aria2_listener, wait=False)
 
+    if DATABASE_URL:
+        bot.add_handler(
+            MessageHandler(load_user_data, filters=regex(r"^/") | private), group=-1
+        )
+        bot.add_handler(CallbackQueryHandler(load_user_data), group=-1)
     bot.add_handler(
         MessageHandler(start, filters=command(BotCommands.StartCommand) & private)
     )
@@ -436,9 +459,12 @@ async def main():
     if user:
         LOGGER.info(f"WZ's User [@{user.me.username}] Ready!")
     signal(SIGINT, exit_clean_up)
+    await resume_manager.resume(resume_task)
 
 
 async def stop_signals():
+    if DATABASE_URL:
+        await DbManger().flush_user_data()
     if user:
         await gather(bot.stop(), user.stop())
     else:
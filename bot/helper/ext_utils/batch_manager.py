@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+from asyncio import FIRST_COMPLETED, wait
+from copy import copy
+from itertools import count
+
+from bot import LOGGER, download_dict
+from bot.helper.telegram_helper.message_utils import get_messages
+
+BATCH_ARGS = {"-i": True, "-b": False, "-bulk": False}
+
+# Below zero, so they never collide with the message ids other tasks are keyed by.
+batch_uids = count(-1, -1)
+
+# Running batches by the id of their command message.
+batch_jobs = {}
+
+
+def get_batch(message):
+    """The running batch `message` is the command or an item of, if any."""
+    return batch_jobs.get(getattr(message, "batch_id", None))
+
+
+def get_batch_tasks(batch_id):
+    """Running tasks of the batch started by command message `batch_id`."""
+    return [
+        task
+        for task in download_dict.snapshot()
+        if getattr(task.message, "batch_id", None) == batch_id
+    ]
+
+
+def strip_batch_args(line):
+    """Drop -i count and -b/-bulk range from a command line."""
+    items = line.split(" ")
+    kept = []
+    i = 0
+    while i < len(items):
+        if (arg := items[i].strip()) in BATCH_ARGS:
+            if i + 1 < len(items) and (
+                BATCH_ARGS[arg] or ":" in items[i + 1] or items[i + 1].isdigit()
+            ):
+                i += 1
+        else:
+            kept.append(items[i])
+        i += 1
+    return " ".join(kept)
+
+
+class BatchJob:
+    """Runs the links of one -i/-b command as tasks without posting to the chat.
+
+    Every item is a copy of the command message with its own text, reply and
+    uid, so replies and status stay under the original command. Each one is
+    shown in status as its position in the batch. Items are submitted one at a
+    time, each after the previous one is registered, so the queue sees them in
+    order and only one is being prepared at once. While it runs, the batch is
+    kept in `batch_jobs` so cancelling the command also stops the items not yet
+    submitted.
+    """
+
+    def __init__(self, message, items, submit, first=1, sameDir=None):
+        self.message = message
+        self.cancelled = False
+        self.__items = items
+        self.__submit = submit
+        self.__sameDir = sameDir
+        total = len(items) + first - 1
+        message.batch_id = message.id
+        if first > 1:
+            message.batch = f"1/{total}"
+        for index, (item, _) in enumerate(items, first):
+            item.batch = f"{index}/{total}"
+            item.batch_id = message.id
+
+    @staticmethod
+    def __item(message, text, reply_to=None):
+        item = copy(message)
+        item.text = text
+        item.reply_to_message = reply_to
+        item.reply_to_message_id = reply_to.id if reply_to else None
+        return item, next(batch_uids)
+
+    @classmethod
+    def from_links(cls, message, links, submit, sameDir=None):
+        cmd = message.text.split("\n", 1)[0].split(" ", 1)[0]
+        return cls(
+            message,
+            [cls.__item(message, f"{cmd} {link}") for link in links],
+            submit,
+            sameDir=sameDir,
+        )
+
+    @classmethod
+    async def from_replies(cls, client, message, multi, submit, sameDir=None):
+        """Items for the multi - 1 messages following the one the command replies to."""
+        start = message.reply_to_message_id + 1
+        replies = await get_messages(
+            client, message.chat.id, range(start, start + multi - 1)
+        )
+        lines = message.text.split("\n")
+        lines[0] = strip_batch_args(lines[0])
+        text = "\n".join(lines)
+        return cls(
+            message,
+            [cls.__item(message, text, reply) for reply in replies],
+            submit,
+            first=2,
+            sameDir=sameDir,
+        )
+
+    def __len__(self):
+        return len(self.__items)
+
+    async def run(self):
+        LOGGER.info(f"Batch of {len(self.__items)} tasks for: {self.message.id}")
+        batch_jobs[self.message.id] = self
+        try:
+            for index, (item, uid) in enumerate(self.__items):
+                if self.cancelled:
+                    LOGGER.info(f"Batch cancelled for: {self.message.id}")
+                    if self.__sameDir:
+                        await self.__sameDir.shrink(len(self.__items) - index)
+                    break
+                registered = download_dict.registered(uid)
+                task = self.__submit(item, uid)
+                await wait((task, registered), return_when=FIRST_COMPLETED)
+                if not registered.done():
+                    download_dict.discard_waiter(uid, registered)
+                    registered.cancel()
+                elif self.cancelled and (dl := download_dict.get(uid)):
+                    # Registered while the batch was being cancelled.
+                    await dl.download().cancel_download()
+        finally:
+            batch_jobs.pop(self.message.id, None)
+
+    def cancel(self):
+        self.cancelled = True
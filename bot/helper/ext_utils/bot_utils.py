@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import platform
 from base64 import b64encode
-from datetime import datetime
 from os import path as ospath
 from pkg_resources import get_distribution, DistributionNotFound
 from aiofiles import open as aiopen
@@ -42,14 +41,12 @@ from pyrogram.enums import ChatType
 from pyrogram.types import BotCommand
 from pyrogram.errors import PeerIdInvalid
 
-from bot.helper.ext_utils.db_handler import DbManger
-from bot.helper.themes import BotTheme
+from bot.helper.themes import BotTheme, BotThemes
 from bot.version import get_version
 from bot import (
     OWNER_ID,
     bot_name,
     bot_cache,
-    DATABASE_URL,
     LOGGER,
     get_client,
     aria2,
@@ -125,25 +122,16 @@ def get_readable_file_size(size_in_bytes):
 
 
 async def getDownloadByGid(gid):
-    async with download_dict_lock:
-        return next((dl for dl in download_dict.values() if dl.gid() == gid), None)
+    return download_dict.by_gid(gid)
 
 
 async def getAllDownload(req_status, user_id=None):
-    dls = []
     async with download_dict_lock:
-        for dl in list(download_dict.values()):
-            if user_id and user_id != dl.message.from_user.id:
-                continue
-            status = dl.status()
-            if req_status in ["all", status]:
-                dls.append(dl)
-    return dls
+        return download_dict.by_status(req_status, user_id)
 
 
 async def get_user_tasks(user_id, maxtask):
-    if tasks := await getAllDownload("all", user_id):
-        return len(tasks) >= maxtask
+    return download_dict.user_count(user_id) >= maxtask
 
 
 def bt_selection_buttons(id_):
@@ -257,105 +245,113 @@ class EngineStatus:
         self.STATUS_SPLIT_MERGE = f"ffmpeg v{version_cache['ffmpeg']}"
         self.STATUS_ZIP = f"p7zip v{version_cache['p7zip']}"
         self.STATUS_QUEUE = "Sleep v0"
+        self.STATUS_SHARED = "Shared v0"
         self.STATUS_RCLONE = f"RClone {version_cache['rclone']}"
 
 
-def get_readable_message():
-    msg = ""
-    button = None
-    STATUS_LIMIT = config_dict["STATUS_LIMIT"]
-    tasks = len(download_dict)
-    globals()["PAGES"] = (tasks + STATUS_LIMIT - 1) // STATUS_LIMIT
-    if PAGE_NO > PAGES and PAGES != 0:
-        globals()["STATUS_START"] = STATUS_LIMIT * (PAGES - 1)
-        globals()["PAGE_NO"] = PAGES
-    for download in list(download_dict.values())[
-        STATUS_START : STATUS_LIMIT + STATUS_START
-    ]:
-        msg_link = (
-            download.message.link
-            if download.message.chat.type in [ChatType.SUPERGROUP, ChatType.CHANNEL]
-            and not config_dict["DELETE_LINKS"]
-            else ""
-        )
-        elapsed = time() - download.message.date.timestamp()
-        msg += BotTheme(
+def get_task_status(download):
+    """Status block of `download` and a key of its fields that don't change with time alone."""
+    msg_link = (
+        download.message.link
+        if download.message.chat.type in [ChatType.SUPERGROUP, ChatType.CHANNEL]
+        and not config_dict["DELETE_LINKS"]
+        else ""
+    )
+    elapsed = time() - download.message.date.timestamp()
+    parts = [
+        (
             "STATUS_NAME",
-            Name=(
-                "Task is being Processed!"
-                if config_dict["SAFE_MODE"]
-                and elapsed >= config_dict["STATUS_UPDATE_INTERVAL"]
-                else escape(f"{download.name()}")
-            ),
+            {
+                "Name": (
+                    "Task is being Processed!"
+                    if config_dict["SAFE_MODE"]
+                    and elapsed >= config_dict["STATUS_UPDATE_INTERVAL"]
+                    else escape(f"{download.name()}")
+                )
+            },
         )
-        if download.status() not in [
-            MirrorStatus.STATUS_SPLITTING,
-            MirrorStatus.STATUS_SEEDING,
-            MirrorStatus.STATUS_METADATA,
-        ]:
-            msg += BotTheme(
-                "BAR",
-                Bar=f"{get_progress_bar_string(download.progress())} {download.progress()}",
-            )
-            msg += BotTheme(
+    ]
+    if batch := getattr(download.message, "batch", None):
+        parts.append(("BATCH", {"Batch": batch}))
+    status = download.status()
+    if status not in [
+        MirrorStatus.STATUS_SPLITTING,
+        MirrorStatus.STATUS_SEEDING,
+        MirrorStatus.STATUS_METADATA,
+    ]:
+        progress = download.progress()
+        key = (status, download.processed_bytes(), download.size())
+        parts += [
+            ("BAR", {"Bar": f"{get_progress_bar_string(progress)} {progress}"}),
+            (
                 "PROCESSED",
-                Processed=f"{download.processed_bytes()} of {download.size()}",
-            )
-            msg += BotTheme("STATUS", Status=download.status(), Url=msg_link)
-            msg += BotTheme("ETA", Eta=download.eta())
-            msg += BotTheme("SPEED", Speed=download.speed())
-            msg += BotTheme("ELAPSED", Elapsed=get_readable_time(elapsed))
-            msg += BotTheme("ENGINE", Engine=download.eng())
-            msg += BotTheme("STA_MODE", Mode=download.upload_details["mode"])
-            if hasattr(download, "seeders_num"):
-                try:
-                    msg += BotTheme("SEEDERS", Seeders=download.seeders_num())
-                    msg += BotTheme("LEECHERS", Leechers=download.leechers_num())
-                except Exception:
-                    pass
-        elif download.status() == MirrorStatus.STATUS_SEEDING:
-            msg += BotTheme("STATUS", Status=download.status(), Url=msg_link)
-            msg += BotTheme("SEED_SIZE", Size=download.size())
-            msg += BotTheme("SEED_SPEED", Speed=download.upload_speed())
-            msg += BotTheme("UPLOADED", Upload=download.uploaded_bytes())
-            msg += BotTheme("RATIO", Ratio=download.ratio())
-            msg += BotTheme("TIME", Time=download.seeding_time())
-            msg += BotTheme("SEED_ENGINE", Engine=download.eng())
-        else:
-            msg += BotTheme("STATUS", Status=download.status(), Url=msg_link)
-            msg += BotTheme("STATUS_SIZE", Size=download.size())
-            msg += BotTheme("NON_ENGINE", Engine=download.eng())
+                {"Processed": f"{download.processed_bytes()} of {download.size()}"},
+            ),
+            ("STATUS", {"Status": status, "Url": msg_link}),
+            ("ETA", {"Eta": download.eta()}),
+            ("SPEED", {"Speed": download.speed()}),
+            ("ELAPSED", {"Elapsed": get_readable_time(elapsed)}),
+            ("ENGINE", {"Engine": download.eng()}),
+            ("STA_MODE", {"Mode": download.upload_details["mode"]}),
+        ]
+        if hasattr(download, "seeders_num"):
+            try:
+                parts += [
+                    ("SEEDERS", {"Seeders": download.seeders_num()}),
+                    ("LEECHERS", {"Leechers": download.leechers_num()}),
+                ]
+            except Exception:
+                pass
+    elif status == MirrorStatus.STATUS_SEEDING:
+        key = (status, download.uploaded_bytes())
+        parts += [
+            ("STATUS", {"Status": status, "Url": msg_link}),
+            ("SEED_SIZE", {"Size": download.size()}),
+            ("SEED_SPEED", {"Speed": download.upload_speed()}),
+            ("UPLOADED", {"Upload": download.uploaded_bytes()}),
+            ("RATIO", {"Ratio": download.ratio()}),
+            ("TIME", {"Time": download.seeding_time()}),
+            ("SEED_ENGINE", {"Engine": download.eng()}),
+        ]
+    else:
+        key = (status, download.size())
+        parts += [
+            ("STATUS", {"Status": status, "Url": msg_link}),
+            ("STATUS_SIZE", {"Size": download.size()}),
+            ("NON_ENGINE", {"Engine": download.eng()}),
+        ]
 
-        msg += BotTheme("USER", User=download.message.from_user.mention(style="html"))
-        msg += BotTheme("ID", Id=download.message.from_user.id)
-        if (download.eng()).startswith("qBit"):
-            msg += BotTheme(
-                "BTSEL", Btsel=f"/{BotCommands.BtSelectCommand}_{download.gid()}"
-            )
-        msg += BotTheme(
-            "CANCEL", Cancel=f"/{BotCommands.CancelMirror}_{download.gid()}"
+    parts += [
+        ("USER", {"User": download.message.from_user.mention(style="html")}),
+        ("ID", {"Id": download.message.from_user.id}),
+    ]
+    if (download.eng()).startswith("qBit"):
+        parts.append(
+            ("BTSEL", {"Btsel": f"/{BotCommands.BtSelectCommand}_{download.gid()}"})
         )
+    parts.append(
+        ("CANCEL", {"Cancel": f"/{BotCommands.CancelMirror}_{download.gid()}"})
+    )
+    return BotThemes(*parts), (parts[0][1]["Name"], *key)
+
+
+def convert_speed_to_bytes_per_second(spd):
+    if "K" in spd:
+        return float(spd.split("K")[0]) * 1024
+    elif "M" in spd:
+        return float(spd.split("M")[0]) * 1048576
+    elif "G" in spd:
+        return float(spd.split("G")[0]) * 1073741824
+    elif "T" in spd:
+        return float(spd.split("T")[0]) * 1099511627776
+    else:
+        return 0
 
-    if len(msg) == 0:
-        return None, None
-
-    dl_speed = 0
-
-    def convert_speed_to_bytes_per_second(spd):
-        if "K" in spd:
-            return float(spd.split("K")[0]) * 1024
-        elif "M" in spd:
-            return float(spd.split("M")[0]) * 1048576
-        elif "G" in spd:
-            return float(spd.split("G")[0]) * 1073741824
-        elif "T" in spd:
-            return float(spd.split("T")[0]) * 1099511627776
-        else:
-            return 0
 
+def get_bot_status():
     dl_speed = 0
     up_speed = 0
-    for download in download_dict.values():
+    for download in download_dict.snapshot():
         tstatus = download.status()
         spd = (
             download.speed()
@@ -370,10 +366,63 @@ def get_readable_message():
             MirrorStatus.STATUS_SEEDING,
         ]:
             up_speed += speed_in_bytes_per_second
+    disk = disk_usage(config_dict["DOWNLOAD_DIR"])
+    return BotThemes(
+        ("Cpu", {"cpu": cpu_percent()}),
+        (
+            "FREE",
+            {
+                "free": get_readable_file_size(disk.free),
+                "free_p": round(100 - disk.percent, 1),
+            },
+        ),
+        ("Ram", {"ram": virtual_memory().percent}),
+        ("uptime", {"uptime": get_readable_time(time() - botStartTime)}),
+        ("DL", {"DL": get_readable_file_size(dl_speed)}),
+        ("UL", {"UL": get_readable_file_size(up_speed)}),
+    )
+
+
+def get_status_view(chat_id=None, cache=None):
+    """Render the status page of all tasks, or only those of `chat_id`.
+
+    Returns (page, msg, buttons) where `page` is a key of the visible tasks, used to
+    skip edits when only their speed, ETA or elapsed time changed. Task blocks and
+    bot stats are kept in `cache` so several views rendered in the same tick share
+    them.
+    """
+    if cache is None:
+        cache = {}
+    STATUS_LIMIT = config_dict["STATUS_LIMIT"]
+    if chat_id is None:
+        downloads = download_dict.snapshot()
+        tasks = len(downloads)
+        globals()["PAGES"] = (tasks + STATUS_LIMIT - 1) // STATUS_LIMIT
+        if PAGE_NO > PAGES and PAGES != 0:
+            globals()["STATUS_START"] = STATUS_LIMIT * (PAGES - 1)
+            globals()["PAGE_NO"] = PAGES
+        pages, page_no, start = PAGES, PAGE_NO, STATUS_START
+    else:
+        downloads = download_dict.by_chat(chat_id)
+        tasks = len(downloads)
+        pages = (tasks + STATUS_LIMIT - 1) // STATUS_LIMIT
+        page_no = max(min(PAGE_NO, pages), 1)
+        start = STATUS_LIMIT * (page_no - 1)
+    blocks = cache.setdefault("blocks", {})
+    msg = ""
+    keys = []
+    for download in downloads[start : STATUS_LIMIT + start]:
+        if (block := blocks.get(gid := download.gid())) is None:
+            block = blocks[gid] = get_task_status(download)
+        msg += block[0]
+        keys.append((gid, block[1]))
+
+    if len(msg) == 0:
+        return None, None, None
 
     msg += BotTheme("FOOTER")
     buttons = ButtonMaker()
-    buttons.ibutton(BotTheme("REFRESH", Page=f"{PAGE_NO}/{PAGES}"), "status ref")
+    buttons.ibutton(BotTheme("REFRESH", Page=f"{page_no}/{pages}"), "status ref")
     if tasks > STATUS_LIMIT:
         if config_dict["BOT_MAX_TASKS"]:
             msg += BotTheme(
@@ -386,20 +435,18 @@ def get_readable_message():
             msg += BotTheme("TASKS", Tasks=tasks)
         buttons = ButtonMaker()
         buttons.ibutton(BotTheme("PREVIOUS"), "status pre")
-        buttons.ibutton(BotTheme("REFRESH", Page=f"{PAGE_NO}/{PAGES}"), "status ref")
+        buttons.ibutton(BotTheme("REFRESH", Page=f"{page_no}/{pages}"), "status ref")
         buttons.ibutton(BotTheme("NEXT"), "status nex")
     button = buttons.build_menu(3)
-    msg += BotTheme("Cpu", cpu=cpu_percent())
-    msg += BotTheme(
-        "FREE",
-        free=get_readable_file_size(disk_usage(config_dict["DOWNLOAD_DIR"]).free),
-        free_p=round(100 - disk_usage(config_dict["DOWNLOAD_DIR"]).percent, 1),
-    )
-    msg += BotTheme("Ram", ram=virtual_memory().percent)
-    msg += BotTheme("uptime", uptime=get_readable_time(time() - botStartTime))
-    msg += BotTheme("DL", DL=get_readable_file_size(dl_speed))
-    msg += BotTheme("UL", UL=get_readable_file_size(up_speed))
-    return msg, button
+    page = (tuple(keys), tasks, page_no, pages)
+    if (stats := cache.get("stats")) is None:
+        stats = cache["stats"] = get_bot_status()
+    return page, msg + stats, button
+
+
+def get_status_views(chat_ids):
+    cache = {}
+    return {chat_id: get_status_view(chat_id, cache) for chat_id in chat_ids}
 
 
 async def turn_page(data):
@@ -756,52 +803,6 @@ async def get_stats(event, key="home"):
     return msg, btns.build_menu(2)
 
 
-async def getdailytasks(
-    user_id,
-    increase_task=False,
-    upleech=0,
-    upmirror=0,
-    check_mirror=False,
-    check_leech=False,
-):
-    task, lsize, msize = 0, 0, 0
-    if user_id in user_data and user_data[user_id].get("dly_tasks"):
-        userdate, task, lsize, msize = user_data[user_id]["dly_tasks"]
-        nowdate = datetime.now()
-        if (
-            userdate.year <= nowdate.year
-            and userdate.month <= nowdate.month
-            and userdate.day < nowdate.day
-        ):
-            task, lsize, msize = 0, 0, 0
-            if increase_task:
-                task = 1
-            elif upleech != 0:
-                lsize += upleech
-            elif upmirror != 0:
-                msize += upmirror
-        elif increase_task:
-            task += 1
-        elif upleech != 0:
-            lsize += upleech
-        elif upmirror != 0:
-            msize += upmirror
-    elif increase_task:
-        task += 1
-    elif upleech != 0:
-        lsize += upleech
-    elif upmirror != 0:
-        msize += upmirror
-    update_user_ldata(user_id, "dly_tasks", [datetime.now(), task, lsize, msize])
-    if DATABASE_URL:
-        await DbManger().update_user_data(user_id)
-    if check_leech:
-        return lsize
-    elif check_mirror:
-        return msize
-    return task
-
-
 async def fetch_user_tds(user_id, force=False):
     user_dict = user_data.get(user_id, {})
     if config_dict["USER_TD_MODE"] and user_dict.get("td_mode", False) or force:
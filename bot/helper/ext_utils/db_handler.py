@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
+from asyncio import Lock, shield, sleep
+from collections import OrderedDict
+from copy import deepcopy
 from aiofiles.os import path as aiopath, makedirs
 from aiofiles import open as aiopen
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from pymongo.errors import PyMongoError
 from dotenv import dotenv_values
 
@@ -15,15 +19,31 @@ from bot import (
     aria2_options,
     qbit_options,
     bot_loop,
+    download_dict,
 )
 
+USER_FLUSH_INTERVAL = 5
+USER_FLUSH_BATCH = 500
+USER_DOC_KEYS = ("thumb", "rclone")
+USER_EAGER_KEYS = ("is_auth", "is_sudo", "is_blacklist", "topic_ids")
+USER_CACHE_SIZE = 2000
+
 
 class DbManger:
     _instance = None
     _conn = None
     _db = None
     _err = False
-    
+    _dirty_users = set()
+    _persisted_users = {}
+    _pm_users = set()
+    _loaded_users = OrderedDict()
+    _loading_users = {}
+    _flushing_users = set()
+    _new_pm_users = set()
+    _flush_task = None
+    _flush_lock = Lock()
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -65,42 +85,42 @@ class DbManger:
         if self.__err:
             return
         # Save bot settings
-        await self.__db.settings.config.update_one(
-            {"_id": bot_id}, {"$set": config_dict}, upsert=True
-        )
+        stored_config = await self.__db.settings.config.find_one({"_id": bot_id}) or {}
+        if changed_config := {
+            k: v for k, v in config_dict.items() if stored_config.get(k) != v
+        }:
+            await self.__db.settings.config.update_one(
+                {"_id": bot_id}, {"$set": changed_config}, upsert=True
+            )
         # Save Aria2c options
-        if await self.__db.settings.aria2c.find_one({"_id": bot_id}) is None:
+        if (
+            await self.__db.settings.aria2c.find_one({"_id": bot_id}, {"_id": 1})
+            is None
+        ):
             await self.__db.settings.aria2c.update_one(
                 {"_id": bot_id}, {"$set": aria2_options}, upsert=True
             )
         # Save qbittorrent options
-        if await self.__db.settings.qbittorrent.find_one({"_id": bot_id}) is None:
+        if (
+            await self.__db.settings.qbittorrent.find_one({"_id": bot_id}, {"_id": 1})
+            is None
+        ):
             await self.__db.settings.qbittorrent.update_one(
                 {"_id": bot_id}, {"$set": qbit_options}, upsert=True
             )
-        # User Data
-        if await self.__db.users[bot_id].find_one():
-            rows = self.__db.users[bot_id].find({})
-            # return a dict ==> {_id, is_sudo, is_auth, as_doc, thumb, yt_opt, media_group, equal_splits, split_size, rclone}
-            async for row in rows:
-                uid = row["_id"]
-                del row["_id"]
-                thumb_path = f"Thumbnails/{uid}.jpg"
-                rclone_path = f"rclone/{uid}.conf"
-                if row.get("thumb"):
-                    if not await aiopath.exists("Thumbnails"):
-                        await makedirs("Thumbnails")
-                    async with aiopen(thumb_path, "wb+") as f:
-                        await f.write(row["thumb"])
-                    row["thumb"] = thumb_path
-                if row.get("rclone"):
-                    if not await aiopath.exists("rclone"):
-                        await makedirs("rclone")
-                    async with aiopen(rclone_path, "wb+") as f:
-                        await f.write(row["rclone"])
-                    row["rclone"] = rclone_path
-                user_data[uid] = row
-            LOGGER.info("Users data has been imported from Database")
+        # User Data, only access flags here; full documents load on first use
+        rows = self.__db.users[bot_id].find(
+            {"$or": [{k: {"$exists": True}} for k in USER_EAGER_KEYS]},
+            {k: 1 for k in USER_EAGER_KEYS},
+        )
+        async for row in rows:
+            uid = row["_id"]
+            del row["_id"]
+            user_data[uid] = row
+        LOGGER.info("Users access data has been imported from Database")
+        self._pm_users.update(
+            [doc["_id"] async for doc in self.__db.pm_users[bot_id].find({})]
+        )
         # Rss Data
         if await self.__db.rss[bot_id].find_one():
             # return a dict ==> {_id, title: {link, last_feed, last_name, inf, exf, command, paused}
@@ -162,15 +182,142 @@ class DbManger:
         else:
             self.__conn.close
 
+    async def load_user(self, user_id):
+        if self.__err:
+            return
+        if user_id in self._loaded_users:
+            self._loaded_users.move_to_end(user_id)
+            return
+        # Concurrent updates of the same user wait for the one load in flight.
+        if (task := self._loading_users.get(user_id)) is None:
+            task = self._loading_users[user_id] = bot_loop.create_task(
+                self.__load_user(user_id)
+            )
+            task.add_done_callback(lambda _: self._loading_users.pop(user_id, None))
+        await shield(task)
+
+    async def __load_user(self, user_id):
+        try:
+            row = await self.__db.users[bot_id].find_one({"_id": user_id})
+        except PyMongoError as e:
+            LOGGER.error(f"Error in loading User {user_id}: {e}")
+            return
+        if row:
+            del row["_id"]
+            for key, path in (
+                ("thumb", f"Thumbnails/{user_id}.jpg"),
+                ("rclone", f"rclone/{user_id}.conf"),
+            ):
+                if not row.get(key):
+                    continue
+                if not await aiopath.exists(path):
+                    await makedirs(path.split("/", 1)[0], exist_ok=True)
+                    async with aiopen(path, "wb+") as f:
+                        await f.write(row[key])
+                row[key] = path
+            data = user_data.setdefault(user_id, {})
+            if user_id in self._dirty_users or user_id in self._flushing_users:
+                # Keep changes that are still waiting to be written.
+                for key, value in row.items():
+                    data.setdefault(key, value)
+            else:
+                data.update(row)
+            self._persisted_users[user_id] = self.__user_fields(row)
+        self._loaded_users[user_id] = True
+        self.__evict_users()
+
+    def __evict_users(self):
+        if len(self._loaded_users) <= USER_CACHE_SIZE:
+            return
+        busy = {
+            (dl.message.from_user or dl.message.sender_chat).id
+            for dl in list(download_dict.values())
+        }
+        busy.update(self._dirty_users)
+        for uid in list(self._loaded_users):
+            if len(self._loaded_users) <= USER_CACHE_SIZE:
+                break
+            if uid in busy:
+                continue
+            del self._loaded_users[uid]
+            self._persisted_users.pop(uid, None)
+            if uid in user_data:
+                if eager := {
+                    k: v for k, v in user_data[uid].items() if k in USER_EAGER_KEYS
+                }:
+                    user_data[uid] = eager
+                else:
+                    del user_data[uid]
+
+    @staticmethod
+    def __user_fields(data):
+        return deepcopy({k: v for k, v in data.items() if k not in USER_DOC_KEYS})
+
+    def __schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            DbManger._flush_task = bot_loop.create_task(self.__delayed_flush())
+
+    async def __delayed_flush(self):
+        await sleep(USER_FLUSH_INTERVAL)
+        await self.flush_user_data()
+
     async def update_user_data(self, user_id):
         if self.__err:
             return
-        data = user_data[user_id]
-        if data.get("thumb"):
-            del data["thumb"]
-        if data.get("rclone"):
-            del data["rclone"]
-        await self.__db.users[bot_id].replace_one({"_id": user_id}, data, upsert=True)
+        self._dirty_users.add(user_id)
+        self.__schedule_flush()
+
+    async def flush_user_data(self):
+        if self.__err:
+            return
+        async with self._flush_lock:
+            dirty_users = list(self._dirty_users)
+            new_pm_users = list(self._new_pm_users)
+            self._flushing_users.update(dirty_users)
+            self._dirty_users.clear()
+            self._new_pm_users.clear()
+            ops, snapshots = [], {}
+            for user_id in dirty_users:
+                if user_id not in user_data:
+                    continue
+                current = self.__user_fields(user_data[user_id])
+                persisted = self._persisted_users.get(user_id, {})
+                update = {}
+                if changed := {
+                    k: v
+                    for k, v in current.items()
+                    if k not in persisted or persisted[k] != v
+                }:
+                    update["$set"] = changed
+                if removed := {k: "" for k in persisted if k not in current}:
+                    update["$unset"] = removed
+                if update:
+                    ops.append(UpdateOne({"_id": user_id}, update, upsert=True))
+                    snapshots[user_id] = current
+            try:
+                for i in range(0, len(ops), USER_FLUSH_BATCH):
+                    await self.__db.users[bot_id].bulk_write(
+                        ops[i : i + USER_FLUSH_BATCH], ordered=False
+                    )
+                for i in range(0, len(new_pm_users), USER_FLUSH_BATCH):
+                    await self.__db.pm_users[bot_id].bulk_write(
+                        [
+                            UpdateOne(
+                                {"_id": uid}, {"$setOnInsert": {"_id": uid}}, upsert=True
+                            )
+                            for uid in new_pm_users[i : i + USER_FLUSH_BATCH]
+                        ],
+                        ordered=False,
+                    )
+            except PyMongoError as e:
+                LOGGER.error(f"Error in flushing Users data: {e}")
+                self._dirty_users.update(dirty_users)
+                self._new_pm_users.update(new_pm_users)
+                self.__schedule_flush()
+                return
+            finally:
+                self._flushing_users.difference_update(dirty_users)
+            self._persisted_users.update(snapshots)
         self.__conn.close
 
     async def update_user_doc(self, user_id, key, path=""):
@@ -186,22 +333,37 @@ class DbManger:
         )
         self.__conn.close
 
+    async def get_users(self):
+        """Documents of every user, without the thumbnail and rclone files."""
+        if self.__err:
+            return {}
+        await self.flush_user_data()
+        users = {}
+        async for row in self.__db.users[bot_id].find(
+            {}, {k: 0 for k in USER_DOC_KEYS}
+        ):
+            users[row.pop("_id")] = row
+        return users
+
     async def get_pm_uids(self):
         if self.__err:
             return
+        await self.flush_user_data()
         return [doc["_id"] async for doc in self.__db.pm_users[bot_id].find({})]
 
     async def update_pm_users(self, user_id):
-        if self.__err:
+        if self.__err or user_id in self._pm_users:
             return
-        if not bool(await self.__db.pm_users[bot_id].find_one({"_id": user_id})):
-            await self.__db.pm_users[bot_id].insert_one({"_id": user_id})
-            LOGGER.info(f"New PM User Added : {user_id}")
-        self.__conn.close
+        self._pm_users.add(user_id)
+        self._new_pm_users.add(user_id)
+        self.__schedule_flush()
+        LOGGER.info(f"New PM User Added : {user_id}")
 
     async def rm_pm_user(self, user_id):
         if self.__err:
             return
+        self._pm_users.discard(user_id)
+        self._new_pm_users.discard(user_id)
         await self.__db.pm_users[bot_id].delete_one({"_id": user_id})
         self.__conn.close
 
@@ -228,6 +390,63 @@ class DbManger:
         await self.__db.rss[bot_id].delete_one({"_id": user_id})
         self.__conn.close
 
+    async def get_upload_cache(self, key):
+        if self.__err:
+            return None
+        try:
+            return await self.__db.upload_cache[bot_id].find_one({"_id": key})
+        except PyMongoError as e:
+            LOGGER.error(f"Error in loading Upload Cache: {e}")
+            return None
+
+    async def update_upload_cache(self, key, entry):
+        if self.__err:
+            return
+        try:
+            await self.__db.upload_cache[bot_id].update_one(
+                {"_id": key}, {"$set": entry}, upsert=True
+            )
+        except PyMongoError as e:
+            LOGGER.error(f"Error in updating Upload Cache: {e}")
+        self.__conn.close
+
+    async def rm_upload_cache(self, key):
+        if self.__err:
+            return
+        try:
+            await self.__db.upload_cache[bot_id].delete_one({"_id": key})
+        except PyMongoError as e:
+            LOGGER.error(f"Error in removing Upload Cache: {e}")
+        self.__conn.close
+
+    async def update_resume_task(self, uid, task):
+        if self.__err:
+            return
+        try:
+            await self.__db.resume[bot_id].update_one(
+                {"_id": uid}, {"$set": task}, upsert=True
+            )
+        except PyMongoError as e:
+            LOGGER.error(f"Error in updating Resume Task: {e}")
+        self.__conn.close
+
+    async def rm_resume_task(self, uid):
+        if self.__err:
+            return
+        try:
+            await self.__db.resume[bot_id].delete_one({"_id": uid})
+        except PyMongoError as e:
+            LOGGER.error(f"Error in removing Resume Task: {e}")
+        self.__conn.close
+
+    async def get_resume_tasks(self):
+        if self.__err:
+            return []
+        tasks = [row async for row in self.__db.resume[bot_id].find({})]
+        await self.__db.resume[bot_id].drop()
+        self.__conn.close
+        return tasks
+
     async def add_incomplete_task(self, cid, link, tag, msg_link, msg):
         if self.__err:
             return
@@ -20,3 +20,9 @@ class TgLinkException(Exception):
     """No Access granted for this chat"""
 
     pass
+
+
+class RcloneRcError(Exception):
+    """Error returned by the rclone rc daemon"""
+
+    pass
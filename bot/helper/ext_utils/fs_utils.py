@@ -4,7 +4,7 @@ from aiofiles.os import remove as aioremove, path as aiopath, listdir, rmdir, ma
 from aioshutil import rmtree as aiormtree, move
 from asyncio import create_subprocess_exec
 from asyncio.subprocess import PIPE
-from shutil import rmtree, disk_usage
+from shutil import rmtree
 from magic import Magic
 from re import split as re_split, I, search as re_search
 from subprocess import run as srun
@@ -14,6 +14,7 @@ from bot import bot_cache
 from .exceptions import NotSupportedExtractionArchive
 from bot import aria2, LOGGER, DOWNLOAD_DIR, get_client, GLOBAL_EXTENSION_FILTER
 from bot.helper.ext_utils.bot_utils import sync_to_async, cmd_exec
+from bot.helper.ext_utils.resume_manager import resume_manager
 
 ARCH_EXT = [
     ".tar.bz2",
@@ -96,16 +97,29 @@ async def clean_download(path):
             pass
 
 
-async def start_cleanup():
+async def start_cleanup(keep=()):
+    # Files are left in place, a resumed torrent is rechecked against them.
     get_client().torrents_delete(torrent_hashes="all")
     try:
-        await aiormtree(DOWNLOAD_DIR)
+        if keep and await aiopath.isdir(DOWNLOAD_DIR):
+            for item in await listdir(DOWNLOAD_DIR):
+                if (path := f"{DOWNLOAD_DIR}{item}") in keep:
+                    LOGGER.info(f"Keeping partial download: {path}")
+                elif await aiopath.isdir(path):
+                    await aiormtree(path)
+                else:
+                    await aioremove(path)
+        else:
+            await aiormtree(DOWNLOAD_DIR)
     except Exception:
         pass
     await makedirs(DOWNLOAD_DIR, exist_ok=True)
 
 
 def clean_all():
+    if resume_manager.enabled():
+        # Leave the data of running tasks for them to resume on the next start.
+        return
     aria2.remove_all(True)
     get_client().torrents_delete(torrent_hashes="all")
     try:
@@ -180,24 +194,6 @@ def get_mime_type(file_path):
     return mime_type
 
 
-def check_storage_threshold(size, threshold, arch=False, alloc=False):
-    free = disk_usage(DOWNLOAD_DIR).free
-    if not alloc:
-        if (
-            not arch
-            and free - size < threshold
-            or arch
-            and free - (size * 2) < threshold
-        ):
-            return False
-    elif not arch:
-        if free < threshold:
-            return False
-    elif free - size < threshold:
-        return False
-    return True
-
-
 async def join_files(path):
     files = await listdir(path)
     results = []
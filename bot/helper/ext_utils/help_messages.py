@@ -249,6 +249,7 @@ Some links need user access so sure you must add USER_SESSION_STRING for it.
 • <b>Public:</b> <code>https://t.me/channel_name/message_id</code>
 • <b>Private:</b> <code>tg://openmessage?user_id=xxxxxx&message_id=xxxxx</code>
 • <b>Super:</b> <code>https://t.me/c/channel_id/message_id</code>
+• <b>Range:</b> <code>https://t.me/c/channel_id/first_id-last_id</code> downloads every media in the range as one folder.
 
 ➲ <b>NOTES:</b>
 1. Commands that start with <b>qb</b> are ONLY for torrents.
@@ -361,7 +362,7 @@ help_string = [
 ┖ /login: Login to Bot to Access Bot without Temp Pass System (Private)
 
 <b>Bot Stats:</b>
-┠ /{BotCommands.StatusCommand[0]} or /{BotCommands.StatusCommand[1]}: Shows a status page of all active tasks.
+┠ /{BotCommands.StatusCommand[0]} or /{BotCommands.StatusCommand[1]}: Shows a status page of all active tasks. Add <code>chat</code> to only show tasks of this chat.
 ┠ /{BotCommands.StatsCommand[0]} or /{BotCommands.StatsCommand[1]}: Show Server detailed stats.
 ┖ /{BotCommands.PingCommand[0]} or /{BotCommands.PingCommand[1]}: Check how long it takes to Ping the Bot.
 
@@ -487,8 +488,10 @@ default_desp = {
     "MIRROR_LOG_ID": "Chat ID to where Mirror files would be Send. Int. NOTE: Only available for superGroup/channel. Add -100 before channel/superGroup id. In short don't add bot id or your id!. For Multiple id Separate them by space.",
     "EQUAL_SPLITS": "Split files larger than LEECH_SPLIT_SIZE into equal parts size (Not working with zip cmd). Default is False.",
     "EXTENSION_FILTER": "File extensions that won't upload/clone. Separate them by space.",
+    "GDRIVE_DEDUPE": "Hash each file before uploading it to Drive and make a server-side copy of an identical file (same md5 and size) already under GDRIVE_ID instead of uploading it again. Default is False",
     "GDRIVE_ID": "This is the Folder/TeamDrive ID of the Google Drive OR root to which you want to upload all the mirrors using google-api-python-client.",
     "INCOMPLETE_TASK_NOTIFIER": "Get incomplete task messages after restart. Require database and superGroup. Default is False",
+    "RESUME_TASKS": "Keep the partial data of running tasks across restarts and submit them again when the bot starts, so aria2 and qBittorrent continue from what is already on disk. Require database. Default is False",
     "INDEX_URL": "Refer to https://gitlab.com/ParveenBhadooOfficial/Google-Drive-Index.",
     "IS_TEAM_DRIVE": "Set True if uploading to TeamDrive using google-api-python-client. Default is False",
     "SHOW_MEDIAINFO": "Add Button to Show MediaInfo in Leeched file. Bool",
@@ -1,18 +1,22 @@
 from hashlib import md5
+from io import RawIOBase, SEEK_SET, SEEK_CUR, SEEK_END
+from json import dumps, loads
 from time import strftime, gmtime, time
 from re import sub as re_sub, search as re_search
 from shlex import split as ssplit
 from natsort import natsorted
-from os import path as ospath
+from os import path as ospath, listdir as listdir_sync, utime
+from shutil import rmtree
+from aiofiles import open as aiopen
 from aiofiles.os import remove as aioremove, path as aiopath, mkdir, makedirs, listdir
-from aioshutil import rmtree as aiormtree
+from aioshutil import rmtree as aiormtree, copytree as aiocopytree
 from contextlib import suppress
 from asyncio import create_subprocess_exec, create_task, gather, Semaphore
 from asyncio.subprocess import PIPE
 from telegraph import upload_file
 from langcodes import Language
 
-from bot import LOGGER, MAX_SPLIT_SIZE, config_dict, user_data
+from bot import LOGGER, MAX_SPLIT_SIZE, config_dict, user_data, bot_cache
 from bot.modules.mediainfo import parseinfo
 from bot.helper.ext_utils.bot_utils import (
     cmd_exec,
@@ -23,6 +27,10 @@ from bot.helper.ext_utils.bot_utils import (
 from bot.helper.ext_utils.fs_utils import ARCH_EXT, get_mime_type
 from bot.helper.ext_utils.telegraph_helper import telegraph
 
+SS_CACHE_DIR = "Thumbnails/cache"
+SS_CACHE_LIMIT = 100
+SS_BATCH_SIZE = 8
+
 
 async def is_multi_streams(path):
     try:
@@ -182,58 +190,190 @@ async def get_audio_thumb(audio_file):
     return des_dir
 
 
-async def take_ss(video_file, duration=None, total=1, gen_ss=False):
+def get_content_key(path, sample=1048576, offset=0, size=None):
+    if size is None:
+        size = ospath.getsize(path) - offset
+    content_hash = md5(str(size).encode())
+    with open(path, "rb") as f:
+        for start in sorted(
+            {0, max(size // 2 - sample // 2, 0), max(size - sample, 0)}
+        ):
+            f.seek(offset + start)
+            content_hash.update(f.read(min(sample, size - start)))
+    return content_hash.hexdigest()
+
+
+def prune_ss_cache(limit=SS_CACHE_LIMIT):
+    if not ospath.isdir(SS_CACHE_DIR):
+        return
+    entries = sorted(
+        (ospath.join(SS_CACHE_DIR, name) for name in listdir_sync(SS_CACHE_DIR)),
+        key=ospath.getmtime,
+    )
+    for entry in entries[: max(len(entries) - limit, 0)]:
+        rmtree(entry, ignore_errors=True)
+
+
+async def take_ss(video_file, duration=None, total=1, gen_ss=False, ckey=None):
     des_dir = ospath.join("Thumbnails", f"{time()}")
     await makedirs(des_dir, exist_ok=True)
+    if ckey is None:
+        try:
+            ckey = await sync_to_async(get_content_key, video_file)
+        except Exception as e:
+            LOGGER.error(f"Content Key: {e}. Path: {video_file}")
+    cache_dir = ospath.join(SS_CACHE_DIR, f"{ckey}_{total}") if ckey else None
+    stamps_file = "tstamps.json"
+    if cache_dir and await aiopath.exists(ospath.join(cache_dir, stamps_file)):
+        try:
+            await aiocopytree(cache_dir, des_dir, dirs_exist_ok=True)
+            async with aiopen(ospath.join(des_dir, stamps_file)) as f:
+                tstamps = loads(await f.read())
+            await aioremove(ospath.join(des_dir, stamps_file))
+            await sync_to_async(utime, cache_dir)
+            return (
+                (des_dir, tstamps)
+                if gen_ss
+                else ospath.join(des_dir, "wz_thumb_1.jpg")
+            )
+        except Exception as e:
+            LOGGER.error(f"Thumbnail Cache: {e}. Path: {video_file}")
+            await aiormtree(des_dir, ignore_errors=True)
+            await makedirs(des_dir, exist_ok=True)
+
     if duration is None:
         duration = (await get_media_info(video_file))[0]
     if duration == 0:
         duration = 3
     duration = duration - (duration * 2 / 100)
-    cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-ss",
-        "",
-        "-i",
-        video_file,
-        "-vf",
-        "thumbnail",
-        "-frames:v",
-        "1",
-        des_dir,
-    ]
     tstamps = {}
-    thumb_sem = Semaphore(3)
-
-    async def extract_ss(eq_thumb):
-        async with thumb_sem:
-            cmd[5] = str((duration // total) * eq_thumb)
-            tstamps[f"wz_thumb_{eq_thumb}.jpg"] = strftime(
-                "%H:%M:%S", gmtime(float(cmd[5]))
+    positions = []
+    for eq_thumb in range(1, total + 1):
+        position = (duration // total) * eq_thumb
+        tstamps[f"wz_thumb_{eq_thumb}.jpg"] = strftime("%H:%M:%S", gmtime(position))
+        positions.append((eq_thumb, position))
+
+    # One ffmpeg process seeks every input of a batch, instead of one process per frame
+    batch_size = 1 if total == 1 else SS_BATCH_SIZE
+    thumb_sem = Semaphore(2)
+
+    async def extract_batch(batch):
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        for _, position in batch:
+            cmd.extend(["-ss", str(position), "-i", video_file])
+        for index, (eq_thumb, _) in enumerate(batch):
+            cmd.extend(
+                [
+                    "-map",
+                    f"{index}:V:0",
+                    "-vf",
+                    "thumbnail" if total == 1 else "thumbnail=n=25",
+                    "-frames:v",
+                    "1",
+                    ospath.join(des_dir, f"wz_thumb_{eq_thumb}.jpg"),
+                ]
             )
-            cmd[-1] = ospath.join(des_dir, f"wz_thumb_{eq_thumb}.jpg")
+        async with thumb_sem:
             task = await create_subprocess_exec(*cmd, stderr=PIPE)
-            return (task, await task.wait(), eq_thumb)
+            return (task, await task.wait(), batch)
 
-    tasks = [extract_ss(eq_thumb) for eq_thumb in range(1, total + 1)]
-    status = await gather(*tasks)
+    status = await gather(
+        *[
+            extract_batch(positions[i : i + batch_size])
+            for i in range(0, total, batch_size)
+        ]
+    )
 
-    for task, rtype, eq_thumb in status:
-        if rtype != 0 or not await aiopath.exists(
-            ospath.join(des_dir, f"wz_thumb_{eq_thumb}.jpg")
-        ):
+    for task, rtype, batch in status:
+        missing = [
+            eq_thumb
+            for eq_thumb, _ in batch
+            if not await aiopath.exists(
+                ospath.join(des_dir, f"wz_thumb_{eq_thumb}.jpg")
+            )
+        ]
+        if rtype != 0 or missing:
             err = (await task.stderr.read()).decode().strip()
             LOGGER.error(
-                f"Error while extracting thumbnail no. {eq_thumb} from video. Name: {video_file} stderr: {err}"
+                f"Error while extracting thumbnail no. {missing or [b[0] for b in batch]} from video. Name: {video_file} stderr: {err}"
             )
             await aiormtree(des_dir)
             return None
+
+    if cache_dir:
+        try:
+            await aiocopytree(des_dir, cache_dir, dirs_exist_ok=True)
+            async with aiopen(ospath.join(cache_dir, stamps_file), "w") as f:
+                await f.write(dumps(tstamps))
+            await sync_to_async(prune_ss_cache)
+        except Exception as e:
+            LOGGER.error(f"Thumbnail Cache: {e}. Path: {video_file}")
     return (des_dir, tstamps) if gen_ss else ospath.join(des_dir, "wz_thumb_1.jpg")
 
 
+class FilePart(RawIOBase):
+    """Read-only view of a byte range of a file, uploaded in place of a split part."""
+
+    def __init__(self, path, name, offset, length):
+        super().__init__()
+        self.path = path
+        self.name = name
+        self.offset = offset
+        self.length = length
+        self.__pos = 0
+        self.__file = open(path, "rb")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.__pos
+
+    def seek(self, pos, whence=SEEK_SET):
+        if whence == SEEK_CUR:
+            pos += self.__pos
+        elif whence == SEEK_END:
+            pos += self.length
+        self.__pos = min(max(pos, 0), self.length)
+        return self.__pos
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.length - self.__pos)
+        if size <= 0:
+            return 0
+        self.__file.seek(self.offset + self.__pos)
+        read = self.__file.readinto(memoryview(buffer)[:size])
+        self.__pos += read
+        return read
+
+    def close(self):
+        self.__file.close()
+        super().close()
+
+
+def get_split_size(size, split_size, listener):
+    user_dict = user_data.get(listener.message.from_user.id, {})
+    leech_split_size = user_dict.get("split_size") or config_dict["LEECH_SPLIT_SIZE"]
+    parts = -(-size // leech_split_size)
+    if (
+        user_dict.get("equal_splits")
+        or config_dict["EQUAL_SPLITS"]
+        and "equal_splits" not in user_dict
+    ):
+        split_size = ((size + parts - 1) // parts) + 1000
+    return split_size
+
+
+def get_split_parts(size, split_size):
+    return [
+        (offset, min(split_size, size - offset))
+        for offset in range(0, size, split_size)
+    ]
+
+
 async def split_file(
     path,
     size,
@@ -256,16 +396,11 @@ async def split_file(
         dirpath = f"{dirpath}/splited_files_mltb"
         if not await aiopath.exists(dirpath):
             await mkdir(dirpath)
-    user_id = listener.message.from_user.id
-    user_dict = user_data.get(user_id, {})
+    user_dict = user_data.get(listener.message.from_user.id, {})
     leech_split_size = user_dict.get("split_size") or config_dict["LEECH_SPLIT_SIZE"]
     parts = -(-size // leech_split_size)
-    if (
-        user_dict.get("equal_splits")
-        or config_dict["EQUAL_SPLITS"]
-        and "equal_splits" not in user_dict
-    ) and not inLoop:
-        split_size = ((size + parts - 1) // parts) + 1000
+    if not inLoop:
+        split_size = get_split_size(size, split_size, listener)
     if (await get_document_type(path))[0]:
         if multi_streams:
             multi_streams = await is_multi_streams(path)
@@ -390,7 +525,7 @@ async def split_file(
     return True
 
 
-async def format_filename(file_, user_id, dirpath=None, isMirror=False):
+async def format_filename(file_, user_id, dirpath=None, isMirror=False, part=None):
     user_dict = user_data.get(user_id, {})
     ftag, ctag = ("m", "MIRROR") if isMirror else ("l", "LEECH")
     prefix = (
@@ -479,16 +614,18 @@ async def format_filename(file_, user_id, dirpath=None, isMirror=False):
         )
         slit = lcaption.split("|")
         slit[0] = re_sub(r"\{([^}]+)\}", lowerVars, slit[0])
-        up_path = ospath.join(dirpath, prefile_)
+        up_path = part.path if part else ospath.join(dirpath, prefile_)
         dur, qual, lang, subs = await get_media_info(up_path, True)
         cap_mono = slit[0].format(
             filename=nfile_,
-            size=get_readable_file_size(await aiopath.getsize(up_path)),
+            size=get_readable_file_size(
+                part.length if part else await aiopath.getsize(up_path)
+            ),
             duration=get_readable_time(dur),
             quality=qual,
             languages=lang,
             subtitles=subs,
-            md5_hash=get_md5_hash(up_path),
+            md5_hash=get_md5_hash(up_path, part),
         )
         if len(slit) > 1:
             for rep in range(1, len(slit)):
@@ -504,7 +641,12 @@ async def format_filename(file_, user_id, dirpath=None, isMirror=False):
 
 
 async def get_ss(up_path, ss_no):
-    thumbs_path, tstamps = await take_ss(up_path, total=min(ss_no, 250), gen_ss=True)
+    ss_no = min(ss_no, 250)
+    ckey = await sync_to_async(get_content_key, up_path)
+    ss_links = bot_cache.setdefault("ss_links", {})
+    if link := ss_links.get((ckey, ss_no)):
+        return link
+    thumbs_path, tstamps = await take_ss(up_path, total=ss_no, gen_ss=True, ckey=ckey)
     th_html = f"📌 <h4>{ospath.basename(up_path)}</h4><br>📇 <b>Total Screenshots:</b> {ss_no}<br><br>"
     up_sem = Semaphore(25)
 
@@ -523,7 +665,8 @@ async def get_ss(up_path, ss_no):
     link_id = (await telegraph.create_page(title="ScreenShots X", content=th_html))[
         "path"
     ]
-    return f"https://graph.org/{link_id}"
+    ss_links[(ckey, ss_no)] = f"https://graph.org/{link_id}"
+    return ss_links[(ckey, ss_no)]
 
 
 async def get_mediainfo_link(up_path):
@@ -535,9 +678,13 @@ async def get_mediainfo_link(up_path):
     return f"https://graph.org/{link_id}"
 
 
-def get_md5_hash(up_path):
+def get_md5_hash(up_path, part=None):
     md5_hash = md5()
-    with open(up_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
+    with (
+        FilePart(part.path, part.name, part.offset, part.length)
+        if part
+        else open(up_path, "rb")
+    ) as f:
+        for byte_block in iter(lambda: f.read(1048576), b""):
             md5_hash.update(byte_block)
         return md5_hash.hexdigest()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+from datetime import datetime
+from pytz import timezone
+
+from bot import config_dict, user_data, DATABASE_URL, LOGGER
+from bot.helper.ext_utils.bot_utils import update_user_ldata, get_readable_file_size
+from bot.helper.ext_utils.db_handler import DbManger
+
+
+class QuotaLedger:
+    def __init__(self):
+        self.__held = {}
+        self.__reservations = {}
+
+    @staticmethod
+    def __today():
+        return datetime.now(timezone(config_dict["TIMEZONE"])).date()
+
+    def __get_usage(self, user_id):
+        # Read from the user's document each time, so a document loaded after
+        # the first check is never overwritten with fresh counters.
+        today = self.__today()
+        if dly_tasks := user_data.get(user_id, {}).get("dly_tasks"):
+            last_used, task, lsize, msize = dly_tasks
+            tz = timezone(config_dict["TIMEZONE"])
+            if last_used.astimezone(tz).date() == today:
+                return [today, task, lsize, msize]
+        return [today, 0, 0, 0]
+
+    def usage(self, user_id):
+        usage = self.__get_usage(user_id)
+        held = self.__held.get(user_id, [0, 0, 0])
+        return {
+            "tasks": usage[1] + held[0],
+            "leech": usage[2] + held[1],
+            "mirror": usage[3] + held[2],
+        }
+
+    def reserve(self, uid, user_id, size, isLeech=False):
+        self.release(uid)
+        used = self.usage(user_id)
+        if (limit := config_dict["DAILY_TASK_LIMIT"]) and used["tasks"] >= limit:
+            return f"Daily Total Task Limit: {limit}\nYou have exhausted all your Daily Task Limits."
+        mode, key = ("Leech", "leech") if isLeech else ("Mirror", "mirror")
+        if limit := config_dict[f"DAILY_{mode.upper()}_LIMIT"]:
+            limit = limit * 1024**3
+            if size >= limit - used[key]:
+                return f"Daily {mode} Limit is {get_readable_file_size(limit)}\nYou have exhausted all your Daily {mode} Limit."
+        index = 1 if isLeech else 2
+        held = self.__held.setdefault(user_id, [0, 0, 0])
+        held[0] += 1
+        held[index] += size
+        self.__reservations[uid] = (user_id, index, size)
+        LOGGER.info(
+            f"User: {user_id} | Daily Tasks: {used['tasks'] + 1} | Daily {mode} Size : {get_readable_file_size(used[key] + size)}"
+        )
+        return None
+
+    def release(self, uid):
+        if (reservation := self.__reservations.pop(uid, None)) is None:
+            return None
+        user_id, index, size = reservation
+        held = self.__held[user_id]
+        held[0] -= 1
+        held[index] -= size
+        if not any(held):
+            del self.__held[user_id]
+        return reservation
+
+    async def commit(self, uid):
+        if (reservation := self.release(uid)) is None:
+            return
+        user_id, index, size = reservation
+        usage = self.__get_usage(user_id)
+        usage[1] += 1
+        usage[index + 1] += size
+        update_user_ldata(user_id, "dly_tasks", [datetime.now(), *usage[1:]])
+        if DATABASE_URL:
+            await DbManger().update_user_data(user_id)
+
+
+quota_ledger = QuotaLedger()
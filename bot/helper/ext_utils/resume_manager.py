@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+from re import sub as re_sub
+
+from bot import bot, config_dict, DATABASE_URL, DOWNLOAD_DIR, LOGGER
+from bot.helper.ext_utils.db_handler import DbManger
+
+
+class ResumeManager:
+    """Checkpoints running tasks so they can be submitted again after a restart.
+
+    A resumed task runs its original command on the original message, so it gets
+    the same download directory back. Aria2 continues from its control files and
+    qBittorrent rechecks the data it finds on disk, so only what is missing is
+    downloaded again. Tasks that had already finished downloading start over from
+    a clean directory, since their data may have been extracted or split in place.
+    """
+
+    def __init__(self):
+        self.__tasks = []
+
+    @staticmethod
+    def enabled():
+        return bool(config_dict["RESUME_TASKS"] and DATABASE_URL)
+
+    async def save(self, listener, stage):
+        if (
+            not self.enabled()
+            or listener.sameDir
+            or listener.select
+            or listener.uid != listener.message.id
+        ):
+            # Items of a -i/-b batch have no message of their own to resume from.
+            return
+        lines = listener.message.text.split("\n")
+        lines[0] = re_sub(r"\s+-i\s+\d+", "", lines[0])
+        await DbManger().update_resume_task(
+            listener.uid,
+            {
+                "cid": listener.message.chat.id,
+                "user_id": listener.message.from_user.id,
+                "text": "\n".join(lines),
+                "qbit": listener.isQbit,
+                "leech": listener.isLeech,
+                "ytdlp": listener.isYtdlp,
+                "stage": stage,
+            },
+        )
+
+    async def remove(self, listener):
+        if self.enabled():
+            await DbManger().rm_resume_task(listener.uid)
+
+    async def load(self):
+        if self.enabled():
+            self.__tasks = await DbManger().get_resume_tasks()
+
+    def kept_paths(self):
+        return [
+            f"{DOWNLOAD_DIR}{task['_id']}"
+            for task in self.__tasks
+            if task["stage"] == "dl"
+        ]
+
+    async def resume(self, dispatch):
+        tasks, self.__tasks = self.__tasks, []
+        for task in tasks:
+            try:
+                message = await bot.get_messages(task["cid"], task["_id"])
+                if message.empty:
+                    raise ValueError("message was deleted")
+                if not message.from_user or message.from_user.id != task["user_id"]:
+                    message.from_user = await bot.get_users(task["user_id"])
+            except Exception as e:
+                LOGGER.error(f"Unable to resume task {task['_id']}: {e}")
+                continue
+            message.text = task["text"]
+            # Run it with the owner's settings, not the defaults.
+            await DbManger().load_user(task["user_id"])
+            LOGGER.info(f"Resuming task {task['_id']} from {task['stage']} stage")
+            dispatch(message, task)
+
+
+resume_manager = ResumeManager()
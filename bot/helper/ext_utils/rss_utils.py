@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+from asyncio import Queue, Semaphore
+from collections import deque
+from urllib.parse import urlparse
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from feedparser import parse as feedparse
+
+from bot import LOGGER, bot_loop
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.telegram_helper.message_utils import sendRss
+
+RSS_HOST_LIMIT = 4
+RSS_FETCH_TIMEOUT = 60
+RSS_MATCHER_CACHE = 256
+
+
+class RssFetcher:
+    def __init__(self):
+        self.__session = None
+        self.__host_limits = {}
+        self.__validators = {}
+
+    def __get_session(self):
+        if self.__session is None or self.__session.closed:
+            self.__session = ClientSession(
+                connector=TCPConnector(limit=0, ttl_dns_cache=300),
+                timeout=ClientTimeout(total=RSS_FETCH_TIMEOUT),
+                trust_env=True,
+            )
+        return self.__session
+
+    def __host_limit(self, url):
+        host = urlparse(url).netloc
+        if (sem := self.__host_limits.get(host)) is None:
+            sem = self.__host_limits[host] = Semaphore(RSS_HOST_LIMIT)
+        return sem
+
+    async def fetch(self, url, conditional=True):
+        """Return the parsed feed or None when the server reports it unchanged."""
+        headers = {}
+        if conditional and (validators := self.__validators.get(url)):
+            etag, modified = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if modified:
+                headers["If-Modified-Since"] = modified
+        async with self.__host_limit(url):
+            async with self.__get_session().get(url, headers=headers) as res:
+                if res.status == 304:
+                    return None
+                html = await res.text()
+                etag = res.headers.get("ETag")
+                modified = res.headers.get("Last-Modified")
+        if conditional:
+            if etag or modified:
+                self.__validators[url] = (etag, modified)
+            else:
+                self.__validators.pop(url, None)
+        return await sync_to_async(feedparse, html)
+
+    def forget(self, url):
+        self.__validators.pop(url, None)
+
+    async def close(self):
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+
+
+class TermMatcher:
+    """Aho-Corasick automaton reporting every term found in a text in one pass."""
+
+    def __init__(self, terms):
+        self.__goto = [{}]
+        self.__fail = [0]
+        self.__out = [set()]
+        self.__always = frozenset(term for term in terms if not term)
+        for term in terms:
+            if term:
+                self.__add(term)
+        self.__build()
+
+    def __add(self, term):
+        node = 0
+        for char in term:
+            if (nxt := self.__goto[node].get(char)) is None:
+                nxt = len(self.__goto)
+                self.__goto[node][char] = nxt
+                self.__goto.append({})
+                self.__fail.append(0)
+                self.__out.append(set())
+            node = nxt
+        self.__out[node].add(term)
+
+    def __build(self):
+        queue = deque(self.__goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self.__goto[node].items():
+                queue.append(nxt)
+                fail = self.__fail[node]
+                while fail and char not in self.__goto[fail]:
+                    fail = self.__fail[fail]
+                self.__fail[nxt] = self.__goto[fail].get(char, 0)
+                self.__out[nxt] |= self.__out[self.__fail[nxt]]
+
+    def match(self, text):
+        found = set(self.__always)
+        goto, fail, out = self.__goto, self.__fail, self.__out
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+class RssFilter:
+    __matchers = {}
+
+    def __init__(self, inf, exf):
+        self.inf = tuple(frozenset(flist) for flist in inf)
+        self.exf = frozenset(term for flist in exf for term in flist)
+        self.terms = frozenset().union(*self.inf, self.exf)
+
+    def passes(self, found):
+        return all(flist & found for flist in self.inf) and not self.exf & found
+
+    @classmethod
+    def matcher(cls, terms):
+        terms = frozenset(terms)
+        if (matcher := cls.__matchers.get(terms)) is None:
+            if len(cls.__matchers) >= RSS_MATCHER_CACHE:
+                cls.__matchers.clear()
+            matcher = cls.__matchers[terms] = TermMatcher(terms)
+        return matcher
+
+
+class RssSender:
+    def __init__(self):
+        self.__queue = Queue()
+        self.__worker = None
+
+    def put(self, text):
+        self.__queue.put_nowait(text)
+        if self.__worker is None or self.__worker.done():
+            self.__worker = bot_loop.create_task(self.__run())
+
+    @property
+    def pending(self):
+        return self.__queue.qsize()
+
+    async def __run(self):
+        while not self.__queue.empty():
+            text = await self.__queue.get()
+            try:
+                await sendRss(text)
+            except Exception as e:
+                LOGGER.error(f"Rss send failed: {e}")
+            finally:
+                self.__queue.task_done()
+
+
+rss_fetcher = RssFetcher()
+rss_sender = RssSender()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+from asyncio import Condition
+from errno import EXDEV
+from os import listdir, makedirs, rename
+from shutil import move
+
+from bot import DOWNLOAD_DIR, LOGGER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+
+PARTIAL_SUFFIXES = (".aria2", ".!qB")
+
+
+def merge_dir(src, des, prefix):
+    """Move the contents of src into des, prefixing names that are already taken."""
+    makedirs(des, exist_ok=True)
+    taken = set(listdir(des))
+    for item in listdir(src):
+        if item.endswith(PARTIAL_SUFFIXES):
+            continue
+        name = item
+        if name in taken:
+            name = f"{prefix}-{item}"
+        taken.add(name)
+        try:
+            rename(f"{src}/{item}", f"{des}/{name}")
+        except OSError as e:
+            if e.errno != EXDEV:
+                raise
+            move(f"{src}/{item}", f"{des}/{name}")
+
+
+class SameDir:
+    """Tasks of one -m command, merged into a single folder once downloaded.
+
+    Each finished task except the last moves its files into the folder of a
+    task that is still running and drops out, leaving the last one to upload
+    the whole folder.
+    """
+
+    def __init__(self, total, name):
+        self.total = total
+        self.name = name
+        self.tasks = set()
+        self.__cond = Condition()
+
+    def __ready(self):
+        return self.total <= 1 or len(self.tasks) > 1
+
+    async def add(self, uid):
+        async with self.__cond:
+            self.tasks.add(uid)
+            self.__cond.notify_all()
+
+    async def shrink(self, count):
+        """Lower the expected task count, e.g. for batch items that were not found."""
+        async with self.__cond:
+            self.total -= count
+            self.__cond.notify_all()
+
+    async def discard(self, uid):
+        async with self.__cond:
+            if uid in self.tasks:
+                self.tasks.remove(uid)
+                self.total -= 1
+                self.__cond.notify_all()
+
+    async def merge(self, uid, src_dir):
+        """Move the download of `uid` to another task of the group.
+
+        Returns False if `uid` is the last task and should upload the folder.
+        """
+        async with self.__cond:
+            # Wait for another task to be registered to merge into.
+            await self.__cond.wait_for(self.__ready)
+            if self.total <= 1:
+                return False
+            self.tasks.remove(uid)
+            self.total -= 1
+            des_dir = f"{DOWNLOAD_DIR}{next(iter(self.tasks))}{self.name}"
+            LOGGER.info(f"Merging {uid} into: {des_dir}")
+            await sync_to_async(merge_dir, f"{src_dir}{self.name}", des_dir, uid)
+            self.__cond.notify_all()
+            return True
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+from base64 import b32decode
+from os import link, makedirs, path as ospath
+from re import search as re_search
+from shutil import copy2, copytree
+from urllib.parse import urlparse, urlunparse
+
+from bot import LOGGER, bot_loop, download_dict, download_dict_lock
+from bot.helper.ext_utils.bot_utils import (
+    is_gdrive_link,
+    is_magnet,
+    is_url,
+    sync_to_async,
+)
+from bot.helper.ext_utils.fs_utils import clean_download
+from bot.helper.ext_utils.storage_manager import storage_ledger
+from bot.helper.ext_utils.task_manager import limit_checker
+from bot.helper.mirror_utils.status_utils.shared_status import SharedStatus
+from bot.helper.mirror_utils.upload_utils.gdriveTools import GoogleDriveHelper
+from bot.helper.telegram_helper.message_utils import sendStatusMessage
+
+
+def get_source_key(link):
+    if is_magnet(link):
+        if not (match := re_search(r"xt=urn:btih:([a-zA-Z0-9]+)", link)):
+            return None
+        info_hash = match.group(1)
+        if len(info_hash) == 32:
+            info_hash = b32decode(info_hash.upper()).hex()
+        return f"btih:{info_hash.lower()}"
+    if is_gdrive_link(link):
+        try:
+            return f"gd:{GoogleDriveHelper.getIdFromUrl(link)}"
+        except Exception:
+            return None
+    if is_url(link):
+        url = urlparse(link.strip())
+        return urlunparse(
+            (
+                url.scheme.lower(),
+                url.netloc.lower(),
+                url.path,
+                url.params,
+                url.query,
+                "",
+            )
+        )
+    return None
+
+
+def link_or_copy(src, dst):
+    try:
+        link(src, dst)
+    except OSError:
+        copy2(src, dst)
+    return dst
+
+
+def link_tree(src, dst):
+    makedirs(ospath.dirname(dst), exist_ok=True)
+    if ospath.isdir(src):
+        copytree(src, dst, copy_function=link_or_copy)
+    else:
+        link_or_copy(src, dst)
+
+
+class SharedFlight:
+    def __init__(self, primary, start):
+        self.primary = primary
+        self.start = start
+        self.followers = []
+
+
+class SharedDownloads:
+    """Runs identical concurrent downloads once and hands the result to every requester.
+
+    The first task for a source downloads it; later tasks for the same source
+    wait on it and get hard links to the finished data, then extract, compress
+    and upload with their own options. If the downloading task fails or is
+    cancelled, the oldest waiting task takes over and starts the download itself.
+    """
+
+    def __init__(self):
+        self.__flights = {}
+        self.__keys = {}
+
+    @staticmethod
+    def __get_key(link, name, listener):
+        if listener.select or listener.sameDir or not isinstance(link, str):
+            return None
+        if (source := get_source_key(link)) is None:
+            return None
+        return f"{source}|{name}"
+
+    async def run(self, link, name, listener, start):
+        """Start the download with `start` unless an identical one is in flight."""
+        if (key := self.__get_key(link, name, listener)) is None:
+            await start()
+            return
+        if (flight := self.__flights.get(key)) is not None:
+            if listener.seed:
+                await start()
+                return
+            LOGGER.info(f"Sharing in-flight download for: {listener.uid}")
+            flight.followers.append((listener, start))
+            self.__keys[listener.uid] = key
+            async with download_dict_lock:
+                download_dict[listener.uid] = SharedStatus(flight, listener)
+            await sendStatusMessage(listener.message)
+            return
+        flight = self.__flights[key] = SharedFlight(listener, start)
+        self.__keys[listener.uid] = key
+        await self.__start(key, flight)
+
+    async def __start(self, key, flight):
+        listener = flight.primary
+        await flight.start()
+        if (
+            self.__flights.get(key) is flight
+            and flight.primary is listener
+            and listener.uid not in download_dict
+        ):
+            # The engine gave up before registering the task, e.g. on a limit or
+            # duplicate check, so nothing will report back for it.
+            self.__keys.pop(listener.uid, None)
+            await self.__promote(key, flight)
+
+    async def __promote(self, key, flight):
+        if not flight.followers:
+            del self.__flights[key]
+            return
+        flight.primary, flight.start = flight.followers.pop(0)
+        async with download_dict_lock:
+            download_dict.pop(flight.primary.uid, None)
+        LOGGER.info(f"Restarting shared download for: {flight.primary.uid}")
+        bot_loop.create_task(self.__start(key, flight))
+
+    async def release(self, listener):
+        """Drop a failed or cancelled task, handing its download over if needed."""
+        if (key := self.__keys.pop(listener.uid, None)) is None:
+            return
+        if (flight := self.__flights.get(key)) is None:
+            return
+        if flight.primary is listener:
+            await self.__promote(key, flight)
+        else:
+            flight.followers = [
+                follower for follower in flight.followers if follower[0] is not listener
+            ]
+
+    async def fan_out(self, listener, name, size):
+        """Give the finished download of `listener` to every task waiting on it."""
+        if (key := self.__keys.pop(listener.uid, None)) is None:
+            return
+        if (
+            flight := self.__flights.get(key)
+        ) is None or flight.primary is not listener:
+            return
+        del self.__flights[key]
+        for follower, _ in flight.followers:
+            self.__keys.pop(follower.uid, None)
+            if not isinstance(status := download_dict.get(follower.uid), SharedStatus):
+                continue
+            status.complete(name, size)
+            # Linked before returning, as the caller may extract or delete the
+            # data in place right after.
+            try:
+                await sync_to_async(
+                    link_tree, f"{listener.dir}/{name}", f"{follower.dir}/{name}"
+                )
+            except Exception as e:
+                LOGGER.error(f"Unable to share download: {e}. Path: {follower.dir}")
+                await clean_download(follower.dir)
+                await follower.onDownloadError(f"Unable to share download: {e}")
+                continue
+            bot_loop.create_task(self.__hand_over(follower, name, size))
+
+    @staticmethod
+    async def __hand_over(follower, name, size):
+        if limit_exceeded := await limit_checker(size, follower):
+            await clean_download(follower.dir)
+            await follower.onDownloadError(limit_exceeded)
+            return
+        storage_ledger.reserve(follower.uid)
+        if follower.uid not in download_dict:
+            return
+        await follower.onDownloadStart()
+        await follower.onDownloadComplete()
+
+
+shared_downloads = SharedDownloads()
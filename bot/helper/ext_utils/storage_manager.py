@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+from os import scandir
+from shutil import disk_usage
+from threading import Lock
+from time import time
+
+from bot import config_dict, LOGGER
+from bot.helper.ext_utils.bot_utils import get_readable_file_size
+
+# How long a task's measured disk usage is reused before its dirs are walked again.
+USAGE_TTL = 5
+
+
+def get_tree_size(path):
+    total = 0
+    try:
+        with scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    total += get_tree_size(entry.path)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return total
+
+
+class StorageLedger:
+    """Reserves the peak disk footprint of admitted tasks.
+
+    A task's outstanding claim is its reservation minus what it already holds on
+    disk, so the free space seen by the next admission accounts for data that
+    running tasks have yet to write. Once a task has downloaded, only the extra
+    space its processing still needs stays reserved. Admission checks run in
+    worker threads, so the ledger is guarded by a lock; directory walks happen
+    outside it.
+    """
+
+    def __init__(self):
+        self.__pending = {}
+        self.__reserved = {}
+        self.__usage = {}
+        self.__lock = Lock()
+
+    @staticmethod
+    def footprint(listener, size):
+        copies = 1
+        if listener.extract or listener.compress:
+            copies += 1
+        split_size = (
+            listener.user_dict.get("split_size", False)
+            or config_dict["LEECH_SPLIT_SIZE"]
+        )
+        if listener.isLeech and not listener.compress and size > split_size:
+            copies += 1
+        return size * copies
+
+    @staticmethod
+    def __dirs(listener):
+        return (listener.dir, f"{listener.dir}10000")
+
+    def __used(self, uid, dirs):
+        now = time()
+        if (usage := self.__usage.get(uid)) is not None and now - usage[0] < USAGE_TTL:
+            return usage[1]
+        used = sum(get_tree_size(path) for path in dirs)
+        with self.__lock:
+            if uid in self.__reserved:
+                self.__usage[uid] = (now, used)
+        return used
+
+    def __outstanding(self):
+        outstanding = 0
+        held = 0
+        with self.__lock:
+            reserved = list(self.__reserved.items())
+        for uid, (footprint, dirs) in reserved:
+            used = self.__used(uid, dirs)
+            outstanding += max(footprint - used, 0)
+            held += used
+        return outstanding, held
+
+    def available(self, threshold=None):
+        if threshold is None:
+            threshold = config_dict["STORAGE_THRESHOLD"] * 1024**3
+        outstanding, _ = self.__outstanding()
+        return disk_usage(config_dict["DOWNLOAD_DIR"]).free - outstanding - threshold
+
+    def prepare(self, uid, listener, size, threshold, running=False):
+        """Record the footprint of a task; False if it can never fit on disk."""
+        footprint = self.footprint(listener, size)
+        outstanding, held = self.__outstanding()
+        free = disk_usage(config_dict["DOWNLOAD_DIR"]).free
+        if footprint > free + held - threshold:
+            return False
+        if running and footprint > free - outstanding - threshold:
+            return False
+        with self.__lock:
+            index = self.__reserved if running else self.__pending
+            index[uid] = (footprint, self.__dirs(listener))
+        return True
+
+    def record(self, uid, listener, size):
+        """Record the footprint of a task that skipped `prepare`, e.g. a sudo task."""
+        with self.__lock:
+            if uid not in self.__pending and uid not in self.__reserved:
+                self.__pending[uid] = (
+                    self.footprint(listener, size),
+                    self.__dirs(listener),
+                )
+
+    def pending(self, uid):
+        with self.__lock:
+            return entry[0] if (entry := self.__pending.get(uid)) else 0
+
+    def reserve(self, uid):
+        with self.__lock:
+            if (entry := self.__pending.pop(uid, None)) is None:
+                return
+            self.__reserved[uid] = entry
+        LOGGER.info(
+            f"Storage reserved: {get_readable_file_size(entry[0])} for task {uid}"
+        )
+
+    def try_reserve(self, uid):
+        if (footprint := self.pending(uid)) and footprint > self.available():
+            return False
+        self.reserve(uid)
+        return True
+
+    def shrink(self, uid, footprint):
+        with self.__lock:
+            if (entry := self.__reserved.get(uid)) is not None and footprint < entry[0]:
+                self.__reserved[uid] = (footprint, entry[1])
+
+    def downloaded(self, uid, listener, size):
+        """Drop the reservation of a task whose data is all on disk, unless its
+        extract, compress or split still needs more space."""
+        if (footprint := self.footprint(listener, size)) > size:
+            self.shrink(uid, footprint)
+        else:
+            self.release(uid)
+
+    def release(self, uid):
+        with self.__lock:
+            self.__pending.pop(uid, None)
+            self.__reserved.pop(uid, None)
+            self.__usage.pop(uid, None)
+
+
+storage_ledger = StorageLedger()
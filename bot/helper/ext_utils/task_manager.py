@@ -13,12 +13,16 @@ from bot import (
     LOGGER,
     user_data,
     download_dict,
+    OWNER_ID,
+    DATABASE_URL,
 )
 from bot.helper.mirror_utils.upload_utils.gdriveTools import GoogleDriveHelper
-from bot.helper.ext_utils.fs_utils import get_base_name, check_storage_threshold
+from bot.helper.ext_utils.fs_utils import get_base_name
+from bot.helper.ext_utils.storage_manager import storage_ledger
+from bot.helper.ext_utils.quota_manager import quota_ledger
+from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.ext_utils.bot_utils import (
     get_user_tasks,
-    getdailytasks,
     sync_to_async,
     get_telegraph_list,
     get_readable_file_size,
@@ -29,6 +33,13 @@ from bot.helper.telegram_helper.message_utils import forcesub, check_botpm
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.themes import BotTheme
 
+QUEUE_SMALL_TASK = 2 * 1024**3
+QUEUE_AGING = 1800
+
+queue_meta = {}
+queue_cache = {}
+queue_rate = {"dl": [0, 0], "up": [0, 0]}
+
 
 async def stop_duplicate_check(name, listener):
     if (
@@ -67,35 +78,144 @@ async def timeval_check(user_id):
     return None
 
 
-async def is_queued(uid):
+class QueuedTask:
+    __slots__ = ("user_id", "sudo", "size", "added")
+
+    def __init__(self, listener, size):
+        user = listener.message.from_user or listener.message.sender_chat
+        self.user_id = user.id
+        self.sudo = bool(
+            user.id == OWNER_ID or user_data.get(user.id, {}).get("is_sudo")
+        )
+        self.size = size or 0
+        self.added = time()
+
+    def rank(self, running):
+        small = (
+            0 < self.size <= QUEUE_SMALL_TASK or time() - self.added >= QUEUE_AGING
+        )
+        return (
+            not self.sudo,
+            running.get(self.user_id, 0),
+            not small,
+            self.added,
+        )
+
+
+def add_to_queue(queue, uid, listener=None, size=0):
+    event = Event()
+    queue[uid] = event
+    if listener is not None:
+        queue_meta[uid] = QueuedTask(listener, size)
+    return event
+
+
+def fair_order(queue):
+    """Order queued uids so each user gets a fair share of the free slots.
+
+    Sudo/owner tasks go first, then the user with the fewest running (or already
+    picked) tasks wins; within a user, small tasks and long waiters go first.
+    """
+    running = {}
+    for uid in non_queued_dl | non_queued_up:
+        if (task := download_dict.get(uid)) and (user := task.message.from_user):
+            running[user.id] = running.get(user.id, 0) + 1
+    users = {}
+    for uid in queue:
+        if (meta := queue_meta.get(uid)) is None:
+            return list(queue)
+        users.setdefault(meta.user_id, []).append(uid)
+    for uids in users.values():
+        uids.sort(key=lambda uid: queue_meta[uid].rank(running)[2:], reverse=True)
+    order = []
+    while users:
+        user_id = min(users, key=lambda u: queue_meta[users[u][-1]].rank(running))
+        order.append(users[user_id].pop())
+        running[user_id] = running.get(user_id, 0) + 1
+        if not users[user_id]:
+            del users[user_id]
+    return order
+
+
+def admit_order(queue, free):
+    """Fair-share order of the queued downloads whose storage reservation fits."""
+    admitted = []
+    for uid in fair_order(queue):
+        footprint = storage_ledger.pending(uid)
+        if footprint > free and (non_queued_dl or admitted):
+            continue
+        free -= footprint
+        admitted.append(uid)
+    return admitted
+
+
+def queue_position(uid):
+    """Return (position, eta_seconds) of a queued task, or (None, None)."""
+    for key, queue in (("dl", queued_dl), ("up", queued_up)):
+        if uid in queue:
+            break
+    else:
+        return None, None
+    cached = queue_cache.get(key)
+    if cached is None or time() - cached[0] > 1:
+        positions = {u: index for index, u in enumerate(fair_order(queue), start=1)}
+        cached = queue_cache[key] = (time(), positions)
+    if (position := cached[1].get(uid)) is None:
+        return None, None
+    interval = queue_rate[key][1]
+    return position, position * interval if interval else None
+
+
+def mark_queue_started(key):
+    last, interval = queue_rate[key]
+    now = time()
+    if last:
+        elapsed = now - last
+        interval = elapsed if not interval else interval * 0.7 + elapsed * 0.3
+    queue_rate[key] = [now, interval]
+    queue_cache.pop(key, None)
+
+
+async def is_queued(uid, listener=None, size=0):
     all_limit = config_dict["QUEUE_ALL"]
     dl_limit = config_dict["QUEUE_DOWNLOAD"]
     event = None
     added_to_queue = False
-    if all_limit or dl_limit:
-        async with queue_dict_lock:
-            dl = len(non_queued_dl)
-            up = len(non_queued_up)
-            if (
-                all_limit and dl + up >= all_limit and (not dl_limit or dl >= dl_limit)
-            ) or (dl_limit and dl >= dl_limit):
-                added_to_queue = True
-                event = Event()
-                queued_dl[uid] = event
+    if listener is not None and size:
+        # Tasks that skipped limit_checker still need their space reserved.
+        storage_ledger.record(uid, listener, size)
+    async with queue_dict_lock:
+        dl = len(non_queued_dl)
+        up = len(non_queued_up)
+        if (
+            all_limit and dl + up >= all_limit and (not dl_limit or dl >= dl_limit)
+        ) or (dl_limit and dl >= dl_limit):
+            added_to_queue = True
+        elif not await sync_to_async(storage_ledger.try_reserve, uid):
+            LOGGER.info(f"Added to Queue/Download until storage frees up: {uid}")
+            added_to_queue = True
+        if added_to_queue:
+            event = add_to_queue(queued_dl, uid, listener, size)
     return added_to_queue, event
 
 
 def start_dl_from_queued(uid):
+    storage_ledger.reserve(uid)
     queued_dl[uid].set()
     del queued_dl[uid]
+    queue_meta.pop(uid, None)
+    mark_queue_started("dl")
 
 
 def start_up_from_queued(uid):
     queued_up[uid].set()
     del queued_up[uid]
+    queue_meta.pop(uid, None)
+    mark_queue_started("up")
 
 
 async def start_from_queued():
+    free = await sync_to_async(storage_ledger.available) if queued_dl else 0
     if all_limit := config_dict["QUEUE_ALL"]:
         dl_limit = config_dict["QUEUE_DOWNLOAD"]
         up_limit = config_dict["QUEUE_UPLOAD"]
@@ -106,14 +226,14 @@ async def start_from_queued():
             if all_ < all_limit:
                 f_tasks = all_limit - all_
                 if queued_up and (not up_limit or up < up_limit):
-                    for index, uid in enumerate(list(queued_up.keys()), start=1):
+                    for index, uid in enumerate(fair_order(queued_up), start=1):
                         f_tasks = all_limit - all_
                         start_up_from_queued(uid)
                         f_tasks -= 1
                         if f_tasks == 0 or (up_limit and index >= up_limit - up):
                             break
                 if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, uid in enumerate(list(queued_dl.keys()), start=1):
+                    for index, uid in enumerate(admit_order(queued_dl, free), start=1):
                         start_dl_from_queued(uid)
                         if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
                             break
@@ -124,7 +244,7 @@ async def start_from_queued():
             up = len(non_queued_up)
             if queued_up and up < up_limit:
                 f_tasks = up_limit - up
-                for index, uid in enumerate(list(queued_up.keys()), start=1):
+                for index, uid in enumerate(fair_order(queued_up), start=1):
                     start_up_from_queued(uid)
                     if index == f_tasks:
                         break
@@ -139,14 +259,14 @@ async def start_from_queued():
             dl = len(non_queued_dl)
             if queued_dl and dl < dl_limit:
                 f_tasks = dl_limit - dl
-                for index, uid in enumerate(list(queued_dl.keys()), start=1):
+                for index, uid in enumerate(admit_order(queued_dl, free), start=1):
                     start_dl_from_queued(uid)
                     if index == f_tasks:
                         break
     else:
         async with queue_dict_lock:
             if queued_dl:
-                for uid in list(queued_dl.keys()):
+                for uid in admit_order(queued_dl, free):
                     start_dl_from_queued(uid)
 
 
@@ -205,48 +325,31 @@ async def limit_checker(
             if size > limit:
                 limit_exceeded = f"Leech limit is {get_readable_file_size(limit)}"
 
-        if (
-            STORAGE_THRESHOLD := config_dict["STORAGE_THRESHOLD"]
-        ) and not listener.isClone:
-            arch = any([listener.compress, listener.extract])
-            limit = STORAGE_THRESHOLD * 1024**3
-            acpt = await sync_to_async(check_storage_threshold, size, limit, arch)
+        if not listener.isClone:
+            limit = config_dict["STORAGE_THRESHOLD"] * 1024**3
+            acpt = await sync_to_async(
+                storage_ledger.prepare,
+                listener.uid,
+                listener,
+                size,
+                limit,
+                listener.uid in non_queued_dl,
+            )
             if not acpt:
                 limit_exceeded = (
                     f"You must leave {get_readable_file_size(limit)} free storage."
+                    if limit
+                    else "Not enough free storage for this task."
                 )
 
-        if config_dict["DAILY_TASK_LIMIT"] and config_dict[
-            "DAILY_TASK_LIMIT"
-        ] <= await getdailytasks(user_id):
-            limit_exceeded = f"Daily Total Task Limit: {config_dict['DAILY_TASK_LIMIT']}\nYou have exhausted all your Daily Task Limits."
-        else:
-            ttask = await getdailytasks(user_id, increase_task=True)
-            LOGGER.info(f"User: {user_id} | Daily Tasks: {ttask}")
-        if (
-            DAILY_MIRROR_LIMIT := config_dict["DAILY_MIRROR_LIMIT"]
-        ) and not listener.isLeech:
-            limit = DAILY_MIRROR_LIMIT * 1024**3
-            if size >= (
-                limit - await getdailytasks(user_id, check_mirror=True)
-            ) or limit <= await getdailytasks(user_id, check_mirror=True):
-                limit_exceeded = f"Daily Mirror Limit is {get_readable_file_size(limit)}\nYou have exhausted all your Daily Mirror Limit."
-            elif not listener.isLeech:
-                msize = await getdailytasks(user_id, upmirror=size, check_mirror=True)
-                LOGGER.info(
-                    f"User : {user_id} | Daily Mirror Size : {get_readable_file_size(msize)}"
-                )
-        if (DAILY_LEECH_LIMIT := config_dict["DAILY_LEECH_LIMIT"]) and listener.isLeech:
-            limit = DAILY_LEECH_LIMIT * 1024**3
-            if size >= (
-                limit - await getdailytasks(user_id, check_leech=True)
-            ) or limit <= await getdailytasks(user_id, check_leech=True):
-                limit_exceeded = f"Daily Leech Limit is {get_readable_file_size(limit)}\nYou have exhausted all your Daily Leech Limit."
-            elif listener.isLeech:
-                lsize = await getdailytasks(user_id, upleech=size, check_leech=True)
-                LOGGER.info(
-                    f"User : {user_id} | Daily Leech Size : {get_readable_file_size(lsize)}"
-                )
+        if not limit_exceeded:
+            if DATABASE_URL:
+                # The daily counters live in the owner's document.
+                await DbManger().load_user(user_id)
+            limit_exceeded = (
+                quota_ledger.reserve(listener.uid, user_id, size, listener.isLeech)
+                or ""
+            )
     if limit_exceeded:
         if size:
             return f"{limit_exceeded}.\nYour List/File/Folder size is {get_readable_file_size(size)}."
@@ -258,6 +361,9 @@ async def task_utils(message):
     LOGGER.info("Running Task Manager ...")
     msg = []
     button = None
+    if DATABASE_URL and message.from_user:
+        # The owner may differ from the sender, e.g. for RSS tasks.
+        await DbManger().load_user(message.from_user.id)
     if await CustomFilters.sudo("", message):
         return msg, button
     user_id = message.from_user.id
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+from asyncio import get_running_loop
+from threading import Lock
+
+
+class TaskRegistry(dict):
+    """download_dict with secondary indexes by gid, user and chat.
+
+    Indexes are refreshed whenever a task's status object is replaced. Status is
+    not indexed, as most status objects change state without being replaced, so
+    it is asked from the tasks when filtering. Lookups return lists built under a
+    lock, since status pages are rendered in worker threads while the loop keeps
+    adding and removing tasks. Callers can also wait for a uid to be registered.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__gids = {}
+        self.__users = {}
+        self.__chats = {}
+        self.__keys = {}
+        self.__waiters = {}
+        self.__lock = Lock()
+
+    @staticmethod
+    def __add(index, key, uid):
+        index.setdefault(key, {})[uid] = None
+
+    @staticmethod
+    def __discard(index, key, uid):
+        if (uids := index.get(key)) is not None:
+            uids.pop(uid, None)
+            if not uids:
+                del index[key]
+
+    def __index(self, uid, task):
+        try:
+            gid = task.gid()
+        except Exception:
+            gid = None
+        message = task.message
+        user_id = message.from_user.id if message.from_user else None
+        chat_id = message.chat.id
+        if gid is not None:
+            self.__gids[gid] = uid
+        self.__add(self.__users, user_id, uid)
+        self.__add(self.__chats, chat_id, uid)
+        self.__keys[uid] = (gid, user_id, chat_id)
+
+    def __unindex(self, uid):
+        if (keys := self.__keys.pop(uid, None)) is None:
+            return
+        gid, user_id, chat_id = keys
+        if self.__gids.get(gid) == uid:
+            del self.__gids[gid]
+        self.__discard(self.__users, user_id, uid)
+        self.__discard(self.__chats, chat_id, uid)
+
+    def __setitem__(self, uid, task):
+        with self.__lock:
+            self.__unindex(uid)
+            super().__setitem__(uid, task)
+            self.__index(uid, task)
+            waiters = self.__waiters.pop(uid, ())
+        for future in waiters:
+            future.get_loop().call_soon_threadsafe(self.__resolve, future)
+
+    @staticmethod
+    def __resolve(future):
+        if not future.done():
+            future.set_result(None)
+
+    def registered(self, uid):
+        """Future that is done once a task is stored under `uid`."""
+        future = get_running_loop().create_future()
+        with self.__lock:
+            if uid in self:
+                future.set_result(None)
+            else:
+                self.__waiters.setdefault(uid, []).append(future)
+        return future
+
+    def discard_waiter(self, uid, future):
+        with self.__lock:
+            if future in (waiters := self.__waiters.get(uid, ())):
+                waiters.remove(future)
+                if not waiters:
+                    del self.__waiters[uid]
+
+    def __delitem__(self, uid):
+        with self.__lock:
+            super().__delitem__(uid)
+            self.__unindex(uid)
+
+    def pop(self, uid, *default):
+        with self.__lock:
+            self.__unindex(uid)
+            return super().pop(uid, *default)
+
+    def clear(self):
+        with self.__lock:
+            super().clear()
+            for index in (self.__gids, self.__users, self.__chats, self.__keys):
+                index.clear()
+
+    def snapshot(self):
+        with self.__lock:
+            return list(self.values())
+
+    def by_gid(self, gid):
+        with self.__lock:
+            if (uid := self.__gids.get(gid)) is not None and uid in self:
+                return self[uid]
+            tasks = list(self.items())
+        for uid, task in tasks:
+            if task.gid() == gid:
+                return task
+        return None
+
+    def by_user(self, user_id):
+        with self.__lock:
+            return [self[uid] for uid in self.__users.get(user_id, ())]
+
+    def by_chat(self, chat_id):
+        with self.__lock:
+            return [self[uid] for uid in self.__chats.get(chat_id, ())]
+
+    def by_status(self, status, user_id=None):
+        tasks = self.by_user(user_id) if user_id else self.snapshot()
+        if status == "all":
+            return tasks
+        return [task for task in tasks if task.status() == status]
+
+    def user_count(self, user_id):
+        with self.__lock:
+            return len(self.__users.get(user_id, ()))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+from asyncio import shield
+from collections import OrderedDict
+from hashlib import md5
+
+from bot import DATABASE_URL, LOGGER, bot_loop
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.db_handler import DbManger
+from bot.helper.ext_utils.leech_utils import get_content_key, get_md5_hash
+
+UPLOAD_CACHE_SIZE = 5000
+
+
+def get_thumb_class(thumb):
+    if thumb is None:
+        return "auto"
+    with open(thumb, "rb") as f:
+        return md5(f.read()).hexdigest()
+
+
+class UploadKey:
+    """Cache key of one file or part, with its full md5 hashed in the background."""
+
+    def __init__(self, key, path, part):
+        self.key = key
+        self.__md5 = bot_loop.create_task(sync_to_async(get_md5_hash, path, part))
+        # Keys of failed uploads are never awaited; don't warn about their errors.
+        self.__md5.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def md5(self):
+        return await shield(self.__md5)
+
+    def __str__(self):
+        return self.key
+
+
+class UploadCache:
+    """Maps uploaded content to the Telegram file_id it was stored under.
+
+    Entries are keyed by a sampled hash of the bytes sent, their size, the media
+    type they were sent as and the thumbnail attached, since a file_id carries
+    its thumbnail along. The full md5 is stored with each entry to confirm a key
+    that matched. It is hashed alongside the upload and the entry is stored once
+    it is done, so the upload never waits for a second read of the file.
+    Captions and buttons are sent fresh on every reuse. A file_id only works for
+    the account that uploaded it, so the client is stored with it.
+    """
+
+    def __init__(self):
+        self.__entries = OrderedDict()
+
+    async def get_key(self, path, size, mode, thumb, part=None):
+        content_hash, thumb_class = await sync_to_async(self.__hash, path, part, thumb)
+        return UploadKey(f"{content_hash}:{size}:{mode}:{thumb_class}", path, part)
+
+    @staticmethod
+    def __hash(path, part, thumb):
+        content_hash = (
+            get_content_key(part.path, offset=part.offset, size=part.length)
+            if part
+            else get_content_key(path)
+        )
+        return content_hash, get_thumb_class(thumb)
+
+    async def get(self, key, client):
+        if (entry := self.__entries.get(key.key)) is not None:
+            self.__entries.move_to_end(key.key)
+        elif DATABASE_URL and (entry := await DbManger().get_upload_cache(key.key)):
+            entry = self.__remember(
+                key.key, entry["file_id"], entry["client"], entry.get("md5")
+            )
+        if entry is None or entry[1] != client:
+            return None
+        try:
+            if entry[2] != await key.md5():
+                return None
+        except OSError as e:
+            LOGGER.error(f"Upload Cache: unable to hash {key}: {e}")
+            return None
+        return entry[0]
+
+    def __remember(self, key, file_id, client, md5_hash):
+        entry = self.__entries[key] = (file_id, client, md5_hash)
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > UPLOAD_CACHE_SIZE:
+            self.__entries.popitem(last=False)
+        return entry
+
+    def put(self, key, file_id, client):
+        bot_loop.create_task(self.__put(key, file_id, client))
+
+    async def __put(self, key, file_id, client):
+        try:
+            md5_hash = await key.md5()
+        except OSError as e:
+            LOGGER.error(f"Upload Cache: unable to hash {key}: {e}")
+            return
+        if self.__entries.get(key.key) == (file_id, client, md5_hash):
+            return
+        self.__remember(key.key, file_id, client, md5_hash)
+        if DATABASE_URL:
+            await DbManger().update_upload_cache(
+                key.key, {"file_id": file_id, "client": client, "md5": md5_hash}
+            )
+
+    async def forget(self, key):
+        LOGGER.info(f"Upload Cache: dropping stale entry {key}")
+        self.__entries.pop(key.key, None)
+        if DATABASE_URL:
+            await DbManger().rm_upload_cache(key.key)
+
+
+upload_cache = UploadCache()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+from array import array
+from asyncio import Event, Queue
+from hashlib import pbkdf2_hmac, sha1
+from hmac import new as hmac_new
+from os import walk, path as ospath, makedirs, remove, stat, urandom
+from shutil import rmtree
+from struct import pack
+from sys import byteorder
+from time import localtime
+from zlib import crc32
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from bot import LOGGER, GLOBAL_EXTENSION_FILTER, bot_loop
+from bot.helper.ext_utils.bot_utils import sync_to_async, async_to_sync
+
+ZIP_CHUNK = 4 * 1024**2
+ZIP64_LIMIT = 0xFFFFFFFF
+AES_SALT_SIZE = 16
+AES_MAC_SIZE = 10
+AES_ITERATIONS = 1000
+
+
+def get_dos_time(mtime):
+    t = localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday,
+    )
+
+
+class ZipVolumes:
+    """Cuts a byte stream into path.001, path.002... volumes of a fixed size."""
+
+    def __init__(self, path, volume_size, on_volume):
+        self.__path = path
+        self.__volume_size = volume_size
+        self.__on_volume = on_volume
+        self.__index = 0
+        self.__file = None
+        self.__written = 0
+        self.offset = 0
+
+    def __volume_path(self):
+        return f"{self.__path}.{self.__index:03}"
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            if self.__file is None:
+                self.__index += 1
+                self.__file = open(self.__volume_path(), "wb")
+                self.__written = 0
+            chunk = view[: self.__volume_size - self.__written]
+            self.__file.write(chunk)
+            self.__written += len(chunk)
+            self.offset += len(chunk)
+            view = view[len(chunk) :]
+            if self.__written >= self.__volume_size:
+                self.__finish_volume()
+
+    def __finish_volume(self):
+        self.__file.close()
+        self.__file = None
+        self.__on_volume(self.__volume_path())
+
+    def close(self):
+        if self.__file is not None:
+            self.__finish_volume()
+
+    def abort(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class ZipWriter:
+    """Sequential store-only zip writer with ZIP64 and WinZip AES-256 (AE-2).
+
+    Nothing is ever rewritten, so plain entries carry their CRC in a data
+    descriptor; AE-2 entries have no CRC and need none.
+    """
+
+    def __init__(self, out, password="", check=None):
+        self.__out = out
+        self.__password = password.encode() if password else b""
+        self.__check = check
+        self.__entries = []
+
+    def __aes_extra(self):
+        return pack("<HHH2sBH", 0x9901, 7, 2, b"AE", 3, 0) if self.__password else b""
+
+    def add_dir(self, arcname, mtime):
+        name = f"{arcname.rstrip('/')}/".encode()
+        dtime, ddate = get_dos_time(mtime)
+        offset = self.__out.offset
+        self.__out.write(
+            pack(
+                "<LHHHHHLLLHH",
+                0x04034B50,
+                20,
+                0x800,
+                0,
+                dtime,
+                ddate,
+                0,
+                0,
+                0,
+                len(name),
+                0,
+            )
+            + name
+        )
+        self.__entries.append(
+            (name, 20, 0x800, 0, dtime, ddate, 0, 0, 0, offset, (0o40775 << 16) | 0x10)
+        )
+
+    def add_file(self, path, arcname, on_read=None):
+        st = stat(path)
+        size = st.st_size
+        encrypted = bool(self.__password)
+        csize = size + (AES_SALT_SIZE + 2 + AES_MAC_SIZE if encrypted else 0)
+        zip64 = csize >= ZIP64_LIMIT
+        flags = 0x800 | (0x01 if encrypted else 0x08)
+        method = 99 if encrypted else 0
+        version = 51 if encrypted else 45 if zip64 else 20
+        name = arcname.encode()
+        extra = pack("<HHQQ", 1, 16, size, csize) if zip64 else b""
+        extra += self.__aes_extra()
+        dtime, ddate = get_dos_time(st.st_mtime)
+        offset = self.__out.offset
+        self.__out.write(
+            pack(
+                "<LHHHHHLLLHH",
+                0x04034B50,
+                version,
+                flags,
+                method,
+                dtime,
+                ddate,
+                0,
+                ZIP64_LIMIT if zip64 else csize,
+                ZIP64_LIMIT if zip64 else size,
+                len(name),
+                len(extra),
+            )
+            + name
+            + extra
+        )
+        if encrypted:
+            salt = urandom(AES_SALT_SIZE)
+            key = pbkdf2_hmac("sha1", self.__password, salt, AES_ITERATIONS, 66)
+            self.__out.write(salt + key[64:])
+            cipher = Cipher(algorithms.AES(key[:32]), modes.ECB()).encryptor()
+            mac = hmac_new(key[32:64], digestmod=sha1)
+            counter = 1
+        crc = 0
+        read = 0
+        with open(path, "rb") as f:
+            while chunk := f.read(ZIP_CHUNK):
+                if self.__check is not None:
+                    self.__check()
+                read += len(chunk)
+                if encrypted:
+                    blocks = -(-len(chunk) // 16)
+                    counters = array("Q", bytes(16 * blocks))
+                    counters[0::2] = array("Q", range(counter, counter + blocks))
+                    if byteorder == "big":
+                        counters.byteswap()
+                    counter += blocks
+                    keystream = cipher.update(counters.tobytes())
+                    chunk = (
+                        int.from_bytes(chunk, "little")
+                        ^ int.from_bytes(keystream[: len(chunk)], "little")
+                    ).to_bytes(len(chunk), "little")
+                    mac.update(chunk)
+                else:
+                    crc = crc32(chunk, crc)
+                self.__out.write(chunk)
+                if on_read is not None:
+                    on_read(len(chunk))
+        if read != size:
+            raise OSError(f"{path} changed while archiving")
+        if encrypted:
+            self.__out.write(mac.digest()[:AES_MAC_SIZE])
+        else:
+            self.__out.write(
+                pack("<LLQQ" if zip64 else "<LLLL", 0x08074B50, crc, csize, size)
+            )
+        self.__entries.append(
+            (
+                name,
+                version,
+                flags,
+                method,
+                dtime,
+                ddate,
+                crc,
+                csize,
+                size,
+                offset,
+                (st.st_mode & 0xFFFF) << 16,
+            )
+        )
+
+    def close(self):
+        cd_offset = self.__out.offset
+        for (
+            name,
+            version,
+            flags,
+            method,
+            dtime,
+            ddate,
+            crc,
+            csize,
+            size,
+            offset,
+            attr,
+        ) in self.__entries:
+            zip64 = [value for value in (size, csize, offset) if value >= ZIP64_LIMIT]
+            extra = (
+                pack(f"<HH{len(zip64)}Q", 1, 8 * len(zip64), *zip64) if zip64 else b""
+            )
+            if method == 99:
+                extra += self.__aes_extra()
+            self.__out.write(
+                pack(
+                    "<LHHHHHHLLLHHHHHLL",
+                    0x02014B50,
+                    (3 << 8) | 63,
+                    max(version, 45) if zip64 else version,
+                    flags,
+                    method,
+                    dtime,
+                    ddate,
+                    crc,
+                    min(csize, ZIP64_LIMIT),
+                    min(size, ZIP64_LIMIT),
+                    len(name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    attr,
+                    min(offset, ZIP64_LIMIT),
+                )
+                + name
+                + extra
+            )
+        cd_size = self.__out.offset - cd_offset
+        count = len(self.__entries)
+        if count >= 0xFFFF or cd_size >= ZIP64_LIMIT or cd_offset >= ZIP64_LIMIT:
+            zip64_offset = self.__out.offset
+            self.__out.write(
+                pack(
+                    "<LQHHLLQQQQ",
+                    0x06064B50,
+                    44,
+                    45,
+                    45,
+                    0,
+                    0,
+                    count,
+                    count,
+                    cd_size,
+                    cd_offset,
+                )
+                + pack("<LLQL", 0x07064B50, 0, zip64_offset, 1)
+            )
+        self.__out.write(
+            pack(
+                "<LHHHHLLH",
+                0x06054B50,
+                0,
+                0,
+                min(count, 0xFFFF),
+                min(count, 0xFFFF),
+                min(cd_size, ZIP64_LIMIT),
+                min(cd_offset, ZIP64_LIMIT),
+                0,
+            )
+        )
+        self.__out.close()
+
+
+class ZipStream:
+    """Archives a path into split zip volumes while they are being uploaded.
+
+    The writer runs in a worker thread and stops after each volume until the
+    uploader has taken it, so at most the volume in flight and the one being
+    written exist on disk at a time. The volumes are the same raw split of one
+    zip that 7z -v produces, so they are joined and opened the same way.
+    """
+
+    def __init__(self, src, dest, volume_size, size, password="", remove_src=False):
+        self.src = src
+        self.dest = dest
+        self.size = size
+        self.processed = 0
+        self.returncode = None
+        self.__volume_size = volume_size
+        self.__password = password
+        self.__remove_src = remove_src
+        self.__queue = Queue()
+        self.__taken = Event()
+        self.__task = None
+
+    def start(self):
+        self.__task = bot_loop.create_task(self.__run())
+
+    async def __run(self):
+        try:
+            await sync_to_async(self.__write)
+            self.returncode = 0
+        except InterruptedError:
+            pass
+        except Exception as e:
+            LOGGER.error(f"Zip stream failed: {e}. Path: {self.src}")
+            self.returncode = 1
+        finally:
+            self.__queue.put_nowait(None)
+
+    def __check(self):
+        if self.returncode is not None:
+            raise InterruptedError
+
+    def __on_read(self, length):
+        self.processed += length
+
+    def __hand_off(self, path):
+        async_to_sync(self.__put, path)
+        self.__check()
+
+    async def __put(self, path):
+        self.__taken.clear()
+        await self.__queue.put(path)
+        await self.__taken.wait()
+
+    def __write(self):
+        makedirs(ospath.dirname(self.dest), exist_ok=True)
+        out = ZipVolumes(self.dest, self.__volume_size, self.__hand_off)
+        zipf = ZipWriter(out, self.__password, self.__check)
+        base = ospath.dirname(self.src)
+        try:
+            if ospath.isfile(self.src):
+                zipf.add_file(self.src, ospath.basename(self.src), self.__on_read)
+            else:
+                for dirpath, _, files in walk(self.src):
+                    zipf.add_dir(
+                        ospath.relpath(dirpath, base), ospath.getmtime(dirpath)
+                    )
+                    for file_ in sorted(files):
+                        if file_.lower().endswith(
+                            tuple(f".{ext}" for ext in GLOBAL_EXTENSION_FILTER)
+                        ):
+                            continue
+                        f_path = ospath.join(dirpath, file_)
+                        zipf.add_file(
+                            f_path, ospath.relpath(f_path, base), self.__on_read
+                        )
+            zipf.close()
+        except Exception:
+            out.abort()
+            raise
+        if self.__remove_src:
+            if ospath.isdir(self.src):
+                rmtree(self.src, ignore_errors=True)
+            else:
+                remove(self.src)
+
+    async def volumes(self):
+        while (path := await self.__queue.get()) is not None:
+            self.__taken.set()
+            yield path
+
+    def kill(self):
+        if self.returncode is None:
+            self.returncode = -9
+        self.__taken.set()
@@ -9,8 +9,7 @@ from requests import utils as rutils
 from aiofiles.os import path as aiopath, remove as aioremove, listdir, makedirs
 from os import walk, path as ospath
 from html import escape
-from aioshutil import move
-from asyncio import create_subprocess_exec, sleep, Event
+from asyncio import create_subprocess_exec, sleep
 from pyrogram.enums import ChatType
 
 from bot import (
@@ -56,11 +55,21 @@ from bot.helper.ext_utils.fs_utils import (
 )
 from bot.helper.ext_utils.leech_utils import (
     split_file,
+    get_split_size,
     format_filename,
     get_document_type,
 )
 from bot.helper.ext_utils.exceptions import NotSupportedExtractionArchive
-from bot.helper.ext_utils.task_manager import start_from_queued
+from bot.helper.ext_utils.task_manager import (
+    start_from_queued,
+    add_to_queue,
+    queue_meta,
+)
+from bot.helper.ext_utils.quota_manager import quota_ledger
+from bot.helper.ext_utils.zip_utils import ZipStream
+from bot.helper.ext_utils.storage_manager import storage_ledger
+from bot.helper.ext_utils.shared_download import shared_downloads
+from bot.helper.ext_utils.resume_manager import resume_manager
 from bot.helper.mirror_utils.status_utils.extract_status import ExtractStatus
 from bot.helper.mirror_utils.status_utils.zip_status import ZipStatus
 from bot.helper.mirror_utils.status_utils.split_status import SplitStatus
@@ -111,11 +120,10 @@ class MirrorLeechListener:
         source_url=None,
         logMessage=None,
         leech_utils={},
+        uid=None,
     ):
-        if sameDir is None:
-            sameDir = {}
         self.message = message
-        self.uid = message.id
+        self.uid = uid or message.id
         self.excep_chat = bool(
             str(message.chat.id) in config_dict["EXCEP_CHATS"].split()
         )
@@ -130,6 +138,8 @@ class MirrorLeechListener:
         self.tag = tag
         self.seed = seed
         self.newDir = ""
+        self.virtual_splits = {}
+        self.zip_stream = None
         self.dir = f"{DOWNLOAD_DIR}{self.uid}"
         self.select = select
         self.isSuperGroup = message.chat.type in [ChatType.SUPERGROUP, ChatType.CHANNEL]
@@ -239,44 +249,19 @@ class MirrorLeechListener:
                 self.source_url,
                 self.message.text,
             )
+        await resume_manager.save(self, "dl")
 
     async def onDownloadComplete(self):
-        multi_links = False
-        while True:
-            if self.sameDir:
-                if (
-                    self.sameDir["total"] in [1, 0]
-                    or self.sameDir["total"] > 1
-                    and len(self.sameDir["tasks"]) > 1
-                ):
-                    break
-            else:
-                break
-            await sleep(0.2)
+        multi_links = bool(self.sameDir) and await self.sameDir.merge(
+            self.uid, self.dir
+        )
         async with download_dict_lock:
-            if self.sameDir and self.sameDir["total"] > 1:
-                self.sameDir["tasks"].remove(self.uid)
-                self.sameDir["total"] -= 1
-                folder_name = self.sameDir["name"]
-                spath = f"{self.dir}/{folder_name}"
-                des_path = (
-                    f"{DOWNLOAD_DIR}{list(self.sameDir['tasks'])[0]}/{folder_name}"
-                )
-                await makedirs(des_path, exist_ok=True)
-                for item in await listdir(spath):
-                    if item.endswith((".aria2", ".!qB")):
-                        continue
-                    item_path = f"{self.dir}/{folder_name}/{item}"
-                    if item in await listdir(des_path):
-                        await move(item_path, f"{des_path}/{self.uid}-{item}")
-                    else:
-                        await move(item_path, f"{des_path}/{item}")
-                multi_links = True
             download = download_dict[self.uid]
             name = str(download.name()).replace("/", "")
             gid = download.gid()
         LOGGER.info(f"Download Completed: {name}")
         if multi_links:
+            await quota_ledger.commit(self.uid)
             await self.onUploadError("Downloaded! Starting other part of the Task...")
             return
         if (
@@ -296,6 +281,9 @@ class MirrorLeechListener:
         dl_path = f"{self.dir}/{name}"
         up_path = ""
         size = await get_path_size(dl_path)
+        storage_ledger.downloaded(self.uid, self, size)
+        await shared_downloads.fan_out(self, name, size)
+        await resume_manager.save(self, "up")
         async with queue_dict_lock:
             if self.uid in non_queued_dl:
                 non_queued_dl.remove(self.uid)
@@ -448,41 +436,55 @@ class MirrorLeechListener:
             LEECH_SPLIT_SIZE = (
                 user_dict.get("split_size", False) or config_dict["LEECH_SPLIT_SIZE"]
             )
-            cmd = [
-                "7z",
-                f"-v{LEECH_SPLIT_SIZE}b",
-                "a",
-                "-mx=0",
-                f"-p{pswd}",
-                up_path,
-                dl_path,
-            ]
-            for ext in GLOBAL_EXTENSION_FILTER:
-                ex_ext = f"-xr!*.{ext}"
-                cmd.append(ex_ext)
             if self.isLeech and int(size) > LEECH_SPLIT_SIZE:
-                if not pswd:
-                    del cmd[4]
+                if self.suproc == "cancelled":
+                    return
                 LOGGER.info(f"Zip: orig_path: {dl_path}, zip_path: {up_path}.0*")
+                self.suproc = self.zip_stream = ZipStream(
+                    dl_path,
+                    up_path,
+                    LEECH_SPLIT_SIZE,
+                    int(size),
+                    pswd,
+                    not self.seed,
+                )
+                self.zip_stream.start()
             else:
-                del cmd[1]
+                cmd = [
+                    "7z",
+                    "a",
+                    "-mx=0",
+                    f"-p{pswd}",
+                    up_path,
+                    dl_path,
+                ]
+                for ext in GLOBAL_EXTENSION_FILTER:
+                    ex_ext = f"-xr!*.{ext}"
+                    cmd.append(ex_ext)
                 if not pswd:
                     del cmd[3]
                 LOGGER.info(f"Zip: orig_path: {dl_path}, zip_path: {up_path}")
-            if self.suproc == "cancelled":
-                return
-            self.suproc = await create_subprocess_exec(*cmd)
-            code = await self.suproc.wait()
-            if code == -9:
-                return
-            elif not self.seed:
-                await clean_target(dl_path)
+                if self.suproc == "cancelled":
+                    return
+                self.suproc = await create_subprocess_exec(*cmd)
+                code = await self.suproc.wait()
+                if code == -9:
+                    return
+                elif not self.seed:
+                    await clean_target(dl_path)
 
         if not self.compress and not self.extract:
             up_path = dl_path
 
         up_dir, up_name = up_path.rsplit("/", 1)
-        size = await get_path_size(up_dir)
+        if self.zip_stream is not None:
+            size = self.zip_stream.size
+            storage_ledger.shrink(self.uid, size + 2 * LEECH_SPLIT_SIZE)
+        else:
+            size = await get_path_size(up_dir)
+            storage_ledger.shrink(
+                self.uid, size * 2 if self.isLeech and not self.compress else size
+            )
         if self.isLeech:
             m_size = []
             o_files = []
@@ -499,6 +501,11 @@ class MirrorLeechListener:
                         f_path = ospath.join(dirpath, file_)
                         f_size = await aiopath.getsize(f_path)
                         if f_size > LEECH_SPLIT_SIZE:
+                            if not (await get_document_type(f_path))[0]:
+                                self.virtual_splits[f_path] = get_split_size(
+                                    f_size, LEECH_SPLIT_SIZE, self
+                                )
+                                continue
                             if not checked:
                                 checked = True
                                 async with download_dict_lock:
@@ -526,6 +533,8 @@ class MirrorLeechListener:
                             else:
                                 m_size.append(f_size)
                                 o_files.append(file_)
+                if checked or self.virtual_splits:
+                    storage_ledger.shrink(self.uid, await get_path_size(up_dir))
 
         up_limit = config_dict["QUEUE_UPLOAD"]
         all_limit = config_dict["QUEUE_ALL"]
@@ -538,8 +547,7 @@ class MirrorLeechListener:
             ) or (up_limit and up >= up_limit):
                 added_to_queue = True
                 LOGGER.info(f"Added to Queue/Upload: {name}")
-                event = Event()
-                queued_up[self.uid] = event
+                event = add_to_queue(queued_up, self.uid, self, size)
         if added_to_queue:
             async with download_dict_lock:
                 download_dict[self.uid] = QueueStatus(name, size, gid, self, "Up")
@@ -551,7 +559,8 @@ class MirrorLeechListener:
         async with queue_dict_lock:
             non_queued_up.add(self.uid)
         if self.isLeech:
-            size = await get_path_size(up_dir)
+            if self.zip_stream is None:
+                size = await get_path_size(up_dir)
             for s in m_size:
                 size = size - s
             LOGGER.info(f"Leech Name: {up_name}")
@@ -600,6 +609,8 @@ class MirrorLeechListener:
     async def onUploadComplete(
         self, link, size, files, folders, mime_type, name, rclonePath="", private=False
     ):
+        await quota_ledger.commit(self.uid)
+        await resume_manager.remove(self)
         if (
             self.isSuperGroup
             and config_dict["INCOMPLETE_TASK_NOTIFIER"]
@@ -875,6 +886,7 @@ class MirrorLeechListener:
                     await clean_target(self.newDir)
                 elif self.compress:
                     await clean_target(f"{self.dir}/{name}")
+                storage_ledger.release(self.uid)
                 async with queue_dict_lock:
                     if self.uid in non_queued_up:
                         non_queued_up.remove(self.uid)
@@ -887,6 +899,7 @@ class MirrorLeechListener:
             await deleteMessage(self.botpmmsg)
 
         await clean_download(self.dir)
+        storage_ledger.release(self.uid)
         async with download_dict_lock:
             if self.uid in download_dict.keys():
                 del download_dict[self.uid]
@@ -904,13 +917,18 @@ class MirrorLeechListener:
         await delete_links(self.message)
 
     async def onDownloadError(self, error, button=None):
+        if self.zip_stream is not None:
+            self.zip_stream.kill()
+        await shared_downloads.release(self)
+        await resume_manager.remove(self)
+        quota_ledger.release(self.uid)
+        storage_ledger.release(self.uid)
         async with download_dict_lock:
             if self.uid in download_dict.keys():
                 del download_dict[self.uid]
             count = len(download_dict)
-            if self.sameDir and self.uid in self.sameDir["tasks"]:
-                self.sameDir["tasks"].remove(self.uid)
-                self.sameDir["total"] -= 1
+        if self.sameDir:
+            await self.sameDir.discard(self.uid)
         msg = f"""<i><b>Download Stopped!</b></i>
 ┠ <b>Task for:</b> {self.tag}
 ┃
@@ -937,6 +955,7 @@ class MirrorLeechListener:
             if self.uid in queued_up:
                 queued_up[self.uid].set()
                 del queued_up[self.uid]
+            queue_meta.pop(self.uid, None)
             if self.uid in non_queued_dl:
                 non_queued_dl.remove(self.uid)
             if self.uid in non_queued_up:
@@ -949,6 +968,12 @@ class MirrorLeechListener:
             await clean_download(self.newDir)
 
     async def onUploadError(self, error):
+        if self.zip_stream is not None:
+            self.zip_stream.kill()
+        await shared_downloads.release(self)
+        await resume_manager.remove(self)
+        quota_ledger.release(self.uid)
+        storage_ledger.release(self.uid)
         async with download_dict_lock:
             if self.uid in download_dict.keys():
                 del download_dict[self.uid]
@@ -979,6 +1004,7 @@ class MirrorLeechListener:
             if self.uid in queued_up:
                 queued_up[self.uid].set()
                 del queued_up[self.uid]
+            queue_meta.pop(self.uid, None)
             if self.uid in non_queued_dl:
                 non_queued_dl.remove(self.uid)
             if self.uid in non_queued_up:
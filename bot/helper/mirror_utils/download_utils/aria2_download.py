@@ -32,7 +32,7 @@ async def add_aria2c_download(link, path, listener, filename, header, ratio, see
         a2c_opt["seed-time"] = seed_time
     if TORRENT_TIMEOUT := config_dict["TORRENT_TIMEOUT"]:
         a2c_opt["bt-stop-timeout"] = f"{TORRENT_TIMEOUT}"
-    added_to_queue, event = await is_queued(listener.uid)
+    added_to_queue, event = await is_queued(listener.uid, listener)
     if added_to_queue:
         if link.startswith("magnet:"):
             a2c_opt["pause-metadata"] = "true"
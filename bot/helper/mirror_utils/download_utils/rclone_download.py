@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
-from asyncio import gather
-from json import loads
+from aiohttp import ClientError
 from secrets import token_hex
 
 from bot import (
@@ -10,11 +9,12 @@ from bot import (
     non_queued_dl,
     LOGGER,
 )
-from bot.helper.ext_utils.bot_utils import cmd_exec
+from bot.helper.ext_utils.exceptions import RcloneRcError
 from bot.helper.telegram_helper.message_utils import sendMessage, sendStatusMessage
 from bot.helper.ext_utils.task_manager import is_queued, stop_duplicate_check
 from bot.helper.mirror_utils.status_utils.rclone_status import RcloneStatus
 from bot.helper.mirror_utils.status_utils.queue_status import QueueStatus
+from bot.helper.mirror_utils.rclone_utils.rcd import rclone_daemons
 from bot.helper.mirror_utils.rclone_utils.transfer import RcloneTransferHelper
 
 
@@ -22,38 +22,29 @@ async def add_rclone_download(rc_path, config_path, path, name, listener):
     remote, rc_path = rc_path.split(":", 1)
     rc_path = rc_path.strip("/")
 
-    cmd1 = [
-        "rclone",
-        "lsjson",
-        "--fast-list",
-        "--stat",
-        "--no-mimetype",
-        "--no-modtime",
-        "--config",
-        config_path,
-        f"{remote}:{rc_path}",
-    ]
-    cmd2 = [
-        "rclone",
-        "size",
-        "--fast-list",
-        "--json",
-        "--config",
-        config_path,
-        f"{remote}:{rc_path}",
-    ]
-    res1, res2 = await gather(cmd_exec(cmd1), cmd_exec(cmd2))
-    if res1[2] != res2[2] != 0:
-        if res1[2] != -9:
-            err = res1[1] or res2[1]
-            msg = f"Error: While getting rclone stat/size. Path: {remote}:{rc_path}. Stderr: {err[:4000]}"
-            await sendMessage(listener.message, msg)
-        return
     try:
-        rstat = loads(res1[0])
-        rsize = loads(res2[0])
-    except Exception as err:
-        await sendMessage(listener.message, f"RcloneDownload JsonLoad: {err}")
+        res = await rclone_daemons.call(
+            config_path,
+            "operations/stat",
+            fs=f"{remote}:",
+            remote=rc_path,
+            opt={"noMimeType": True, "noModTime": True},
+        )
+        if (rstat := res["item"]) is None:
+            raise RcloneRcError("object not found")
+        if rstat["IsDir"]:
+            res = await rclone_daemons.call(
+                config_path,
+                "operations/size",
+                fs=f"{remote}:{rc_path}",
+                _config={"UseListR": True},
+            )
+            size = res["bytes"]
+        else:
+            size = rstat["Size"]
+    except (RcloneRcError, ClientError) as err:
+        msg = f"Error: While getting rclone stat/size. Path: {remote}:{rc_path}. Error: {str(err)[:4000]}"
+        await sendMessage(listener.message, msg)
         return
     if rstat["IsDir"]:
         if not name:
@@ -61,14 +52,13 @@ async def add_rclone_download(rc_path, config_path, path, name, listener):
         path += name
     else:
         name = rc_path.rsplit("/", 1)[-1]
-    size = rsize["bytes"]
     gid = token_hex(5)
     msg, button = await stop_duplicate_check(name, listener)
     if msg:
         await sendMessage(listener.message, msg, button)
         return
 
-    added_to_queue, event = await is_queued(listener.uid)
+    added_to_queue, event = await is_queued(listener.uid, listener, size)
     if added_to_queue:
         LOGGER.info(f"Added to Queue/Download: {name}")
         async with download_dict_lock:
@@ -98,4 +88,6 @@ async def add_rclone_download(rc_path, config_path, path, name, listener):
         await sendStatusMessage(listener.message)
         LOGGER.info(f"Download with rclone: {rc_path}")
 
-    await RCTransfer.download(remote, rc_path, config_path, path)
+    await RCTransfer.download(
+        remote, rc_path, config_path, path, is_file=not rstat["IsDir"]
+    )
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 from logging import getLogger, ERROR
+from mimetypes import guess_extension
+from os import O_CREAT, O_TRUNC, O_WRONLY, close, ftruncate, open as osopen, pwrite
 from time import time
-from asyncio import Lock
+from asyncio import Lock, gather, wait
+from aiofiles.os import makedirs
 from pyrogram import Client
 
 from bot import (
@@ -11,9 +14,11 @@ from bot import (
     non_queued_dl,
     queue_dict_lock,
     bot,
+    bot_loop,
     user,
     IS_PREMIUM_USER,
 )
+from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.mirror_utils.status_utils.telegram_status import TelegramStatus
 from bot.helper.mirror_utils.status_utils.queue_status import QueueStatus
 from bot.helper.telegram_helper.message_utils import (
@@ -29,6 +34,9 @@ from bot.helper.ext_utils.task_manager import (
 
 global_lock = Lock()
 GLOBAL_GID = set()
+STREAM_CHUNK_SIZE = 1024 * 1024
+PARALLEL_STREAMS = 4
+PARALLEL_MIN_SIZE = 20 * 1024 * 1024
 getLogger("pyrogram").setLevel(ERROR)
 
 
@@ -37,6 +45,7 @@ class TelegramDownloadHelper:
     def __init__(self, listener):
         self.name = ""
         self.__processed_bytes = 0
+        self.__done_bytes = 0
         self.__start_time = time()
         self.__listener = listener
         self.__client = bot
@@ -78,7 +87,7 @@ class TelegramDownloadHelper:
     async def __onDownloadProgress(self, current, total):
         if self.__is_cancelled:
             self.__client.stop_transmission()
-        self.__processed_bytes = current
+        self.__processed_bytes = self.__done_bytes + current
 
     async def __onDownloadError(self, error):
         async with global_lock:
@@ -93,7 +102,67 @@ class TelegramDownloadHelper:
         async with global_lock:
             GLOBAL_GID.remove(self.__id)
 
-    async def __download(self, message, path):
+    async def __stream_range(self, message, fd, first_chunk, chunks):
+        offset = first_chunk * STREAM_CHUNK_SIZE
+        async for chunk in self.__client.stream_media(
+            message, limit=chunks, offset=first_chunk
+        ):
+            if self.__is_cancelled:
+                return
+            await sync_to_async(pwrite, fd, chunk, offset)
+            offset += len(chunk)
+            self.__processed_bytes += len(chunk)
+
+    async def __download_parallel(self, message, path, size):
+        """Fetch contiguous chunk ranges concurrently into a preallocated file.
+
+        Each range is its own GetFile stream, so the requests of all ranges are in
+        flight on the media DC session at once instead of one after the other.
+        """
+        await makedirs(path.rsplit("/", 1)[0], exist_ok=True)
+        fd = osopen(path, O_WRONLY | O_CREAT | O_TRUNC)
+        try:
+            await sync_to_async(ftruncate, fd, size)
+            total_chunks = -(-size // STREAM_CHUNK_SIZE)
+            per_stream = -(-total_chunks // PARALLEL_STREAMS)
+            tasks = [
+                bot_loop.create_task(
+                    self.__stream_range(
+                        message, fd, first, min(per_stream, total_chunks - first)
+                    )
+                )
+                for first in range(0, total_chunks, per_stream)
+            ]
+            try:
+                await gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await wait(tasks)
+                raise
+        finally:
+            close(fd)
+        return None if self.__is_cancelled else path
+
+    async def __fetch_all(self, files):
+        download = None
+        for message, path, size in files:
+            if self.__is_cancelled:
+                return None
+            if (download := await self.__fetch(message, path, size)) is None:
+                return None
+            self.__done_bytes += size
+            self.__processed_bytes = self.__done_bytes
+        return download
+
+    async def __fetch(self, message, path, size):
+        if size >= PARALLEL_MIN_SIZE and not path.endswith("/"):
+            return await self.__download_parallel(message, path, size)
+        return await self.__client.download_media(
+            message=message, file_name=path, progress=self.__onDownloadProgress
+        )
+
+    async def __download(self, files):
         try:
             if self.__client is None and self.__decrypter is not None:
                 try:
@@ -105,19 +174,13 @@ class TelegramDownloadHelper:
                         in_memory=True,
                         no_updates=True,
                     ) as self.__client:
-                        download = await self.__client.download_media(
-                            message=message,
-                            file_name=path,
-                            progress=self.__onDownloadProgress,
-                        )
+                        download = await self.__fetch_all(files)
                 except Exception as e:
                     if not self.__is_cancelled:
                         await self.__onDownloadError(f"ERROR: {e}")
                         return
             else:
-                download = await self.__client.download_media(
-                    message=message, file_name=path, progress=self.__onDownloadProgress
-                )
+                download = await self.__fetch_all(files)
             if self.__is_cancelled:
                 await self.__onDownloadError("Cancelled by user!")
                 return
@@ -130,32 +193,67 @@ class TelegramDownloadHelper:
         elif not self.__is_cancelled:
             await self.__onDownloadError("Internal Error occurred")
 
+    @staticmethod
+    def __get_files(message, path, filename):
+        if not isinstance(message, list):
+            media = getattr(message, message.media.value) if message.media else None
+            if media is None:
+                return None
+            if filename == "":
+                name = media.file_name if hasattr(media, "file_name") else "None"
+            else:
+                name = filename
+            if filename or getattr(media, "file_name", None):
+                path = path + name
+            return name, media.file_unique_id, [(message, path, media.file_size)]
+        medias = [
+            (msg, media)
+            for msg in message
+            if msg.media
+            and getattr(media := getattr(msg, msg.media.value), "file_size", None)
+        ]
+        if not medias:
+            return None
+        first, last = medias[0][0], medias[-1][0]
+        name = filename or (
+            f"{first.chat.title or first.chat.id} {first.id}-{last.id}".replace(
+                "/", "_"
+            )
+        )
+        files = []
+        names = set()
+        for msg, media in medias:
+            if not (file_name := getattr(media, "file_name", None)):
+                ext = ".jpg" if msg.photo else ""
+                if mime_type := getattr(media, "mime_type", None):
+                    ext = guess_extension(mime_type) or ext
+                file_name = f"{msg.id}{ext}"
+            elif file_name in names:
+                file_name = f"{msg.id}_{file_name}"
+            names.add(file_name)
+            files.append((msg, f"{path}{name}/{file_name}", media.file_size))
+        return name, medias[0][1].file_unique_id, files
+
     async def add_download(self, message, path, filename, session, decrypter):
         if session == "user":
             self.__client = user
             if not self.__listener.isSuperGroup:
                 await sendMessage(
-                    message, "Use SuperGroup to download this Link with User!"
+                    self.__listener.message,
+                    "Use SuperGroup to download this Link with User!",
                 )
                 return
         elif session == "user_sess":
             self.__client = None
             self.__decrypter = decrypter
 
-        media = getattr(message, message.media.value) if message.media else None
-
-        if media is not None:
+        if (download_files := self.__get_files(message, path, filename)) is not None:
+            name, gid, files = download_files
             async with global_lock:
-                download = media.file_unique_id not in GLOBAL_GID
+                download = gid not in GLOBAL_GID
 
             if download:
-                if filename == "":
-                    name = media.file_name if hasattr(media, "file_name") else "None"
-                else:
-                    name = filename
-                    path = path + name
-                size = media.file_size
-                gid = media.file_unique_id
+                size = sum(file_size for _, _, file_size in files)
 
                 msg, button = await stop_duplicate_check(name, self.__listener)
                 if msg:
@@ -166,7 +264,9 @@ class TelegramDownloadHelper:
                     await sendMessage(self.__listener.message, limit_exceeded)
                     await delete_links(self.__listener.message)
                     return
-                added_to_queue, event = await is_queued(self.__listener.uid)
+                added_to_queue, event = await is_queued(
+                    self.__listener.uid, self.__listener, size
+                )
                 if added_to_queue:
                     LOGGER.info(f"Added to Queue/Download: {name}")
                     async with download_dict_lock:
@@ -183,7 +283,7 @@ class TelegramDownloadHelper:
                 else:
                     from_queue = False
                 await self.__onDownloadStart(name, size, gid, from_queue)
-                await self.__download(message, path)
+                await self.__download(files)
             else:
                 await self.__onDownloadError("File already being downloaded!")
         else:
@@ -326,7 +326,9 @@ class YoutubeDLHelper:
         ):
             await self.__listener.onDownloadError(limit_exceeded)
             return
-        added_to_queue, event = await is_queued(self.__listener.uid)
+        added_to_queue, event = await is_queued(
+            self.__listener.uid, self.__listener, self.__size
+        )
         if added_to_queue:
             LOGGER.info(f"Added to Queue/Download: {self.name}")
             async with download_dict_lock:
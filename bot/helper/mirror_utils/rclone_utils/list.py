@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
-from asyncio import wait_for, Event, wrap_future
+from asyncio import wait_for, Event, current_task, shield, wrap_future
+from aiohttp import ClientError
 from aiofiles.os import path as aiopath
 from aiofiles import open as aiopen
 from configparser import ConfigParser
 from pyrogram.handlers import CallbackQueryHandler
 from pyrogram.filters import regex, user
 from functools import partial
-from json import loads
 from time import time
 
-from bot import LOGGER, config_dict
+from bot import LOGGER, bot_loop, config_dict
 from bot.helper.ext_utils.db_handler import DbManger
+from bot.helper.ext_utils.exceptions import RcloneRcError
+from bot.helper.mirror_utils.rclone_utils.rcd import rclone_daemons
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import (
     sendMessage,
@@ -18,7 +20,6 @@ from bot.helper.telegram_helper.message_utils import (
     deleteMessage,
 )
 from bot.helper.ext_utils.bot_utils import (
-    cmd_exec,
     new_thread,
     get_readable_file_size,
     new_task,
@@ -26,6 +27,96 @@ from bot.helper.ext_utils.bot_utils import (
 )
 
 LIST_LIMIT = 6
+LIST_CACHE_TTL = 300
+
+
+def child_path(path, name):
+    return f"{path}{name}" if path.endswith(":") else f"{path}/{name}"
+
+
+class RcloneListCache:
+    """Folder listings of rclone remotes, shared by every browser.
+
+    A folder is listed once with files and folders together, so switching the
+    item type or going back doesn't list it again. Folders shown on the current
+    page are listed in the background, so opening one is usually instant.
+    """
+
+    def __init__(self):
+        self.__entries = {}
+        self.__pending = {}
+        self.__generations = {}
+
+    async def __fetch(self, key):
+        config_path, path = key
+        generation = self.__generations.get(config_path, 0)
+        try:
+            res = await rclone_daemons.call(
+                config_path,
+                "operations/list",
+                fs=path,
+                remote="",
+                opt={"noMimeType": True, "noModTime": True},
+            )
+            result = sorted(res["list"], key=lambda x: x["Path"])
+            if self.__generations.get(config_path, 0) == generation:
+                self.__entries[key] = (time(), result)
+            return result
+        finally:
+            if self.__pending.get(key) is current_task():
+                del self.__pending[key]
+
+    def __expire(self):
+        now = time()
+        for key in [
+            key
+            for key, (added, _) in self.__entries.items()
+            if now - added > LIST_CACHE_TTL
+        ]:
+            del self.__entries[key]
+
+    async def get(self, config_path, path):
+        key = (config_path, path)
+        self.__expire()
+        if (entry := self.__entries.get(key)) is not None:
+            return entry[1]
+        if (task := self.__pending.get(key)) is None:
+            task = self.__pending[key] = bot_loop.create_task(self.__fetch(key))
+        return await shield(task)
+
+    def prefetch(self, config_path, path, names):
+        for name in names:
+            key = (config_path, child_path(path, name))
+            if key not in self.__entries and key not in self.__pending:
+                task = self.__pending[key] = bot_loop.create_task(self.__fetch(key))
+                task.add_done_callback(self.__prefetch_done)
+
+    @staticmethod
+    def __prefetch_done(task):
+        if not task.cancelled() and (err := task.exception()) is not None:
+            LOGGER.debug(f"Rclone prefetch failed: {err}")
+
+    def invalidate(self, config_path, path):
+        """Forget `path` and the folders above it, e.g. after uploading to it."""
+        remote, rpath = path.split(":", 1)
+        parents = {f"{remote}:"}
+        parts = rpath.strip("/").split("/") if rpath.strip("/") else []
+        for i in range(1, len(parts) + 1):
+            parents.add(f"{remote}:{'/'.join(parts[:i])}")
+        for key in [
+            key for key in self.__entries if key[0] == config_path and key[1] in parents
+        ]:
+            del self.__entries[key]
+
+    def invalidate_config(self, config_path):
+        """Forget every listing of a config file that was changed or removed."""
+        self.__generations[config_path] = self.__generations.get(config_path, 0) + 1
+        for index in (self.__entries, self.__pending):
+            for key in [key for key in index if key[0] == config_path]:
+                del index[key]
+
+
+rclone_list_cache = RcloneListCache()
 
 
 @new_task
@@ -166,9 +257,13 @@ class RcloneList:
             self.iter_start = LIST_LIMIT * (pages - 1)
         page = (self.iter_start / LIST_LIMIT) + 1 if self.iter_start != 0 else 1
         buttons = ButtonMaker()
-        for index, idict in enumerate(
-            self.path_list[self.iter_start : LIST_LIMIT + self.iter_start]
-        ):
+        page_items = self.path_list[self.iter_start : LIST_LIMIT + self.iter_start]
+        rclone_list_cache.prefetch(
+            self.config_path,
+            f"{self.remote}{self.path}",
+            [idict["Path"] for idict in page_items if idict["IsDir"]],
+        )
+        for index, idict in enumerate(page_items):
             orig_index = index + self.iter_start
             if idict["IsDir"]:
                 ptype = "fo"
@@ -218,36 +313,29 @@ class RcloneList:
             self.item_type == itype
         elif self.list_status == "rcu":
             self.item_type == "--dirs-only"
-        cmd = [
-            "rclone",
-            "lsjson",
-            self.item_type,
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            self.config_path,
-            f"{self.remote}{self.path}",
-        ]
         if self.is_cancelled:
             return
-        res, err, code = await cmd_exec(cmd)
-        if code not in [0, -9]:
+        try:
+            result = await rclone_list_cache.get(
+                self.config_path, f"{self.remote}{self.path}"
+            )
+        except (RcloneRcError, ClientError) as err:
             LOGGER.error(
-                f"While rclone listing. Path: {self.remote}{self.path}. Stderr: {err}"
+                f"While rclone listing. Path: {self.remote}{self.path}. Error: {err}"
             )
-            self.remote = err[:4000]
+            self.remote = str(err)[:4000]
             self.path = ""
             self.event.set()
             return
-        result = loads(res)
+        is_dir = self.item_type == "--dirs-only"
+        result = [item for item in result if item["IsDir"] == is_dir]
         if len(result) == 0 and itype != self.item_type and self.list_status == "rcd":
             itype = (
                 "--dirs-only" if self.item_type == "--files-only" else "--files-only"
             )
             self.item_type = itype
             return await self.get_path(itype)
-        self.path_list = sorted(result, key=lambda x: x["Path"])
+        self.path_list = result
         self.iter_start = 0
         await self.get_path_buttons()
 
@@ -0,0 +1,192 @@
+from asyncio import Lock, create_subprocess_exec, create_task, sleep
+from aiohttp import ClientSession, ClientError, ClientTimeout
+from logging import getLogger
+from os import path as ospath
+from socket import socket
+from time import time
+
+from bot.helper.ext_utils.exceptions import RcloneRcError
+
+LOGGER = getLogger(__name__)
+
+RCD_START_TIMEOUT = 30
+RCD_IDLE_TIMEOUT = 600
+RCD_REAP_INTERVAL = 60
+
+
+def free_port():
+    with socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fs_string(path, options=None):
+    """Path as an rclone fs string, with backend options for remote paths."""
+    if not options or ":" not in path:
+        return path
+    remote, rpath = path.split(":", 1)
+    opts = ",".join(f"{key}={value}" for key, value in options.items())
+    return f"{remote},{opts}:{rpath}"
+
+
+def split_path(path):
+    """Split a remote or local file path into its parent fs and file name."""
+    if ":" in path:
+        remote, rpath = path.split(":", 1)
+        parent, _, name = rpath.rpartition("/")
+        return f"{remote}:{parent}", name
+    return ospath.dirname(path) or "/", ospath.basename(path)
+
+
+class RcloneDaemon:
+    """A long running `rclone rcd` for one config file.
+
+    Remotes, connections and listings are cached by the daemon between calls,
+    so operations don't pay for a new process and config parse each time.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self.last_used = time()
+        self.__calls = 0
+        self.__proc = None
+        self.__session = None
+        self.__url = ""
+
+    @property
+    def running(self):
+        return self.__proc is not None and self.__proc.returncode is None
+
+    async def start(self):
+        port = free_port()
+        self.__url = f"http://127.0.0.1:{port}"
+        cmd = [
+            "rclone",
+            "rcd",
+            "--rc-addr",
+            f"127.0.0.1:{port}",
+            "--rc-no-auth",
+            "--config",
+            self.config_path,
+            "--log-file",
+            "rlog.txt",
+            "--log-level",
+            "NOTICE",
+        ]
+        self.__proc = await create_subprocess_exec(*cmd)
+        if self.__session is None:
+            # Recursive sizes and listings of large remotes can take minutes.
+            self.__session = ClientSession(timeout=ClientTimeout(total=None))
+        for _ in range(RCD_START_TIMEOUT * 5):
+            if not self.running:
+                break
+            try:
+                await self.call("rc/noop")
+                LOGGER.info(f"Started rclone rcd for {self.config_path} on {port}")
+                return
+            except ClientError:
+                await sleep(0.2)
+        await self.stop()
+        raise RcloneRcError(f"Unable to start rclone rcd for {self.config_path}")
+
+    async def call(self, method, **params):
+        self.__calls += 1
+        try:
+            async with self.__session.post(
+                f"{self.__url}/{method}", json=params
+            ) as res:
+                data = await res.json(content_type=None)
+                if res.status != 200:
+                    raise RcloneRcError(data.get("error", f"HTTP {res.status}"))
+                return data
+        finally:
+            self.__calls -= 1
+            self.last_used = time()
+
+    async def idle(self):
+        """True if no calls or jobs are running on the daemon."""
+        if self.__calls:
+            return False
+        try:
+            res = await self.call("job/list")
+        except (RcloneRcError, ClientError):
+            return not self.running
+        return not res.get("runningIds", res.get("jobids"))
+
+    async def stop(self):
+        if self.running:
+            try:
+                self.__proc.kill()
+                await self.__proc.wait()
+            except Exception:
+                pass
+        self.__proc = None
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+
+class RcloneDaemons:
+    """Daemons by config file.
+
+    A daemon is stopped once it has been idle for RCD_IDLE_TIMEOUT. When its
+    config file is replaced or removed, it is retired instead: new calls start
+    a new daemon, and the old one is stopped once its running jobs end.
+    """
+
+    def __init__(self):
+        self.__daemons = {}
+        self.__retiring = []
+        self.__lock = Lock()
+        self.__reaper = None
+
+    async def get(self, config_path):
+        """Daemon for `config_path`, started on first use or if it exited."""
+        async with self.__lock:
+            daemon = self.__daemons.get(config_path)
+            if daemon is None or not daemon.running:
+                if daemon is not None:
+                    await daemon.stop()
+                daemon = RcloneDaemon(config_path)
+                await daemon.start()
+                self.__daemons[config_path] = daemon
+            daemon.last_used = time()
+            if self.__reaper is None:
+                self.__reaper = create_task(self.__reap())
+            return daemon
+
+    async def __reap(self):
+        while True:
+            await sleep(RCD_REAP_INTERVAL)
+            async with self.__lock:
+                for daemon in list(self.__retiring):
+                    if await daemon.idle():
+                        self.__retiring.remove(daemon)
+                        await daemon.stop()
+                        LOGGER.info(
+                            f"Stopped retired rclone rcd of {daemon.config_path}"
+                        )
+                for config_path, daemon in list(self.__daemons.items()):
+                    if (
+                        time() - daemon.last_used > RCD_IDLE_TIMEOUT
+                        and await daemon.idle()
+                    ):
+                        del self.__daemons[config_path]
+                        await daemon.stop()
+                        LOGGER.info(f"Stopped idle rclone rcd of {config_path}")
+                if not self.__daemons and not self.__retiring:
+                    self.__reaper = None
+                    return
+
+    async def call(self, config_path, method, **params):
+        daemon = await self.get(config_path)
+        return await daemon.call(method, **params)
+
+    async def close(self, config_path):
+        """Retire the daemon of a config file that was changed or removed."""
+        async with self.__lock:
+            if (daemon := self.__daemons.pop(config_path, None)) is not None:
+                self.__retiring.append(daemon)
+
+
+rclone_daemons = RcloneDaemons()
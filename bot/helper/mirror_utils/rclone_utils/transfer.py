@@ -1,25 +1,43 @@
-from asyncio import create_subprocess_exec, gather
+from aiohttp import ClientError
+from asyncio import create_subprocess_exec, gather, sleep
 from asyncio.subprocess import PIPE
 from re import findall as re_findall
-from json import loads
 from aiofiles.os import path as aiopath, mkdir, listdir
 from aiofiles import open as aiopen
 from configparser import ConfigParser
 from random import randrange
+from secrets import token_hex
 from logging import getLogger
 
 from bot import config_dict, GLOBAL_EXTENSION_FILTER
-from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
+from bot.helper.ext_utils.bot_utils import (
+    get_readable_file_size,
+    get_readable_time,
+    sync_to_async,
+)
+from bot.helper.ext_utils.exceptions import RcloneRcError
 from bot.helper.ext_utils.fs_utils import get_mime_type, count_files_and_folders
-
+from bot.helper.mirror_utils.rclone_utils.list import rclone_list_cache
+from bot.helper.mirror_utils.rclone_utils.rcd import (
+    fs_string,
+    rclone_daemons,
+    split_path,
+)
 
 LOGGER = getLogger(__name__)
 
+RC_POLL_INTERVAL = 1
+# Same as the --fast-list, --low-level-retries 1 and -M flags of the commands.
+RC_CONFIG = {"UseListR": True, "LowLevelRetries": 1, "Metadata": True}
+DRIVE_UPLOAD_OPTS = {"chunk_size": "64M", "upload_cutoff": "32M"}
+DRIVE_DOWNLOAD_OPTS = {"acknowledge_abuse": "true"}
+
 
 class RcloneTransferHelper:
     def __init__(self, listener=None, name=""):
         self.__listener = listener
         self.__proc = None
+        self.__rc_job = None
         self.__transferred_size = "0 B"
         self.__eta = "-"
         self.__percentage = "0%"
@@ -73,6 +91,98 @@ class RcloneTransferHelper:
                     self.__eta,
                 ) = data[0]
 
+    def __update_stats(self, stats):
+        done = stats.get("bytes", 0)
+        size = stats.get("totalBytes", 0)
+        self.__transferred_size = get_readable_file_size(done)
+        self.__size = get_readable_file_size(size)
+        self.__percentage = f"{round(done / size * 100)}%" if size else "0%"
+        self.__speed = f"{get_readable_file_size(stats.get('speed', 0))}/s"
+        eta = stats.get("eta")
+        self.__eta = get_readable_time(eta) if eta else "-"
+
+    async def __run_cli(self, cmd):
+        self.__proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        _, return_code = await gather(self.__progress(), self.__proc.wait())
+        if return_code in [0, -9]:
+            return return_code, ""
+        return return_code, (await self.__proc.stderr.read()).decode().strip()
+
+    async def __run_rc(
+        self,
+        config_path,
+        method,
+        source,
+        destination,
+        is_file,
+        config=None,
+        src_opts=None,
+        dst_opts=None,
+    ):
+        if is_file:
+            src_fs, src_name = split_path(source)
+            method = f"operations/{method}file"
+            params = {
+                "srcFs": fs_string(src_fs, src_opts),
+                "srcRemote": src_name,
+                "dstFs": fs_string(destination, dst_opts),
+                "dstRemote": src_name,
+            }
+        else:
+            method = f"sync/{method}"
+            params = {
+                "srcFs": fs_string(source, src_opts),
+                "dstFs": fs_string(destination, dst_opts),
+            }
+        group = f"rc-{token_hex(5)}"
+        ext = "*.{" + ",".join(GLOBAL_EXTENSION_FILTER) + "}"
+        daemon = None
+        try:
+            daemon = await rclone_daemons.get(config_path)
+            job = await daemon.call(
+                method,
+                _async=True,
+                _group=group,
+                _config=RC_CONFIG | (config or {}),
+                _filter={"ExcludeRule": [ext], "IgnoreCase": True},
+                **params,
+            )
+            self.__rc_job = (daemon, job["jobid"])
+            if self.__is_cancelled:
+                await self.__stop_rc_job()
+            while True:
+                status, stats = await gather(
+                    daemon.call("job/status", jobid=job["jobid"]),
+                    daemon.call("core/stats", group=group),
+                )
+                self.__update_stats(stats)
+                if status["finished"]:
+                    break
+                await sleep(RC_POLL_INTERVAL)
+        except (RcloneRcError, ClientError) as e:
+            return 1, str(e)
+        finally:
+            self.__rc_job = None
+            if daemon is not None:
+                try:
+                    await daemon.call("core/stats-delete", group=group)
+                except Exception:
+                    pass
+        if self.__is_cancelled:
+            return -9, ""
+        if status["success"]:
+            return 0, ""
+        return 1, status["error"]
+
+    async def __stop_rc_job(self):
+        if self.__rc_job is None:
+            return
+        daemon, jobid = self.__rc_job
+        try:
+            await daemon.call("job/stop", jobid=jobid)
+        except Exception:
+            pass
+
     def __switchServiceAccount(self):
         if self.__sa_index == self.__sa_number - 1:
             self.__sa_index = 0
@@ -108,9 +218,28 @@ class RcloneTransferHelper:
             await f.write(text)
         return sa_conf_file
 
-    async def __start_download(self, cmd, remote_type):
-        self.__proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        _, return_code = await gather(self.__progress(), self.__proc.wait())
+    async def __start_download(
+        self, config_path, remote, rc_path, path, is_file, remote_type
+    ):
+        rcflags = self.__listener.rcFlags or config_dict["RCLONE_FLAGS"]
+        if rcflags:
+            # Custom flags have no rc equivalent, so they keep the command line.
+            cmd = self.__getUpdatedCommand(
+                config_path, f"{remote}:{rc_path}", path, rcflags, "copy"
+            )
+            if remote_type != "drive":
+                cmd.extend(("--retries-sleep", "3s"))
+            return_code, error = await self.__run_cli(cmd)
+        else:
+            return_code, error = await self.__run_rc(
+                config_path,
+                "copy",
+                f"{remote}:{rc_path}",
+                path,
+                is_file,
+                config=None if remote_type == "drive" else {"RetriesInterval": "3s"},
+                src_opts=DRIVE_DOWNLOAD_OPTS if remote_type == "drive" else None,
+            )
 
         if self.__is_cancelled:
             return
@@ -118,7 +247,6 @@ class RcloneTransferHelper:
         if return_code == 0:
             await self.__listener.onDownloadComplete()
         elif return_code != -9:
-            error = (await self.__proc.stderr.read()).decode().strip()
             if (
                 not error
                 and remote_type == "drive"
@@ -135,10 +263,11 @@ class RcloneTransferHelper:
             ):
                 if self.__sa_count < self.__sa_number:
                     remote = self.__switchServiceAccount()
-                    cmd[6] = f"{remote}:{cmd[6].split(':', 1)[1]}"
                     if self.__is_cancelled:
                         return
-                    return await self.__start_download(cmd, remote_type)
+                    return await self.__start_download(
+                        config_path, remote, rc_path, path, is_file, remote_type
+                    )
                 else:
                     LOGGER.info(
                         f"Reached maximum number of service accounts switching, which is {self.__sa_count}"
@@ -146,7 +275,7 @@ class RcloneTransferHelper:
 
             await self.__listener.onDownloadError(error[:4000])
 
-    async def download(self, remote, rc_path, config_path, path):
+    async def download(self, remote, rc_path, config_path, path, is_file=False):
         self.__is_download = True
         try:
             remote_opts = await self.__get_remote_options(config_path, remote)
@@ -170,64 +299,69 @@ class RcloneTransferHelper:
                 remote = f"sa{self.__sa_index:03}"
                 LOGGER.info(f"Download with service account {remote}")
 
-        rcflags = self.__listener.rcFlags or config_dict["RCLONE_FLAGS"]
-        cmd = self.__getUpdatedCommand(
-            config_path, f"{remote}:{rc_path}", path, rcflags, "copy"
+        await self.__start_download(
+            config_path, remote, rc_path, path, is_file, remote_type
         )
 
-        if (
-            remote_type == "drive"
-            and not config_dict["RCLONE_FLAGS"]
-            and not self.__listener.rcFlags
-        ):
-            cmd.append("--drive-acknowledge-abuse")
-        elif remote_type != "drive":
-            cmd.extend(("--retries-sleep", "3s"))
-
-        await self.__start_download(cmd, remote_type)
-
     async def __get_gdrive_link(self, config_path, remote, rc_path, mime_type):
         if mime_type == "Folder":
-            epath = rc_path.strip("/").rsplit("/", 1)
-            epath = f"{remote}:{epath[0]}" if len(epath) > 1 else f"{remote}:"
             destination = f"{remote}:{rc_path}"
         elif rc_path:
-            epath = f"{remote}:{rc_path}/{self.name}"
-            destination = epath
+            destination = f"{remote}:{rc_path}/{self.name}"
         else:
-            epath = f"{remote}:{rc_path}{self.name}"
-            destination = epath
-
-        cmd = [
-            "rclone",
-            "lsjson",
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            config_path,
-            epath,
-        ]
-        res, err, code = await cmd_exec(cmd)
+            destination = f"{remote}:{self.name}"
 
-        if code == 0:
-            result = loads(res)
-            fid = next((r["ID"] for r in result if r["Path"] == self.name), "err")
+        try:
+            res = await rclone_daemons.call(
+                config_path,
+                "operations/stat",
+                fs=f"{remote}:",
+                remote=destination.split(":", 1)[1],
+                opt={"noMimeType": True, "noModTime": True},
+            )
+            fid = (res["item"] or {}).get("ID", "err")
             link = (
                 f"https://drive.google.com/drive/folders/{fid}"
                 if mime_type == "Folder"
                 else f"https://drive.google.com/uc?id={fid}&export=download"
             )
-        elif code != -9:
-            LOGGER.error(
-                f"while getting drive link. Path: {destination}. Stderr: {err}"
-            )
+        except (RcloneRcError, ClientError) as e:
+            LOGGER.error(f"while getting drive link. Path: {destination}. Error: {e}")
             link = ""
         return link, destination
 
-    async def __start_upload(self, cmd, remote_type):
-        self.__proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        _, return_code = await gather(self.__progress(), self.__proc.wait())
+    @staticmethod
+    async def __get_link(config_path, destination):
+        remote, rc_path = destination.split(":", 1)
+        try:
+            res = await rclone_daemons.call(
+                config_path, "operations/publiclink", fs=f"{remote}:", remote=rc_path
+            )
+            return res["url"], ""
+        except (RcloneRcError, ClientError) as e:
+            return "", str(e)
+
+    async def __start_upload(
+        self, config_path, path, remote, rc_path, is_file, method, remote_type
+    ):
+        rcflags = self.__listener.rcFlags or config_dict["RCLONE_FLAGS"]
+        if rcflags:
+            cmd = self.__getUpdatedCommand(
+                config_path, path, f"{remote}:{rc_path}", rcflags, method
+            )
+            if remote_type != "drive":
+                cmd.extend(("--retries-sleep", "3s"))
+            return_code, error = await self.__run_cli(cmd)
+        else:
+            return_code, error = await self.__run_rc(
+                config_path,
+                method,
+                path,
+                f"{remote}:{rc_path}",
+                is_file,
+                config=None if remote_type == "drive" else {"RetriesInterval": "3s"},
+                dst_opts=DRIVE_UPLOAD_OPTS if remote_type == "drive" else None,
+            )
 
         if self.__is_cancelled:
             return False
@@ -235,7 +369,6 @@ class RcloneTransferHelper:
         if return_code == -9:
             return False
         elif return_code != 0:
-            error = (await self.__proc.stderr.read()).decode().strip()
             if (
                 not error
                 and remote_type == "drive"
@@ -251,11 +384,18 @@ class RcloneTransferHelper:
             ):
                 if self.__sa_count < self.__sa_number:
                     remote = self.__switchServiceAccount()
-                    cmd[7] = f"{remote}:{cmd[7].split(':', 1)[1]}"
                     return (
                         False
                         if self.__is_cancelled
-                        else await self.__start_upload(cmd, remote_type)
+                        else await self.__start_upload(
+                            config_path,
+                            path,
+                            remote,
+                            rc_path,
+                            is_file,
+                            method,
+                            remote_type,
+                        )
                     )
                 else:
                     LOGGER.info(
@@ -315,25 +455,21 @@ class RcloneTransferHelper:
                 fremote = f"sa{self.__sa_index:03}"
                 LOGGER.info(f"Upload with service account {fremote}")
 
-        rcflags = self.__listener.rcFlags or config_dict["RCLONE_FLAGS"]
         method = (
             "move" if not self.__listener.seed or self.__listener.newDir else "copy"
         )
-        cmd = self.__getUpdatedCommand(
-            fconfig_path, path, f"{fremote}:{rc_path}", rcflags, method
+        result = await self.__start_upload(
+            fconfig_path,
+            path,
+            fremote,
+            rc_path,
+            mime_type != "Folder",
+            method,
+            remote_type,
         )
-        if (
-            remote_type == "drive"
-            and not config_dict["RCLONE_FLAGS"]
-            and not self.__listener.rcFlags
-        ):
-            cmd.extend(("--drive-chunk-size", "64M", "--drive-upload-cutoff", "32M"))
-        elif remote_type != "drive":
-            cmd.extend(("--retries-sleep", "3s"))
-
-        result = await self.__start_upload(cmd, remote_type)
         if not result:
             return
+        rclone_list_cache.invalidate(oconfig_path, f"{oremote}:{rc_path}")
 
         if remote_type == "drive":
             link, destination = await self.__get_gdrive_link(
@@ -347,14 +483,9 @@ class RcloneTransferHelper:
             else:
                 destination = f"{oremote}:{self.name}"
 
-            cmd = ["rclone", "link", "--config", oconfig_path, destination]
-            res, err, code = await cmd_exec(cmd)
-
-            if code == 0:
-                link = res
-            elif code != -9:
-                LOGGER.error(f"while getting link. Path: {destination} | Stderr: {err}")
-                link = ""
+            link, err = await self.__get_link(oconfig_path, destination)
+            if err:
+                LOGGER.error(f"while getting link. Path: {destination} | Error: {err}")
         if self.__is_cancelled:
             return
         LOGGER.info(f"Upload Done. Path: {destination}")
@@ -381,21 +512,30 @@ class RcloneTransferHelper:
             dst_remote_opt["type"],
         )
 
-        cmd = self.__getUpdatedCommand(
-            config_path, f"{src_remote}:{src_path}", destination, rcflags, "copy"
-        )
-        if not rcflags:
+        source = f"{src_remote}:{src_path}"
+        if rcflags:
+            cmd = self.__getUpdatedCommand(
+                config_path, source, destination, rcflags, "copy"
+            )
+            return_code, error = await self.__run_cli(cmd)
+        else:
+            config = src_opts = dst_opts = None
             if src_remote_type == "drive" and dst_remote_type != "drive":
-                cmd.append("--drive-acknowledge-abuse")
+                src_opts = DRIVE_DOWNLOAD_OPTS
             elif dst_remote_type == "drive" and src_remote_type != "drive":
-                cmd.extend(
-                    ("--drive-chunk-size", "64M", "--drive-upload-cutoff", "32M")
-                )
+                dst_opts = DRIVE_UPLOAD_OPTS
             elif src_remote_type == "drive":
-                cmd.extend(("--tpslimit", "3", "--transfers", "3"))
-
-        self.__proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        _, return_code = await gather(self.__progress(), self.__proc.wait())
+                config = {"TPSLimit": 3, "Transfers": 3}
+            return_code, error = await self.__run_rc(
+                config_path,
+                "copy",
+                source,
+                destination,
+                mime_type != "Folder",
+                config=config,
+                src_opts=src_opts,
+                dst_opts=dst_opts,
+            )
 
         if self.__is_cancelled:
             return None, None
@@ -403,11 +543,11 @@ class RcloneTransferHelper:
         if return_code == -9:
             return None, None
         elif return_code != 0:
-            error = (await self.__proc.stderr.read()).decode().strip()
             LOGGER.error(error)
             await self.__listener.onUploadError(error[:4000])
             return None, None
         else:
+            rclone_list_cache.invalidate(config_path, destination)
             if dst_remote_type == "drive":
                 link, destination = await self.__get_gdrive_link(
                     config_path, dst_remote, dst_path, mime_type
@@ -417,20 +557,16 @@ class RcloneTransferHelper:
                 if mime_type != "Folder":
                     destination += f"/{self.name}" if dst_path else self.name
 
-                cmd = ["rclone", "link", "--config", config_path, destination]
-                res, err, code = await cmd_exec(cmd)
+                link, err = await self.__get_link(config_path, destination)
 
                 if self.__is_cancelled:
                     return None, None
 
-                if code == 0:
-                    return res, destination
-                elif code != -9:
-                    LOGGER.error(
-                        f"while getting link. Path: {destination} | Stderr: {err}"
-                    )
-                    await self.__listener.onUploadError(err[:4000])
-                    return None, None
+                if not err:
+                    return link, destination
+                LOGGER.error(f"while getting link. Path: {destination} | Error: {err}")
+                await self.__listener.onUploadError(err[:4000])
+                return None, None
 
     @staticmethod
     def __getUpdatedCommand(config_path, source, destination, rcflags, method):
@@ -481,6 +617,7 @@ class RcloneTransferHelper:
                 self.__proc.kill()
             except Exception:
                 pass
+        await self.__stop_rc_job()
         if self.__is_download:
             LOGGER.info(f"Cancelling Download: {self.name}")
             await self.__listener.onDownloadError("Download stopped by user!")
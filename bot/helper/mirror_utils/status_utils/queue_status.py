@@ -3,8 +3,10 @@ from bot import LOGGER
 from bot.helper.ext_utils.bot_utils import (
     EngineStatus,
     get_readable_file_size,
+    get_readable_time,
     MirrorStatus,
 )
+from bot.helper.ext_utils.task_manager import queue_position
 
 
 class QueueStatus:
@@ -41,7 +43,10 @@ class QueueStatus:
         return "0B/s"
 
     def eta(self):
-        return "-"
+        position, eta = queue_position(self.__listener.uid)
+        if position is None:
+            return "-"
+        return f"{get_readable_time(eta) if eta else '-'} (#{position})"
 
     def download(self):
         return self
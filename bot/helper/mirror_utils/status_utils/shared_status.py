@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+from secrets import token_hex
+
+from bot import LOGGER, download_dict
+from bot.helper.ext_utils.bot_utils import (
+    EngineStatus,
+    get_readable_file_size,
+    MirrorStatus,
+)
+
+
+class SharedStatus:
+    """Status of a task waiting on an identical download started by another task."""
+
+    def __init__(self, flight, listener):
+        self.__flight = flight
+        self.__listener = listener
+        self.__gid = token_hex(5)
+        self.__name = None
+        self.__size = 0
+        self.upload_details = listener.upload_details
+        self.message = listener.message
+
+    def __source(self):
+        if self.__name is None and not isinstance(
+            source := download_dict.get(self.__flight.primary.uid), SharedStatus
+        ):
+            return source
+
+    def complete(self, name, size):
+        self.__name = name
+        self.__size = size
+
+    def gid(self):
+        return self.__gid
+
+    def name(self):
+        if (source := self.__source()) is not None:
+            return source.name()
+        return self.__name or ""
+
+    def size(self):
+        if (source := self.__source()) is not None:
+            return source.size()
+        return get_readable_file_size(self.__size)
+
+    def status(self):
+        if (source := self.__source()) is not None:
+            return source.status()
+        return MirrorStatus.STATUS_DOWNLOADING
+
+    def processed_bytes(self):
+        if (source := self.__source()) is not None:
+            return source.processed_bytes()
+        return get_readable_file_size(self.__size)
+
+    def progress(self):
+        if (source := self.__source()) is not None:
+            return source.progress()
+        return "100%"
+
+    def speed(self):
+        if (source := self.__source()) is not None:
+            return source.speed()
+        return "0B/s"
+
+    def eta(self):
+        if (source := self.__source()) is not None:
+            return source.eta()
+        return "-"
+
+    def download(self):
+        return self
+
+    async def cancel_download(self):
+        LOGGER.info(f"Cancelling Shared Download: {self.name()}")
+        await self.__listener.onDownloadError("Download stopped by user!")
+
+    def eng(self):
+        if (source := self.__source()) is not None:
+            return source.eng()
+        return EngineStatus().STATUS_SHARED
@@ -58,6 +58,8 @@ class ZipStatus:
         return MirrorStatus.STATUS_ARCHIVING
 
     def processed_raw(self):
+        if self.__listener.zip_stream is not None:
+            return self.__listener.zip_stream.processed
         if self.__listener.newDir:
             return async_to_sync(get_path_size, self.__listener.newDir)
         else:
@@ -27,11 +27,15 @@ from bot.helper.ext_utils.bot_utils import (
     fetch_user_tds,
 )
 from bot.helper.ext_utils.fs_utils import get_mime_type
-from bot.helper.ext_utils.leech_utils import format_filename
+from bot.helper.ext_utils.leech_utils import format_filename, get_md5_hash
 
 LOGGER = getLogger(__name__)
 getLogger("googleapiclient.discovery").setLevel(ERROR)
 
+DRIVE_INDEX_TTL = 600
+DRIVE_INDEX_PARENTS = 40
+drive_indexes = {}
+
 
 class GoogleDriveHelper:
 
@@ -68,6 +72,7 @@ class GoogleDriveHelper:
         self.__service = self.__authorize()
         self.__file_processed_bytes = 0
         self.__processed_bytes = 0
+        self.__drive_index = None
         self.name = name
 
     @property
@@ -215,6 +220,70 @@ class GoogleDriveHelper:
                 break
         return files
 
+    @retry(
+        wait=wait_exponential(multiplier=2, min=3, max=6),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type(Exception),
+    )
+    def __getFilesByParents(self, parent_ids):
+        parents = " or ".join(f"'{parent_id}' in parents" for parent_id in parent_ids)
+        page_token = None
+        files = []
+        while True:
+            response = (
+                self.__service.files()
+                .list(
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    q=f"({parents}) and trashed = false",
+                    spaces="drive",
+                    pageSize=1000,
+                    fields="nextPageToken, files(id, mimeType, md5Checksum, size)",
+                    pageToken=page_token,
+                )
+                .execute()
+            )
+            files.extend(response.get("files", []))
+            page_token = response.get("nextPageToken")
+            if page_token is None:
+                break
+        return files
+
+    def __get_drive_index(self, root_id):
+        index = drive_indexes.get(root_id)
+        if index is not None and time() - index[0] < DRIVE_INDEX_TTL:
+            return index[1]
+        files = {}
+        folders = [root_id]
+        while folders:
+            parent_ids = folders[:DRIVE_INDEX_PARENTS]
+            del folders[:DRIVE_INDEX_PARENTS]
+            for file in self.__getFilesByParents(parent_ids):
+                if file.get("mimeType") == self.__G_DRIVE_DIR_MIME_TYPE:
+                    folders.append(file["id"])
+                elif md5_hash := file.get("md5Checksum"):
+                    files[(md5_hash, int(file.get("size", 0)))] = file["id"]
+        drive_indexes[root_id] = (time(), files)
+        LOGGER.info(f"Indexed {len(files)} files of G-Drive ID: {root_id}")
+        return files
+
+    def __copy_duplicate(self, content_key, file_path, file_name, dest_id):
+        try:
+            drive_file = self.__copyFile(
+                self.__drive_index[content_key], dest_id, file_name
+            )
+        except Exception as err:
+            if isinstance(err, RetryError):
+                err = err.last_attempt.exception()
+            LOGGER.error(f"Unable to copy duplicate, uploading instead: {err}")
+            drive_file = None
+        if drive_file is None:
+            self.__drive_index.pop(content_key, None)
+            return None
+        LOGGER.info(f"Copied duplicate on G-Drive instead of uploading: {file_path}")
+        self.__processed_bytes += content_key[1]
+        return drive_file["id"]
+
     async def __progress(self):
         if self.__status is not None:
             chunk_size = (
@@ -305,6 +374,13 @@ class GoogleDriveHelper:
         item_path = f"{self.__path}/{file_name}"
         LOGGER.info(f"Uploading: {item_path}")
         self.__updater = setInterval(self.__update_interval, self.__progress)
+        if config_dict["GDRIVE_DEDUPE"]:
+            try:
+                self.__drive_index = self.__get_drive_index(gdrive_id)
+            except Exception as err:
+                if isinstance(err, RetryError):
+                    err = err.last_attempt.exception()
+                LOGGER.error(f"Unable to index G-Drive for dedupe: {err}")
         try:
             if ospath.isfile(item_path):
                 if item_path.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
@@ -417,6 +493,24 @@ class GoogleDriveHelper:
         retry=(retry_if_exception_type(Exception)),
     )
     def __upload_file(self, file_path, file_name, mime_type, dest_id, is_dir=True):
+        content_key = None
+        if self.__drive_index is not None and (size := ospath.getsize(file_path)):
+            content_key = (get_md5_hash(file_path), size)
+            if content_key in self.__drive_index and (
+                file_id := self.__copy_duplicate(
+                    content_key, file_path, file_name, dest_id
+                )
+            ):
+                if not self.__listener.seed or self.__listener.newDir:
+                    try:
+                        osremove(file_path)
+                    except Exception:
+                        pass
+                if not config_dict["IS_TEAM_DRIVE"]:
+                    self.__set_permission(file_id)
+                if not is_dir:
+                    return self.__G_DRIVE_BASE_DOWNLOAD_URL.format(file_id)
+                return
         file_name, _ = async_to_sync(
             format_filename, file_name, self.__user_id, isMirror=True
         )
@@ -498,6 +592,8 @@ class GoogleDriveHelper:
             except Exception:
                 pass
         self.__file_processed_bytes = 0
+        if content_key is not None:
+            self.__drive_index[content_key] = response["id"]
         # Insert new permissions
         if not config_dict["IS_TEAM_DRIVE"]:
             self.__set_permission(response["id"])
@@ -36,6 +36,7 @@ from bot import (
 )
 from bot.helper.themes import BotTheme
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.send_scheduler import send_scheduler, SendPriority
 from bot.helper.telegram_helper.message_utils import (
     sendCustomMsg,
     editReplyMarkup,
@@ -45,6 +46,7 @@ from bot.helper.telegram_helper.message_utils import (
     get_tg_link_content,
 )
 from bot.helper.ext_utils.fs_utils import clean_unwanted, is_archive, get_base_name
+from bot.helper.ext_utils.upload_cache import upload_cache
 from bot.helper.ext_utils.bot_utils import (
     get_readable_file_size,
     is_telegram_link,
@@ -60,6 +62,8 @@ from bot.helper.ext_utils.leech_utils import (
     get_ss,
     get_mediainfo_link,
     format_filename,
+    get_split_parts,
+    FilePart,
 )
 
 LOGGER = getLogger(__name__)
@@ -89,6 +93,7 @@ class TgUploader:
         self.__prm_media = False
         self.__client = bot
         self.__up_path = ""
+        self.__up_part = None
         self.__mediainfo = False
         self.__as_doc = False
         self.__media_group = False
@@ -310,12 +315,21 @@ class TgUploader:
 
     async def __prepare_file(self, prefile_, dirpath):
         try:
-            file_, cap_mono = await format_filename(prefile_, self.__user_id, dirpath)
+            file_, cap_mono = await format_filename(
+                prefile_, self.__user_id, dirpath, part=self.__up_part
+            )
         except Exception as err:
             LOGGER.info(format_exc())
             return await self.__listener.onUploadError(
                 f"Error in Format Filename : {err}"
             )
+        if self.__up_part is not None:
+            if len(file_) > 64:
+                name, ext = ospath.splitext(file_)
+                file_ = f"{name[:64 - len(ext)]}{ext}"
+            self.__up_part.name = file_
+            self.__up_path = ospath.join(dirpath, file_)
+            return cap_mono, file_
         if prefile_ != file_:
             if (
                 self.__listener.seed
@@ -427,94 +441,130 @@ class TgUploader:
             if not self.__is_cancelled:
                 LOGGER.error(f"Failed To Send in User Dump:\n{str(err)}")
 
+    def __get_parts(self, dirpath, files):
+        for file_ in files:
+            f_path = ospath.join(dirpath, file_)
+            if (split_size := self.__listener.virtual_splits.get(f_path)) is None:
+                yield file_, None, False
+                continue
+            parts = get_split_parts(ospath.getsize(f_path), split_size)
+            for i, (offset, length) in enumerate(parts, start=1):
+                part_name = f"{file_}.{i:03}"
+                yield part_name, FilePart(f_path, part_name, offset, length), i == len(
+                    parts
+                )
+
+    async def __iter_files(self):
+        if (stream := self.__listener.zip_stream) is not None:
+            async for path in stream.volumes():
+                dirpath, file_ = path.rsplit("/", 1)
+                yield dirpath, file_, None, False
+            return
+        for dirpath, _, files in sorted(await sync_to_async(walk, self.__path)):
+            if dirpath.endswith("/yt-dlp-thumb"):
+                continue
+            for file_, part, last_part in self.__get_parts(dirpath, natsorted(files)):
+                yield dirpath, file_, part, last_part
+
     async def upload(self, o_files, m_size, size):
         await self.__user_settings()
         res = await self.__msg_to_reply()
         if not res:
             return
         isDeleted = False
-        for dirpath, _, files in sorted(await sync_to_async(walk, self.__path)):
-            if dirpath.endswith("/yt-dlp-thumb"):
+        async for dirpath, file_, part, last_part in self.__iter_files():
+            self.__up_path = ospath.join(dirpath, file_)
+            self.__up_part = part
+            if part is None and file_.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
+                await aioremove(self.__up_path)
                 continue
-            for file_ in natsorted(files):
-                self.__up_path = ospath.join(dirpath, file_)
-                if file_.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
-                    await aioremove(self.__up_path)
+            try:
+                f_size = (
+                    part.length
+                    if part is not None
+                    else await aiopath.getsize(self.__up_path)
+                )
+                if self.__listener.seed and file_ in o_files and f_size in m_size:
                     continue
-                try:
-                    f_size = await aiopath.getsize(self.__up_path)
-                    if self.__listener.seed and file_ in o_files and f_size in m_size:
-                        continue
-                    self.__total_files += 1
-                    if f_size == 0:
-                        LOGGER.error(
-                            f"{self.__up_path} size is zero, telegram don't upload zero size files"
-                        )
-                        self.__corrupted += 1
-                        continue
-                    if self.__is_cancelled:
-                        return
-                    self.__prm_media = True if f_size > 2097152000 else False
-                    cap_mono, file_ = await self.__prepare_file(file_, dirpath)
-                    if self.__last_msg_in_group:
-                        group_lists = [
-                            x for v in self.__media_dict.values() for x in v.keys()
-                        ]
-                        if (
-                            match := re_match(
-                                r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+)", self.__up_path
-                            )
-                        ) and match.group(0) not in group_lists:
-                            for key, value in list(self.__media_dict.items()):
-                                for subkey, msgs in list(value.items()):
-                                    if len(msgs) > 1:
-                                        await self.__send_media_group(subkey, key, msgs)
-                    self.__last_msg_in_group = False
-                    self.__last_uploaded = 0
-                    await self.__switching_client()
-                    await self.__upload_file(cap_mono, file_)
-                    if (
-                        self.__leechmsg
-                        and not isDeleted
-                        and config_dict["CLEAN_LOG_MSG"]
-                    ):
-                        await deleteMessage(list(self.__leechmsg.values())[0])
-                        isDeleted = True
-                    if self.__is_cancelled:
-                        return
-                    if not self.__is_corrupted and (
-                        self.__listener.isSuperGroup or config_dict["LEECH_LOG_ID"]
-                    ):
-                        self.__msgs_dict[self.__sent_msg.link] = file_
-                    await sleep(1)
-                except Exception as err:
-                    if isinstance(err, RetryError):
-                        LOGGER.info(
-                            f"Total Attempts: {err.last_attempt.attempt_number}"
-                        )
-                    else:
-                        LOGGER.error(f"{format_exc()}. Path: {self.__up_path}")
-                    if self.__is_cancelled:
-                        return
+                self.__total_files += 1
+                if f_size == 0:
+                    LOGGER.error(
+                        f"{self.__up_path} size is zero, telegram don't upload zero size files"
+                    )
+                    self.__corrupted += 1
                     continue
-                finally:
+                if self.__is_cancelled:
+                    return
+                self.__prm_media = True if f_size > 2097152000 else False
+                cap_mono, file_ = await self.__prepare_file(file_, dirpath)
+                if self.__last_msg_in_group:
+                    group_lists = [
+                        x for v in self.__media_dict.values() for x in v.keys()
+                    ]
                     if (
-                        not self.__is_cancelled
-                        and await aiopath.exists(self.__up_path)
-                        and (
-                            not self.__listener.seed
-                            or self.__listener.newDir
-                            or dirpath.endswith("/splited_files_mltb")
-                            or "/copied_mltb/" in self.__up_path
+                        match := re_match(
+                            r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+)", self.__up_path
                         )
+                    ) and match.group(0) not in group_lists:
+                        for key, value in list(self.__media_dict.items()):
+                            for subkey, msgs in list(value.items()):
+                                if len(msgs) > 1:
+                                    await self.__send_media_group(subkey, key, msgs)
+                self.__last_msg_in_group = False
+                self.__last_uploaded = 0
+                await self.__switching_client()
+                await self.__upload_file(cap_mono, file_)
+                if self.__leechmsg and not isDeleted and config_dict["CLEAN_LOG_MSG"]:
+                    await deleteMessage(list(self.__leechmsg.values())[0])
+                    isDeleted = True
+                if self.__is_cancelled:
+                    return
+                if not self.__is_corrupted and (
+                    self.__listener.isSuperGroup or config_dict["LEECH_LOG_ID"]
+                ):
+                    self.__msgs_dict[self.__sent_msg.link] = file_
+                await sleep(1)
+            except Exception as err:
+                if isinstance(err, RetryError):
+                    LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
+                else:
+                    LOGGER.error(f"{format_exc()}. Path: {self.__up_path}")
+                if self.__is_cancelled:
+                    return
+                continue
+            finally:
+                if part is not None:
+                    part.close()
+                    self.__up_part = None
+                    if (
+                        last_part
+                        and not self.__is_cancelled
+                        and (not self.__listener.seed or self.__listener.newDir)
                     ):
-                        await aioremove(self.__up_path)
+                        await aioremove(part.path)
+                elif (
+                    not self.__is_cancelled
+                    and await aiopath.exists(self.__up_path)
+                    and (
+                        not self.__listener.seed
+                        or self.__listener.newDir
+                        or dirpath.endswith("/splited_files_mltb")
+                        or "/copied_mltb/" in self.__up_path
+                    )
+                ):
+                    await aioremove(self.__up_path)
         for key, value in list(self.__media_dict.items()):
             for subkey, msgs in list(value.items()):
                 if len(msgs) > 1:
                     await self.__send_media_group(subkey, key, msgs)
         if self.__is_cancelled:
             return
+        if (
+            self.__listener.zip_stream is not None
+            and self.__listener.zip_stream.returncode
+        ):
+            await self.__listener.onUploadError("Unable to archive files. Check logs!")
+            return
         if self.__listener.seed and not self.__listener.newDir:
             await clean_unwanted(self.__path)
         if self.__total_files == 0:
@@ -542,6 +592,47 @@ class TgUploader:
             self.name,
         )
 
+    async def __send_cached(self, cache_key, client, cap_mono, is_video):
+        if not (file_id := await upload_cache.get(cache_key, client)):
+            return False
+        if self.__is_cancelled:
+            return False
+        buttons = await self.__buttons(
+            self.__up_part.path if self.__up_part else self.__up_path, is_video
+        )
+        try:
+            nrml_media = await self.__client.send_cached_media(
+                chat_id=self.__sent_msg.chat.id,
+                file_id=file_id,
+                caption=cap_mono,
+                reply_to_message_id=self.__sent_msg.id,
+                disable_notification=True,
+                reply_markup=buttons,
+            )
+        except FloodWait:
+            raise
+        except RPCError as e:
+            LOGGER.warning(f"Cached upload failed: {e}. Path: {self.__up_path}")
+            await upload_cache.forget(cache_key)
+            return False
+        LOGGER.info(f"Sent from Upload Cache: {self.__up_path}")
+        if self.__prm_media and (self.__has_buttons or not self.__leechmsg):
+            try:
+                self.__sent_msg = await bot.copy_message(
+                    nrml_media.chat.id,
+                    nrml_media.chat.id,
+                    nrml_media.id,
+                    reply_to_message_id=self.__sent_msg.id,
+                    reply_markup=buttons,
+                )
+                if self.__sent_msg:
+                    await deleteMessage(nrml_media)
+            except Exception:
+                self.__sent_msg = nrml_media
+        else:
+            self.__sent_msg = nrml_media
+        return True
+
     @retry(
         wait=wait_exponential(multiplier=2, min=4, max=8),
         stop=stop_after_attempt(3),
@@ -553,7 +644,10 @@ class TgUploader:
         thumb = self.__thumb
         self.__is_corrupted = False
         try:
-            is_video, is_audio, is_image = await get_document_type(self.__up_path)
+            if self.__up_part is not None:
+                is_video, is_audio, is_image = False, False, False
+            else:
+                is_video, is_audio, is_image = await get_document_type(self.__up_path)
 
             if self.__leech_utils["thumb"]:
                 thumb = await self.get_custom_thumb(self.__leech_utils["thumb"])
@@ -566,21 +660,42 @@ class TgUploader:
                 elif is_audio and not is_video:
                     thumb = await get_audio_thumb(self.__up_path)
 
-            if (
-                self.__as_doc
+            mode = (
+                "documents"
+                if self.__as_doc
                 or force_document
                 or (not is_video and not is_audio and not is_image)
+                else "videos" if is_video else "audios" if is_audio else "photos"
+            )
+            f_size = (
+                self.__up_part.length
+                if self.__up_part is not None
+                else await aiopath.getsize(self.__up_path)
+            )
+            cache_key = await upload_cache.get_key(
+                self.__up_path, f_size, mode, thumb, self.__up_part
+            )
+            client = "bot" if self.__client is bot else "user"
+            await send_scheduler.acquire(self.__sent_msg.chat.id, SendPriority.UPLOAD)
+            if cached := await self.__send_cached(
+                cache_key, client, cap_mono, is_video
             ):
+                key = mode
+                self.__processed_bytes += f_size
+            elif mode == "documents":
                 key = "documents"
                 if is_video and thumb is None:
                     thumb = await take_ss(self.__up_path, None)
                 if self.__is_cancelled:
                     return
-                buttons = await self.__buttons(self.__up_path, is_video)
+                buttons = await self.__buttons(
+                    self.__up_part.path if self.__up_part else self.__up_path,
+                    is_video,
+                )
                 nrml_media = await self.__client.send_document(
                     chat_id=self.__sent_msg.chat.id,
                     reply_to_message_id=self.__sent_msg.id,
-                    document=self.__up_path,
+                    document=self.__up_part or self.__up_path,
                     thumb=thumb,
                     caption=cap_mono,
                     force_document=True,
@@ -604,7 +719,7 @@ class TgUploader:
                         self.__sent_msg = nrml_media
                 else:
                     self.__sent_msg = nrml_media
-            elif is_video:
+            elif mode == "videos":
                 key = "videos"
                 duration = (await get_media_info(self.__up_path))[0]
                 if thumb is None:
@@ -664,7 +779,7 @@ class TgUploader:
                         self.__sent_msg = nrml_media
                 else:
                     self.__sent_msg = nrml_media
-            elif is_audio:
+            elif mode == "audios":
                 key = "audios"
                 duration, artist, title = await get_media_info(self.__up_path)
                 if self.__is_cancelled:
@@ -696,6 +811,18 @@ class TgUploader:
                     reply_markup=await self.__buttons(self.__up_path),
                 )
 
+            if not cached and not self.__is_cancelled:
+                uploaded = (
+                    nrml_media if key in ("documents", "videos") else self.__sent_msg
+                )
+                if media := (
+                    uploaded.document
+                    or uploaded.video
+                    or uploaded.audio
+                    or uploaded.photo
+                ):
+                    upload_cache.put(cache_key, media.file_id, client)
+
             if (
                 not self.__is_cancelled
                 and self.__media_group
@@ -733,6 +860,7 @@ class TgUploader:
             self.__retry_error = False
         except FloodWait as f:
             LOGGER.warning(str(f))
+            send_scheduler.block(self.__sent_msg.chat.id, f.value)
             await sleep(f.value)
         except Exception as err:
             self.__retry_error = True
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from traceback import format_exc
-from asyncio import sleep
+from functools import partial
+from asyncio import sleep, gather
 from aiofiles.os import remove as aioremove
 from random import choice as rchoice
 from time import time
@@ -12,7 +13,6 @@ from pyrogram.enums import ParseMode
 from pyrogram.types import InputMediaPhoto
 from pyrogram.errors import (
     ReplyMarkupInvalid,
-    FloodWait,
     PeerIdInvalid,
     ChannelInvalid,
     RPCError,
@@ -39,7 +39,8 @@ from bot import (
     download_dict_lock,
 )
 from bot.helper.ext_utils.bot_utils import (
-    get_readable_message,
+    get_status_view,
+    get_status_views,
     setInterval,
     sync_to_async,
     download_image_url,
@@ -48,8 +49,13 @@ from bot.helper.ext_utils.bot_utils import (
     new_thread,
 )
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.send_scheduler import send_scheduler, SendPriority
 from bot.helper.ext_utils.exceptions import TgLinkException
 
+status_update_time = [0]
+TG_MESSAGES_BATCH = 200
+TG_RANGE_LIMIT = 1000
+
 
 async def sendMessage(message, text, buttons=None, photo=None, **kwargs):
     try:
@@ -57,7 +63,10 @@ async def sendMessage(message, text, buttons=None, photo=None, **kwargs):
             try:
                 if photo == "IMAGES":
                     photo = rchoice(config_dict["IMAGES"])
-                return await message.reply_photo(
+                return await send_scheduler.run(
+                    message.chat.id,
+                    SendPriority.REPLY,
+                    message.reply_photo,
                     photo=photo,
                     reply_to_message_id=message.id,
                     caption=text,
@@ -74,7 +83,10 @@ async def sendMessage(message, text, buttons=None, photo=None, **kwargs):
                 return
             except Exception as e:
                 LOGGER.error(format_exc())
-        return await message.reply(
+        return await send_scheduler.run(
+            message.chat.id,
+            SendPriority.REPLY,
+            message.reply,
             text=text,
             quote=True,
             disable_web_page_preview=True,
@@ -89,10 +101,6 @@ async def sendMessage(message, text, buttons=None, photo=None, **kwargs):
             ),
             **kwargs,
         )
-    except FloodWait as f:
-        LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
-        return await sendMessage(message, text, buttons, photo)
     except ReplyMarkupInvalid:
         return await sendMessage(message, text, None, photo)
     except MessageEmpty:
@@ -108,7 +116,10 @@ async def sendCustomMsg(chat_id, text, buttons=None, photo=None, debug=False):
             try:
                 if photo == "IMAGES":
                     photo = rchoice(config_dict["IMAGES"])
-                return await bot.send_photo(
+                return await send_scheduler.run(
+                    chat_id,
+                    SendPriority.UPLOAD,
+                    bot.send_photo,
                     chat_id=chat_id,
                     photo=photo,
                     caption=text,
@@ -124,17 +135,16 @@ async def sendCustomMsg(chat_id, text, buttons=None, photo=None, debug=False):
                 return
             except Exception as e:
                 LOGGER.error(format_exc())
-        return await bot.send_message(
+        return await send_scheduler.run(
+            chat_id,
+            SendPriority.UPLOAD,
+            bot.send_message,
             chat_id=chat_id,
             text=text,
             disable_web_page_preview=True,
             disable_notification=True,
             reply_markup=buttons,
         )
-    except FloodWait as f:
-        LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
-        return await sendCustomMsg(chat_id, text, buttons, photo)
     except ReplyMarkupInvalid:
         return await sendCustomMsg(chat_id, text, None, photo)
     except Exception as e:
@@ -168,7 +178,10 @@ async def sendMultiMessage(chat_ids, text, buttons=None, photo=None):
                 try:
                     if photo == "IMAGES":
                         photo = rchoice(config_dict["IMAGES"])
-                    sent = await bot.send_photo(
+                    sent = await send_scheduler.run(
+                        chat.id,
+                        SendPriority.UPLOAD,
+                        bot.send_photo,
                         chat_id=chat.id,
                         photo=photo,
                         caption=text,
@@ -187,8 +200,10 @@ async def sendMultiMessage(chat_ids, text, buttons=None, photo=None):
                 except Exception as e:
                     LOGGER.error(str(e))
                 continue
-            LOGGER.info("DEBUG CP 2")
-            sent = await bot.send_message(
+            sent = await send_scheduler.run(
+                chat.id,
+                SendPriority.UPLOAD,
+                bot.send_message,
                 chat_id=chat.id,
                 text=text,
                 disable_web_page_preview=True,
@@ -197,35 +212,42 @@ async def sendMultiMessage(chat_ids, text, buttons=None, photo=None):
                 reply_markup=buttons,
             )
             msg_dict[f"{chat.id}:{topic_id}"] = sent
-        except FloodWait as f:
-            LOGGER.warning(str(f))
-            await sleep(f.value * 1.2)
-            return await sendMultiMessage(chat_ids, text, buttons, photo)
         except Exception as e:
             LOGGER.error(str(e))
     return msg_dict
 
 
-async def editMessage(message, text, buttons=None, photo=None):
+async def editMessage(
+    message, text, buttons=None, photo=None, priority=SendPriority.REPLY
+):
+    schedule = partial(
+        send_scheduler.run,
+        message.chat.id,
+        priority,
+        key=(message.chat.id, message.id),
+    )
     try:
         if message.media:
             if photo:
                 photo = rchoice(config_dict["IMAGES"]) if photo == "IMAGES" else photo
-                return await message.edit_media(
-                    InputMediaPhoto(photo, text), reply_markup=buttons
+                return await schedule(
+                    message.edit_media,
+                    InputMediaPhoto(photo, text),
+                    reply_markup=buttons,
                 )
-            return await message.edit_caption(caption=text, reply_markup=buttons)
-        await message.edit(
-            text=text, disable_web_page_preview=True, reply_markup=buttons
+            return await schedule(
+                message.edit_caption, caption=text, reply_markup=buttons
+            )
+        await schedule(
+            message.edit,
+            text=text,
+            disable_web_page_preview=True,
+            reply_markup=buttons,
         )
-    except FloodWait as f:
-        LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
-        return await editMessage(message, text, buttons, photo)
     except (MessageNotModified, MessageEmpty):
         pass
     except ReplyMarkupInvalid:
-        return await editMessage(message, text, None, photo)
+        return await editMessage(message, text, None, photo, priority)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
@@ -243,17 +265,16 @@ async def editReplyMarkup(message, reply_markup):
 
 async def sendFile(message, file, caption=None, buttons=None):
     try:
-        return await message.reply_document(
+        return await send_scheduler.run(
+            message.chat.id,
+            SendPriority.REPLY,
+            message.reply_document,
             document=file,
             quote=True,
             caption=caption,
             disable_notification=True,
             reply_markup=buttons,
         )
-    except FloodWait as f:
-        LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
-        return await sendFile(message, file, caption)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
@@ -261,24 +282,15 @@ async def sendFile(message, file, caption=None, buttons=None):
 
 async def sendRss(text):
     try:
-        if user:
-            return await user.send_message(
-                chat_id=config_dict["RSS_CHAT"],
-                text=text,
-                disable_web_page_preview=True,
-                disable_notification=True,
-            )
-        else:
-            return await bot.send_message(
-                chat_id=config_dict["RSS_CHAT"],
-                text=text,
-                disable_web_page_preview=True,
-                disable_notification=True,
-            )
-    except FloodWait as f:
-        LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
-        return await sendRss(text)
+        return await send_scheduler.run(
+            config_dict["RSS_CHAT"],
+            SendPriority.BULK,
+            (user or bot).send_message,
+            chat_id=config_dict["RSS_CHAT"],
+            text=text,
+            disable_web_page_preview=True,
+            disable_notification=True,
+        )
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
@@ -317,6 +329,28 @@ async def delete_all_messages():
                 LOGGER.error(str(e))
 
 
+async def get_messages(client, chat_id, message_ids):
+    """get_messages for a single id, or for a range in batches of TG_MESSAGES_BATCH.
+
+    Only the messages that exist are returned for a range, so an empty list means
+    none of them were accessible.
+    """
+    if not isinstance(message_ids, range):
+        return await client.get_messages(chat_id=chat_id, message_ids=message_ids)
+    messages = []
+    for start in range(0, len(message_ids), TG_MESSAGES_BATCH):
+        batch = await client.get_messages(
+            chat_id=chat_id,
+            message_ids=list(message_ids[start : start + TG_MESSAGES_BATCH]),
+        )
+        messages.extend(msg for msg in batch if not msg.empty)
+    return messages
+
+
+def is_empty(message):
+    return not message if isinstance(message, list) else message.empty
+
+
 async def get_tg_link_content(link, user_id, decrypter=None):
     message = None
     user_sess = user_data.get(user_id, {}).get("usess", "")
@@ -330,13 +364,14 @@ async def get_tg_link_content(link, user_id, decrypter=None):
     ):
         private = False
         msg = re_match(
-            r"https:\/\/(t\.me|telegram\.me|telegram\.dog|telegram\.space)\/(?:c\/)?([^\/]+)(?:\/[^\/]+)?\/([0-9]+)",
+            r"https:\/\/(t\.me|telegram\.me|telegram\.dog|telegram\.space)\/(?:c\/)?([^\/]+)(?:\/[^\/]+)?\/([0-9]+)(?:-([0-9]+))?",
             link,
         )
     else:
         private = True
         msg = re_match(
-            r"tg:\/\/(openmessage)\?user_id=([0-9]+)&message_id=([0-9]+)", link
+            r"tg:\/\/(openmessage)\?user_id=([0-9]+)&message_id=([0-9]+)(?:-([0-9]+))?",
+            link,
         )
         if not (user or user_sess):
             raise TgLinkException(
@@ -345,13 +380,19 @@ async def get_tg_link_content(link, user_id, decrypter=None):
 
     chat = msg.group(2)
     msg_id = int(msg.group(3))
+    if msg.group(4):
+        msg_id = range(msg_id, max(int(msg.group(4)), msg_id) + 1)
+        if len(msg_id) > TG_RANGE_LIMIT:
+            raise TgLinkException(
+                f"Message range is limited to {TG_RANGE_LIMIT} messages per task!"
+            )
     if chat.isdigit():
         chat = int(chat) if private else int(f"-100{chat}")
 
     if not private:
         try:
-            message = await bot.get_messages(chat_id=chat, message_ids=msg_id)
-            if message.empty:
+            message = await get_messages(bot, chat, msg_id)
+            if is_empty(message):
                 private = True
         except Exception as e:
             private = True
@@ -360,8 +401,8 @@ async def get_tg_link_content(link, user_id, decrypter=None):
 
     if private and user:
         try:
-            user_message = await user.get_messages(chat_id=chat, message_ids=msg_id)
-            if not user_message.empty:
+            user_message = await get_messages(user, chat, msg_id)
+            if not is_empty(user_message):
                 return user_message, "user"
         except Exception as e:
             if not user_sess:
@@ -379,16 +420,14 @@ async def get_tg_link_content(link, user_id, decrypter=None):
                 in_memory=True,
                 no_updates=True,
             ) as usession:
-                user_message = await usession.get_messages(
-                    chat_id=chat, message_ids=msg_id
-                )
+                user_message = await get_messages(usession, chat, msg_id)
         except InvalidToken:
             raise TgLinkException("Provided Decryption Key is Invalid, Recheck & Retry")
         except Exception as e:
             raise TgLinkException(
                 f"User Session don't have access to this chat!. ERROR: {e}"
             ) from e
-        if not user_message.empty:
+        if not is_empty(user_message):
             return user_message, "user_sess"
         else:
             raise TgLinkException("Privatly Deleted or Not Accessible!")
@@ -400,40 +439,59 @@ async def get_tg_link_content(link, user_id, decrypter=None):
         )
 
 
+async def update_status_message(chat_id, data, view, force=False):
+    page, msg, buttons = view
+    if msg is None or (not force and data[3] == page):
+        return
+    rmsg = await editMessage(data[0], msg, buttons, "IMAGES", SendPriority.STATUS)
+    if isinstance(rmsg, str) and rmsg.startswith("Telegram says: [400"):
+        async with status_reply_dict_lock:
+            if status_reply_dict.get(chat_id) is data:
+                del status_reply_dict[chat_id]
+        return
+    data[0].text = msg
+    data[1] = time()
+    data[3] = page
+
+
 async def update_all_messages(force=False):
     async with status_reply_dict_lock:
         if (
             not status_reply_dict
             or not Interval
-            or (not force and time() - list(status_reply_dict.values())[0][1] < 3)
+            or (not force and time() - status_update_time[0] < 3)
         ):
             return
-        for chat_id in list(status_reply_dict.keys()):
-            status_reply_dict[chat_id][1] = time()
+        status_update_time[0] = time()
+        targets = [
+            (chat_id, data) for chat_id, data in status_reply_dict.items() if data
+        ]
     async with download_dict_lock:
-        msg, buttons = await sync_to_async(get_readable_message)
-    if msg is None:
-        return
-    async with status_reply_dict_lock:
-        for chat_id in list(status_reply_dict.keys()):
-            if status_reply_dict[chat_id] and msg != status_reply_dict[chat_id][0].text:
-                rmsg = await editMessage(
-                    status_reply_dict[chat_id][0], msg, buttons, "IMAGES"
-                )
-                if isinstance(rmsg, str) and rmsg.startswith("Telegram says: [400"):
-                    del status_reply_dict[chat_id]
-                    continue
-                status_reply_dict[chat_id][0].text = msg
-                status_reply_dict[chat_id][1] = time()
+        views = await sync_to_async(
+            get_status_views,
+            {chat_id if data[2] else None for chat_id, data in targets},
+        )
+    await gather(
+        *(
+            update_status_message(
+                chat_id, data, views[chat_id if data[2] else None], force
+            )
+            for chat_id, data in targets
+        )
+    )
 
 
-async def sendStatusMessage(msg):
+async def sendStatusMessage(msg, chat_only=None):
+    chat_id = msg.chat.id
+    if chat_only is None:
+        chat_only = bool((data := status_reply_dict.get(chat_id)) and data[2])
     async with download_dict_lock:
-        progress, buttons = await sync_to_async(get_readable_message)
+        page, progress, buttons = await sync_to_async(
+            get_status_view, chat_id if chat_only else None
+        )
     if progress is None:
         return
     async with status_reply_dict_lock:
-        chat_id = msg.chat.id
         if chat_id in list(status_reply_dict.keys()):
             message = status_reply_dict[chat_id][0]
             await deleteMessage(message)
@@ -443,7 +501,7 @@ async def sendStatusMessage(msg):
                 message.caption = progress
             else:
                 message.text = progress
-        status_reply_dict[chat_id] = [message, time()]
+        status_reply_dict[chat_id] = [message, time(), chat_only, page]
         if not Interval:
             Interval.append(
                 setInterval(config_dict["STATUS_UPDATE_INTERVAL"], update_all_messages)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+from asyncio import Event, wait_for, TimeoutError as AsyncTimeoutError
+from collections import deque
+from functools import partial
+from time import monotonic
+
+from pyrogram.errors import FloodWait
+
+from bot import LOGGER, bot_loop
+
+GLOBAL_RATE = 25
+GLOBAL_BURST = 30
+PRIVATE_RATE = 1
+PRIVATE_BURST = 3
+GROUP_RATE = 20 / 60
+GROUP_BURST = 5
+FLOOD_FACTOR = 1.2
+IDLE_BUCKETS = 600
+
+
+class SendPriority:
+    REPLY = 0
+    UPLOAD = 1
+    STATUS = 2
+    BULK = 3
+    NAMES = ("reply", "upload", "status", "bulk")
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp", "blocked")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = monotonic()
+        self.blocked = 0
+
+    def delay(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if now < self.blocked:
+            return self.blocked - now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, seconds):
+        self.blocked = max(self.blocked, monotonic() + seconds)
+
+
+class _Job:
+    __slots__ = ("chat_id", "priority", "call", "key", "futures")
+
+    def __init__(self, chat_id, priority, call, key):
+        self.chat_id = chat_id
+        self.priority = priority
+        self.call = call
+        self.key = key
+        self.futures = [bot_loop.create_future()]
+
+
+async def _noop():
+    return None
+
+
+class SendScheduler:
+    """Orders outgoing Telegram requests by priority within per-chat and global rate limits.
+
+    Jobs sharing a key (edits of one message) are coalesced while queued, so only
+    the latest edit is sent and every caller receives its result.
+    """
+
+    def __init__(self):
+        self.__queues = tuple(deque() for _ in SendPriority.NAMES)
+        self.__pending = {}
+        self.__buckets = {}
+        self.__global = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self.__wakeup = Event()
+        self.__dispatcher = None
+        self.__running = 0
+        self.__sent = 0
+        self.__coalesced = 0
+        self.__flood_waits = 0
+
+    def __bucket(self, chat_id):
+        if (bucket := self.__buckets.get(chat_id)) is None:
+            if isinstance(chat_id, int) and chat_id > 0:
+                bucket = TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+            else:
+                bucket = TokenBucket(GROUP_RATE, GROUP_BURST)
+            self.__buckets[chat_id] = bucket
+        return bucket
+
+    def __wake(self):
+        self.__wakeup.set()
+        if self.__dispatcher is None or self.__dispatcher.done():
+            self.__dispatcher = bot_loop.create_task(self.__dispatch())
+
+    def __enqueue(self, job, front=False):
+        if job.key is not None:
+            if (queued := self.__pending.get(job.key)) is not None:
+                queued.futures.extend(job.futures)
+                self.__coalesced += 1
+                return
+            self.__pending[job.key] = job
+        if front:
+            self.__queues[job.priority].appendleft(job)
+        else:
+            self.__queues[job.priority].append(job)
+        self.__wake()
+
+    async def run(self, chat_id, priority, func, *args, key=None, **kwargs):
+        call = partial(func, *args, **kwargs)
+        if key is not None and (job := self.__pending.get(key)) is not None:
+            job.call = call
+            future = bot_loop.create_future()
+            job.futures.append(future)
+            self.__coalesced += 1
+            return await future
+        job = _Job(chat_id, priority, call, key)
+        self.__enqueue(job)
+        return await job.futures[0]
+
+    async def acquire(self, chat_id, priority):
+        await self.run(chat_id, priority, _noop)
+
+    def block(self, chat_id, seconds):
+        self.__flood_waits += 1
+        self.__bucket(chat_id).block(seconds * FLOOD_FACTOR)
+
+    def __next_job(self, now):
+        wait = None
+        for queue in self.__queues:
+            for job in queue:
+                if (delay := self.__bucket(job.chat_id).delay(now)) == 0:
+                    queue.remove(job)
+                    return job, None
+                wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    async def __sleep(self, seconds):
+        self.__wakeup.clear()
+        try:
+            await wait_for(self.__wakeup.wait(), seconds)
+        except AsyncTimeoutError:
+            pass
+
+    async def __dispatch(self):
+        while any(self.__queues):
+            now = monotonic()
+            if delay := self.__global.delay(now):
+                await self.__sleep(delay)
+                continue
+            job, wait = self.__next_job(now)
+            if job is None:
+                await self.__sleep(wait)
+                continue
+            if job.key is not None:
+                self.__pending.pop(job.key, None)
+            self.__global.take()
+            self.__bucket(job.chat_id).take()
+            self.__running += 1
+            bot_loop.create_task(self.__execute(job))
+        if len(self.__buckets) > IDLE_BUCKETS:
+            now = monotonic()
+            for chat_id, bucket in list(self.__buckets.items()):
+                if bucket.blocked < now and bucket.delay(now) == 0:
+                    del self.__buckets[chat_id]
+
+    async def __execute(self, job):
+        try:
+            result = await job.call()
+        except FloodWait as f:
+            LOGGER.warning(f"{f} - Chat: {job.chat_id}")
+            self.block(job.chat_id, f.value)
+            self.__enqueue(job, True)
+            return
+        except Exception as e:
+            for future in job.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.__running -= 1
+        self.__sent += 1
+        for future in job.futures:
+            if not future.done():
+                future.set_result(result)
+
+    @property
+    def metrics(self):
+        now = monotonic()
+        return {
+            "queued": {
+                name: len(queue)
+                for name, queue in zip(SendPriority.NAMES, self.__queues)
+            },
+            "running": self.__running,
+            "sent": self.__sent,
+            "coalesced": self.__coalesced,
+            "flood_waits": self.__flood_waits,
+            "blocked_chats": sum(
+                bucket.blocked > now for bucket in self.__buckets.values()
+            ),
+        }
+
+
+send_scheduler = SendScheduler()
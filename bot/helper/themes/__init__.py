@@ -2,6 +2,7 @@
 from os import listdir
 from importlib import import_module
 from random import choice as rchoice
+from string import Formatter
 from bot import config_dict, LOGGER
 from bot.helper.themes import wzml_minimal
 
@@ -11,22 +12,60 @@ for theme in listdir("bot/helper/themes"):
         AVL_THEMES[theme[5:-3]] = import_module(f"bot.helper.themes.{theme[:-3]}")
 
 
-def BotTheme(var_name, **format_vars):
-    text = None
-    theme_ = config_dict["BOT_THEME"]
+class ThemeTemplate:
+    __slots__ = ("text", "fields")
+
+    def __init__(self, text):
+        self.fields = tuple(
+            field for _, field, _, _ in Formatter().parse(text) if field is not None
+        )
+        self.text = text if self.fields else text.format_map({})
+
+    def render(self, format_vars):
+        return self.text.format_map(format_vars) if self.fields else self.text
 
-    if theme_ in AVL_THEMES:
-        text = getattr(AVL_THEMES[theme_].WZMLStyle(), var_name, None)
-        if text is None:
+
+def compile_theme(module):
+    return {
+        var_name: ThemeTemplate(text)
+        for var_name, text in vars(module.WZMLStyle).items()
+        if not var_name.startswith("__") and isinstance(text, str)
+    }
+
+
+def load_theme(theme_):
+    table = compile_theme(wzml_minimal)
+    if theme_ in AVL_THEMES and theme_ != "minimal":
+        overrides = compile_theme(AVL_THEMES[theme_])
+        if missing := table.keys() - overrides.keys():
             LOGGER.error(
-                f"{var_name} not Found in {theme_}. Please recheck with Official Repo"
+                f"{', '.join(sorted(missing))} not Found in {theme_}. Please recheck with Official Repo"
             )
-    elif theme_ == "random":
-        rantheme = rchoice(list(AVL_THEMES.values()))
-        LOGGER.info(f"Random Theme Chosen: {rantheme}")
-        text = getattr(rantheme.WZMLStyle(), var_name, None)
+        table.update(overrides)
+    return table
+
+
+THEME_TABLES = {theme_: load_theme(theme_) for theme_ in AVL_THEMES}
+ACTIVE_THEME = [None, THEME_TABLES["minimal"]]
+
+
+def get_theme_table():
+    theme_ = config_dict["BOT_THEME"]
+    if theme_ == "random":
+        return rchoice(list(THEME_TABLES.values()))
+    if theme_ != ACTIVE_THEME[0]:
+        ACTIVE_THEME[:] = theme_, THEME_TABLES.get(theme_, THEME_TABLES["minimal"])
+        LOGGER.info(f"Bot Theme Loaded: {theme_}")
+    return ACTIVE_THEME[1]
+
+
+def BotTheme(var_name, **format_vars):
+    return get_theme_table()[var_name].render(format_vars)
 
-    if text is None:
-        text = getattr(wzml_minimal.WZMLStyle(), var_name)
 
-    return text.format_map(format_vars)
+def BotThemes(*parts):
+    """Render several (var_name, format_vars) parts with a single theme lookup."""
+    table = get_theme_table()
+    return "".join(
+        table[var_name].render(format_vars) for var_name, format_vars in parts
+    )
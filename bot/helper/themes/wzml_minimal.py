@@ -178,6 +178,7 @@ class WZMLStyle:
     # def get_readable_message(): ---> bot_utilis.py
     ####--------OVERALL MSG HEADER----------
     STATUS_NAME = "<b><i>{Name}</i></b>"
+    BATCH = "\n┠ <b>Batch:</b> {Batch}"
 
     #####---------PROGRESSIVE STATUS-------
     BAR = "\n┃ {Bar}"
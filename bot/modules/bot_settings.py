@@ -50,6 +50,8 @@ from bot.helper.ext_utils.bot_utils import setInterval, sync_to_async, new_threa
 from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.ext_utils.task_manager import start_from_queued
 from bot.helper.ext_utils.help_messages import default_desp
+from bot.helper.mirror_utils.rclone_utils.list import rclone_list_cache
+from bot.helper.mirror_utils.rclone_utils.rcd import rclone_daemons
 from bot.helper.mirror_utils.rclone_utils.serve import rclone_serve_booter
 from bot.modules.torrent_search import initiate_search_tools
 from bot.modules.rss import addJob
@@ -79,6 +81,7 @@ bool_vars = [
     "AS_DOCUMENT",
     "BOT_PM",
     "STOP_DUPLICATE",
+    "GDRIVE_DEDUPE",
     "SET_COMMANDS",
     "SAVE_MSG",
     "SHOW_MEDIAINFO",
@@ -94,6 +97,7 @@ bool_vars = [
     "CLEAN_LOG_MSG",
     "USER_TD_MODE",
     "INCOMPLETE_TASK_NOTIFIER",
+    "RESUME_TASKS",
     "UPGRADE_PACKAGES",
     "SCREENSHOTS_MODE",
 ]
@@ -343,9 +347,15 @@ async def load_config():
     if not INCOMPLETE_TASK_NOTIFIER and DATABASE_URL:
         await DbManger().trunc_table("tasks")
 
+    RESUME_TASKS = environ.get("RESUME_TASKS", "")
+    RESUME_TASKS = RESUME_TASKS.lower() == "true"
+
     STOP_DUPLICATE = environ.get("STOP_DUPLICATE", "")
     STOP_DUPLICATE = STOP_DUPLICATE.lower() == "true"
 
+    GDRIVE_DEDUPE = environ.get("GDRIVE_DEDUPE", "")
+    GDRIVE_DEDUPE = GDRIVE_DEDUPE.lower() == "true"
+
     IS_TEAM_DRIVE = environ.get("IS_TEAM_DRIVE", "")
     IS_TEAM_DRIVE = IS_TEAM_DRIVE.lower() == "true"
 
@@ -720,6 +730,7 @@ async def load_config():
             "JIODRIVE_TOKEN": JIODRIVE_TOKEN,
             "EQUAL_SPLITS": EQUAL_SPLITS,
             "EXTENSION_FILTER": EXTENSION_FILTER,
+            "GDRIVE_DEDUPE": GDRIVE_DEDUPE,
             "GDRIVE_ID": GDRIVE_ID,
             "INCOMPLETE_TASK_NOTIFIER": INCOMPLETE_TASK_NOTIFIER,
             "INDEX_URL": INDEX_URL,
@@ -749,6 +760,7 @@ async def load_config():
             "RCLONE_SERVE_USER": RCLONE_SERVE_USER,
             "RCLONE_SERVE_PASS": RCLONE_SERVE_PASS,
             "RCLONE_SERVE_PORT": RCLONE_SERVE_PORT,
+            "RESUME_TASKS": RESUME_TASKS,
             "RSS_CHAT": RSS_CHAT,
             "RSS_DELAY": RSS_DELAY,
             "SAVE_MSG": SAVE_MSG,
@@ -1187,6 +1199,8 @@ async def update_private_file(_, message, pre_message):
         else:
             await deleteMessage(message)
     if file_name == "rclone.conf":
+        await rclone_daemons.close("rclone.conf")
+        rclone_list_cache.invalidate_config("rclone.conf")
         await rclone_serve_booter()
     await update_buttons(pre_message)
     if DATABASE_URL:
@@ -1291,6 +1305,8 @@ async def edit_bot_settings(client, query):
                 categories_dict["Root"] = {"drive_id": GDRIVE_ID, "index_link": ""}
         elif data[2] == "INCOMPLETE_TASK_NOTIFIER" and DATABASE_URL:
             await DbManger().trunc_table("tasks")
+        elif data[2] == "RESUME_TASKS" and DATABASE_URL:
+            await DbManger().trunc_table("resume")
         config_dict[data[2]] = value
         await update_buttons(message, data[2], "editvar", False)
         if DATABASE_URL:
@@ -1365,6 +1381,8 @@ async def edit_bot_settings(client, query):
         config_dict[data[2]] = value
         if not value and data[2] == "INCOMPLETE_TASK_NOTIFIER" and DATABASE_URL:
             await DbManger().trunc_table("tasks")
+        elif not value and data[2] == "RESUME_TASKS" and DATABASE_URL:
+            await DbManger().trunc_table("resume")
         await update_buttons(message, data[2], "editvar", False)
         if DATABASE_URL:
             await DbManger().update_config({data[2]: value})
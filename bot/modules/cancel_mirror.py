@@ -18,11 +18,14 @@ from bot.helper.ext_utils.bot_utils import (
     new_task,
 )
 from bot.helper.telegram_helper import button_build
+from bot.helper.ext_utils.batch_manager import batch_jobs, get_batch, get_batch_tasks
 
 
 async def cancel_mirror(_, message):
     user_id = message.from_user.id
     msg = message.text.split("_", maxsplit=1)
+    batch = None
+    tasks = []
     if len(msg) > 1:
         cmd_data = msg[1].split("@", maxsplit=1)
         if len(cmd_data) > 1 and cmd_data[1].strip() != bot_name:
@@ -35,7 +38,10 @@ async def cancel_mirror(_, message):
     elif reply_to_id := message.reply_to_message_id:
         async with download_dict_lock:
             dl = download_dict.get(reply_to_id, None)
-        if dl is None:
+        # Items of a -i/-b batch are keyed by their own uids, not the command.
+        batch = batch_jobs.get(reply_to_id)
+        tasks = [task for task in get_batch_tasks(reply_to_id) if task is not dl]
+        if dl is None and batch is None and not tasks:
             await sendMessage(message, "This is not an active task!")
             return
     elif len(msg) == 1:
@@ -47,20 +53,29 @@ async def cancel_mirror(_, message):
         return
     if (
         OWNER_ID != user_id
-        and dl.message.from_user.id != user_id
+        and (dl or batch or tasks[0]).message.from_user.id != user_id
         and (user_id not in user_data or not user_data[user_id].get("is_sudo"))
     ):
         await sendMessage(message, "This task is not for you!")
         return
-    obj = dl.download()
-    await obj.cancel_download()
+    if batch is not None:
+        batch.cancel()
+    for task in [dl, *tasks] if dl is not None else tasks:
+        obj = task.download()
+        await obj.cancel_download()
 
 
 async def cancel_all(status):
     matches = await getAllDownload(status)
-    if not matches:
+    batches = list(batch_jobs.values()) if status == "all" else []
+    if not matches and not batches:
         return False
+    for batch in batches:
+        batch.cancel()
     for dl in matches:
+        if (batch := get_batch(dl.message)) is not None:
+            # Don't let the batch submit more items in place of this one.
+            batch.cancel()
         obj = dl.download()
         await obj.cancel_download()
         await sleep(1)
@@ -4,8 +4,9 @@ from pyrogram.filters import command
 from secrets import token_hex
 from asyncio import sleep, gather
 from aiofiles.os import path as aiopath
+from aiohttp import ClientError
 from cloudscraper import create_scraper as cget
-from json import loads, dumps as jdumps
+from json import dumps as jdumps
 
 from bot import (
     LOGGER,
@@ -16,6 +17,7 @@ from bot import (
     bot,
 )
 from bot.helper.ext_utils.task_manager import limit_checker, task_utils
+from bot.helper.ext_utils.quota_manager import quota_ledger
 from bot.helper.mirror_utils.upload_utils.gdriveTools import GoogleDriveHelper
 from bot.helper.telegram_helper.message_utils import (
     sendMessage,
@@ -39,15 +41,18 @@ from bot.helper.ext_utils.bot_utils import (
     is_share_link,
     new_task,
     is_rclone_path,
-    cmd_exec,
     get_telegraph_list,
     arg_parser,
 )
-from bot.helper.ext_utils.exceptions import DirectDownloadLinkException
+from bot.helper.ext_utils.exceptions import (
+    DirectDownloadLinkException,
+    RcloneRcError,
+)
 from bot.helper.mirror_utils.download_utils.direct_link_generator import (
     direct_link_generator,
 )
 from bot.helper.mirror_utils.rclone_utils.list import RcloneList
+from bot.helper.mirror_utils.rclone_utils.rcd import rclone_daemons
 from bot.helper.mirror_utils.rclone_utils.transfer import RcloneTransferHelper
 from bot.helper.ext_utils.help_messages import CLONE_HELP_MESSAGE
 from bot.helper.mirror_utils.status_utils.rclone_status import RcloneStatus
@@ -98,23 +103,20 @@ async def rcloneNode(client, message, link, dst_path, rcf, tag):
     remote, src_path = link.split(":", 1)
     src_path = src_path.strip("/")
 
-    cmd = [
-        "rclone",
-        "lsjson",
-        "--fast-list",
-        "--stat",
-        "--no-modtime",
-        "--config",
-        config_path,
-        f"{remote}:{src_path}",
-    ]
-    res = await cmd_exec(cmd)
-    if res[2] != 0:
-        if res[2] != -9:
-            msg = f"Error: While getting RClone Stats. Path: {remote}:{src_path}. Stderr: {res[1][:4000]}"
-            await sendMessage(message, msg)
+    try:
+        res = await rclone_daemons.call(
+            config_path,
+            "operations/stat",
+            fs=f"{remote}:",
+            remote=src_path,
+            opt={"noModTime": True},
+        )
+        if (rstat := res["item"]) is None:
+            raise RcloneRcError("object not found")
+    except (RcloneRcError, ClientError) as err:
+        msg = f"Error: While getting RClone Stats. Path: {remote}:{src_path}. Error: {str(err)[:4000]}"
+        await sendMessage(message, msg)
         return
-    rstat = loads(res[0])
     if rstat["IsDir"]:
         name = src_path.rsplit("/", 1)[-1] if src_path else remote
         dst_path += name if dst_path.endswith(":") else f"/{name}"
@@ -142,50 +144,38 @@ async def rcloneNode(client, message, link, dst_path, rcf, tag):
     if not link:
         return
     LOGGER.info(f"Cloning Done: {name}")
-    cmd1 = [
-        "rclone",
-        "lsf",
-        "--fast-list",
-        "-R",
-        "--files-only",
-        "--config",
-        config_path,
-        destination,
-    ]
-    cmd2 = [
-        "rclone",
-        "lsf",
-        "--fast-list",
-        "-R",
-        "--dirs-only",
-        "--config",
-        config_path,
-        destination,
-    ]
-    cmd3 = [
-        "rclone",
-        "size",
-        "--fast-list",
-        "--json",
-        "--config",
-        config_path,
-        destination,
-    ]
-    res1, res2, res3 = await gather(cmd_exec(cmd1), cmd_exec(cmd2), cmd_exec(cmd3))
-    if res1[2] != res2[2] != res3[2] != 0:
-        if res1[2] == -9:
-            return
-        files = None
-        folders = None
-        size = 0
-        LOGGER.error(
-            f"Error: While getting RClone Stats. Path: {destination}. Stderr: {res1[1][:4000]}"
-        )
+    if mime_type == "Folder":
+        try:
+            rsize, rdirs = await gather(
+                rclone_daemons.call(
+                    config_path,
+                    "operations/size",
+                    fs=destination,
+                    _config={"UseListR": True},
+                ),
+                rclone_daemons.call(
+                    config_path,
+                    "operations/list",
+                    fs=destination,
+                    remote="",
+                    opt={"recurse": True, "dirsOnly": True, "noModTime": True},
+                    _config={"UseListR": True},
+                ),
+            )
+            files = rsize["count"]
+            folders = len(rdirs["list"])
+            size = rsize["bytes"]
+        except (RcloneRcError, ClientError) as err:
+            files = None
+            folders = None
+            size = 0
+            LOGGER.error(
+                f"Error: While getting RClone Stats. Path: {destination}. Error: {str(err)[:4000]}"
+            )
     else:
-        files = len(res1[0].split("\n"))
-        folders = len(res2[0].split("\n"))
-        rsize = loads(res3[0])
-        size = rsize["bytes"]
+        files = 1
+        folders = 0
+        size = rstat["Size"]
     await listener.onUploadComplete(
         link, size, files, folders, mime_type, name, destination
     )
@@ -272,6 +262,7 @@ async def gdcloneNode(message, link, listen_up):
                 drive.clone, link, listener.drive_id
             )
         if not link:
+            quota_ledger.release(listener.uid)
             return
         LOGGER.info(f"Cloning Done: {name}")
         await listener.onUploadComplete(link, size, files, folders, mime_type, name)
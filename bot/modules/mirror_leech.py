@@ -4,19 +4,21 @@ from html import escape
 from traceback import format_exc
 from base64 import b64encode
 from re import match as re_match
-from asyncio import sleep, wrap_future
+from asyncio import wrap_future
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 from cloudscraper import create_scraper
 
 from bot import (
     bot,
+    bot_loop,
     DOWNLOAD_DIR,
     LOGGER,
     config_dict,
     bot_name,
     categories_dict,
     user_data,
+    DATABASE_URL,
 )
 from bot.helper.mirror_utils.download_utils.direct_downloader import add_direct_download
 from bot.helper.ext_utils.bot_utils import (
@@ -36,6 +38,7 @@ from bot.helper.ext_utils.bot_utils import (
 )
 from bot.helper.ext_utils.exceptions import DirectDownloadLinkException
 from bot.helper.ext_utils.task_manager import task_utils
+from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.mirror_utils.download_utils.aria2_download import add_aria2c_download
 from bot.helper.mirror_utils.download_utils.gd_download import add_gd_download
 from bot.helper.mirror_utils.download_utils.qbit_download import add_qb_torrent
@@ -64,6 +67,7 @@ from bot.helper.telegram_helper.message_utils import (
     open_dump_btns,
 )
 from bot.helper.listeners.tasks_listener import MirrorLeechListener
+from bot.helper.ext_utils.shared_download import shared_downloads
 from bot.helper.ext_utils.help_messages import (
     MIRROR_HELP_MESSAGE,
     CLONE_HELP_MESSAGE,
@@ -71,12 +75,14 @@ from bot.helper.ext_utils.help_messages import (
     help_string,
 )
 from bot.helper.ext_utils.bulk_links import extract_bulk_links
+from bot.helper.ext_utils.batch_manager import BatchJob
+from bot.helper.ext_utils.same_dir import SameDir
 from bot.modules.gen_pyro_sess import get_decrypt_key
 
 
 @new_task
 async def _mirror_leech(
-    client, message, isQbit=False, isLeech=False, sameDir=None, bulk=[]
+    client, message, isQbit=False, isLeech=False, sameDir=None, uid=None
 ):
     text = message.text.split("\n")
     input_list = text[0].split(" ")
@@ -183,14 +189,19 @@ async def _mirror_leech(
     if drive_id and is_gdrive_link(drive_id):
         drive_id = GoogleDriveHelper.getIdFromUrl(drive_id)
 
+    uid = uid or message.id
+
     if folder_name and not isBulk:
         seed = False
         ratio = None
         seed_time = None
         folder_name = f"/{folder_name}"
         if sameDir is None:
-            sameDir = {"total": multi, "tasks": set(), "name": folder_name}
-        sameDir["tasks"].add(message.id)
+            sameDir = SameDir(multi, folder_name)
+        await sameDir.add(uid)
+
+    def submit(item, item_uid):
+        return _mirror_leech(client, item, isQbit, isLeech, sameDir, item_uid)
 
     if isBulk:
         try:
@@ -203,52 +214,24 @@ async def _mirror_leech(
                 "Reply to text file or tg message that have links seperated by new line!",
             )
             return
-        b_msg = input_list[:1]
-        b_msg.append(f"{bulk[0]} -i {len(bulk)}")
-        nextmsg = await sendMessage(message, " ".join(b_msg))
-        nextmsg = await client.get_messages(
-            chat_id=message.chat.id, message_ids=nextmsg.id
-        )
-        nextmsg.from_user = message.from_user
-        _mirror_leech(client, nextmsg, isQbit, isLeech, sameDir, bulk)
+        await BatchJob.from_links(message, bulk, submit, sameDir).run()
         return
 
-    if len(bulk) != 0:
-        del bulk[0]
-
-    @new_task
-    async def __run_multi():
-        if multi <= 1:
-            return
-        await sleep(5)
-        if len(bulk) != 0:
-            msg = input_list[:1]
-            msg.append(f"{bulk[0]} -i {multi - 1}")
-            nextmsg = await sendMessage(message, " ".join(msg))
-        else:
-            msg = [s.strip() for s in input_list]
-            index = msg.index("-i")
-            msg[index + 1] = f"{multi - 1}"
-            nextmsg = await client.get_messages(
-                chat_id=message.chat.id, message_ids=message.reply_to_message_id + 1
-            )
-            nextmsg = await sendMessage(nextmsg, " ".join(msg))
-        nextmsg = await client.get_messages(
-            chat_id=message.chat.id, message_ids=nextmsg.id
+    if multi > 1 and message.reply_to_message_id:
+        batch = await BatchJob.from_replies(
+            client, message, multi, submit, sameDir
         )
-        if folder_name:
-            sameDir["tasks"].add(nextmsg.id)
-        nextmsg.from_user = message.from_user
-        await sleep(5)
-        _mirror_leech(client, nextmsg, isQbit, isLeech, sameDir, bulk)
-
-    __run_multi()
+        if sameDir:
+            await sameDir.shrink(multi - 1 - len(batch))
+        bot_loop.create_task(batch.run())
 
-    path = f"{DOWNLOAD_DIR}{message.id}{folder_name}"
+    path = f"{DOWNLOAD_DIR}{uid}{folder_name}"
 
     if len(text) > 1 and text[1].startswith("Tag: "):
         tag, id_ = text[1].split("Tag: ")[1].split()
         message.from_user = await client.get_users(id_)
+        if DATABASE_URL:
+            await DbManger().load_user(message.from_user.id)
         try:
             await message.unpin()
         except Exception:
@@ -282,7 +265,10 @@ async def _mirror_leech(
             await delete_links(message)
             return
 
-    if reply_to:
+    if isinstance(reply_to, list):
+        # A t.me/c/chat/first-last range, downloaded together as one folder.
+        file_ = reply_to
+    elif reply_to:
         file_ = getattr(reply_to, reply_to.media.value) if reply_to.media else None
         if file_ is None and reply_to.text:
             reply_text = reply_to.text.split("\n", 1)[0].strip()
@@ -522,6 +508,7 @@ async def _mirror_leech(
         index_link=index_link,
         source_url=org_link or link,
         leech_utils={"screenshots": sshots, "thumb": thumb},
+        uid=uid,
     )
 
     if file_ is not None:
@@ -544,21 +531,28 @@ async def _mirror_leech(
             await delete_links(message)
             return
         await add_rclone_download(link, config_path, f"{path}/", name, listener)
-    elif is_gdrive_link(link):
-        await delete_links(message)
-        await add_gd_download(link, path, listener, name, org_link)
-    elif is_mega_link(link):
-        await delete_links(message)
-        await add_mega_download(link, f"{path}/", listener, name)
-    elif isQbit and "real-debrid" not in link:
-        await add_qb_torrent(link, path, listener, ratio, seed_time)
-    elif not is_telegram_link(link):
+    else:
+        if is_gdrive_link(link) or is_mega_link(link):
+            await delete_links(message)
         if ussr or pssw:
             auth = f"{ussr}:{pssw}"
             headers += (
                 f" authorization: Basic {b64encode(auth.encode()).decode('ascii')}"
             )
-        await add_aria2c_download(link, path, listener, name, headers, ratio, seed_time)
+
+        async def start_download():
+            if is_gdrive_link(link):
+                await add_gd_download(link, path, listener, name, org_link)
+            elif is_mega_link(link):
+                await add_mega_download(link, f"{path}/", listener, name)
+            elif isQbit and "real-debrid" not in link:
+                await add_qb_torrent(link, path, listener, ratio, seed_time)
+            elif not is_telegram_link(link):
+                await add_aria2c_download(
+                    link, path, listener, name, headers, ratio, seed_time
+                )
+
+        await shared_downloads.run(link, name, listener, start_download)
     await delete_links(message)
 
 
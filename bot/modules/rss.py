@@ -1,12 +1,10 @@
 #!/usr/bin/env python3
-from feedparser import parse as feedparse
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 from pyrogram.filters import command, regex, create
-from asyncio import Lock, sleep
+from asyncio import Lock, sleep, gather
 from datetime import datetime, timedelta
 from time import time
 from functools import partial
-from aiohttp import ClientSession
 from apscheduler.triggers.interval import IntervalTrigger
 from re import split as re_split
 from io import BytesIO
@@ -15,7 +13,6 @@ from bot import scheduler, rss_dict, LOGGER, DATABASE_URL, config_dict, bot
 from bot.helper.telegram_helper.message_utils import (
     sendMessage,
     editMessage,
-    sendRss,
     sendFile,
 )
 from bot.helper.telegram_helper.filters import CustomFilters
@@ -23,11 +20,12 @@ from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.ext_utils.bot_utils import new_thread
-from bot.helper.ext_utils.exceptions import RssShutdownException
+from bot.helper.ext_utils.rss_utils import RssFilter, rss_fetcher, rss_sender
 from bot.helper.ext_utils.help_messages import RSS_HELP_MESSAGE
 
 rss_dict_lock = Lock()
 handler_dict = {}
+polled_feeds = set()
 
 
 async def rssMenu(event):
@@ -120,10 +118,7 @@ async def rssSub(client, message, pre_event):
             exf = None
             cmd = None
         try:
-            async with ClientSession(trust_env=True) as session:
-                async with session.get(feed_link) as res:
-                    html = await res.text()
-            rss_d = feedparse(html)
+            rss_d = await rss_fetcher.fetch(feed_link, conditional=False)
             last_title = rss_d.entries[0]["title"]
             msg += "<b>Subscribed!</b>"
             msg += f"\n<b>Title: </b><code>{title}</code>\n<b>Feed Url: </b>{feed_link}"
@@ -312,10 +307,7 @@ async def rssGet(client, message, pre_event):
                 msg = await sendMessage(
                     message, f"Getting the last <b>{count}</b> item(s) from {title}"
                 )
-                async with ClientSession(trust_env=True) as session:
-                    async with session.get(data["link"]) as res:
-                        html = await res.text()
-                rss_d = feedparse(html)
+                rss_d = await rss_fetcher.fetch(data["link"], conditional=False)
                 item_info = ""
                 for item_num in range(count):
                     try:
@@ -620,96 +612,108 @@ Timeout: 60 sec. Argument -c for command and options
             await query.answer(text="Already Running!", show_alert=True)
 
 
+def getFeedItem(entry):
+    try:
+        url = entry["links"][1]["href"]
+    except IndexError:
+        url = entry["link"]
+    return entry["title"], url
+
+
+async def checkFeed(link, subs, conditional=True):
+    if not conditional:
+        rss_fetcher.forget(link)
+    try:
+        if (rss_d := await rss_fetcher.fetch(link)) is None:
+            return
+        last_title, last_link = getFeedItem(rss_d.entries[0])
+    except Exception as e:
+        rss_fetcher.forget(link)
+        LOGGER.error(f"{e} - Feed Link: {link}")
+        return
+    filters = {}
+    for user, title, data in subs:
+        if data["last_feed"] == last_link or data["last_title"] == last_title:
+            continue
+        filters[(user, title)] = RssFilter(data["inf"], data["exf"])
+    if not filters:
+        return
+    matcher = RssFilter.matcher(
+        frozenset().union(*(rss_filter.terms for rss_filter in filters.values()))
+    )
+    matched = {}
+    for user, title, data in subs:
+        if (rss_filter := filters.get((user, title))) is None:
+            continue
+        try:
+            for feed_count, entry in enumerate(rss_d.entries):
+                item_title, url = getFeedItem(entry)
+                if data["last_feed"] == url or data["last_title"] == item_title:
+                    break
+                if (found := matched.get(feed_count)) is None:
+                    found = matched[feed_count] = matcher.match(item_title.lower())
+                if not rss_filter.passes(found):
+                    continue
+                if command := data["command"]:
+                    cmd = command.split(maxsplit=1)
+                    cmd.insert(1, url)
+                    feed_msg = " ".join(cmd)
+                    if not feed_msg.startswith("/"):
+                        feed_msg = f"/{feed_msg}"
+                else:
+                    feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>\n\n"
+                    feed_msg += f"<b>Link: </b><code>{url}</code>"
+                feed_msg += (
+                    f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
+                )
+                rss_sender.put(feed_msg)
+            else:
+                LOGGER.warning(
+                    f"Reached Max index no. {len(rss_d.entries)} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents"
+                )
+            async with rss_dict_lock:
+                if user not in rss_dict or not rss_dict[user].get(title, False):
+                    continue
+                rss_dict[user][title].update(
+                    {"last_feed": last_link, "last_title": last_title}
+                )
+            await DbManger().rss_update(user)
+            LOGGER.info(f"Feed Name: {title}")
+            LOGGER.info(f"Last item: {last_link}")
+        except Exception as e:
+            LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {link}")
+
+
 async def rssMonitor():
     if not config_dict["RSS_CHAT"]:
         LOGGER.warning("RSS_CHAT not added! Shutting down rss scheduler...")
         scheduler.shutdown(wait=False)
+        await rss_fetcher.close()
         return
     if len(rss_dict) == 0:
         scheduler.pause()
         return
-    all_paused = True
+    feeds = {}
     for user, items in list(rss_dict.items()):
         for title, data in list(items.items()):
-            try:
-                if data["paused"]:
-                    continue
-                async with ClientSession(trust_env=True) as session:
-                    async with session.get(data["link"]) as res:
-                        html = await res.text()
-                rss_d = feedparse(html)
-                try:
-                    last_link = rss_d.entries[0]["links"][1]["href"]
-                except IndexError:
-                    last_link = rss_d.entries[0]["link"]
-                finally:
-                    all_paused = False
-                last_title = rss_d.entries[0]["title"]
-                if data["last_feed"] == last_link or data["last_title"] == last_title:
-                    continue
-                feed_count = 0
-                while True:
-                    try:
-                        await sleep(10)
-                    except Exception:
-                        raise RssShutdownException("Rss Monitor Stopped!")
-                    try:
-                        item_title = rss_d.entries[feed_count]["title"]
-                        try:
-                            url = rss_d.entries[feed_count]["links"][1]["href"]
-                        except IndexError:
-                            url = rss_d.entries[feed_count]["link"]
-                        if data["last_feed"] == url or data["last_title"] == item_title:
-                            break
-                    except IndexError:
-                        LOGGER.warning(
-                            f"Reached Max index no. {feed_count} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents"
-                        )
-                        break
-                    parse = True
-                    for flist in data["inf"]:
-                        if all(x not in item_title.lower() for x in flist):
-                            parse = False
-                            feed_count += 1
-                            break
-                    for flist in data["exf"]:
-                        if any(x in item_title.lower() for x in flist):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    if command := data["command"]:
-                        cmd = command.split(maxsplit=1)
-                        cmd.insert(1, url)
-                        feed_msg = " ".join(cmd)
-                        if not feed_msg.startswith("/"):
-                            feed_msg = f"/{feed_msg}"
-                    else:
-                        feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>\n\n"
-                        feed_msg += f"<b>Link: </b><code>{url}</code>"
-                    feed_msg += (
-                        f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
-                    )
-                    await sendRss(feed_msg)
-                    feed_count += 1
-                async with rss_dict_lock:
-                    if user not in rss_dict or not rss_dict[user].get(title, False):
-                        continue
-                    rss_dict[user][title].update(
-                        {"last_feed": last_link, "last_title": last_title}
-                    )
-                await DbManger().rss_update(user)
-                LOGGER.info(f"Feed Name: {title}")
-                LOGGER.info(f"Last item: {last_link}")
-            except RssShutdownException as ex:
-                LOGGER.info(ex)
-                break
-            except Exception as e:
-                LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {data['link']}")
-                continue
-    if all_paused:
+            if not data["paused"]:
+                feeds.setdefault(data["link"], []).append((user, title, data))
+    if not feeds:
         scheduler.pause()
+        return
+    polled = {(user, title) for subs in feeds.values() for user, title, _ in subs}
+    await gather(
+        *(
+            checkFeed(
+                link,
+                subs,
+                all((user, title) in polled_feeds for user, title, _ in subs),
+            )
+            for link, subs in feeds.items()
+        )
+    )
+    polled_feeds.clear()
+    polled_feeds.update(polled)
 
 
 def addJob(delay):
@@ -55,7 +55,9 @@ async def mirror_status(_, message):
         reply_message = await sendMessage(message, msg)
         await auto_delete_message(message, reply_message)
     else:
-        await sendStatusMessage(message)
+        args = message.text.split()
+        chat_only = len(args) > 1 and args[1].lower() == "chat"
+        await sendStatusMessage(message, chat_only)
         await deleteMessage(message)
         async with status_reply_dict_lock:
             if Interval:
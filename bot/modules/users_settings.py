@@ -39,9 +39,11 @@ from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.mirror_utils.upload_utils.gdriveTools import GoogleDriveHelper
+from bot.helper.mirror_utils.rclone_utils.list import rclone_list_cache
+from bot.helper.mirror_utils.rclone_utils.rcd import rclone_daemons
 from bot.helper.ext_utils.db_handler import DbManger
+from bot.helper.ext_utils.quota_manager import quota_ledger
 from bot.helper.ext_utils.bot_utils import (
-    getdailytasks,
     update_user_ldata,
     get_readable_file_size,
     sync_to_async,
@@ -220,11 +222,8 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
         )
         dailytl = config_dict["DAILY_TASK_LIMIT"] or "∞"
         dailytas = (
-            user_dict.get("dly_tasks")[1]
-            if user_dict
-            and user_dict.get("dly_tasks")
-            and user_id != OWNER_ID
-            and config_dict["DAILY_TASK_LIMIT"]
+            quota_ledger.usage(user_id)["tasks"]
+            if user_id != OWNER_ID and config_dict["DAILY_TASK_LIMIT"]
             else config_dict["DAILY_TASK_LIMIT"] or "️∞" if user_id != OWNER_ID else "∞"
         )
         if user_dict.get("dly_tasks", False):
@@ -256,7 +255,7 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
             else "∞"
         )
         dailyup = (
-            get_readable_file_size(await getdailytasks(user_id, check_mirror=True))
+            get_readable_file_size(quota_ledger.usage(user_id)["mirror"])
             if config_dict["DAILY_MIRROR_LIMIT"] and user_id != OWNER_ID
             else "️∞"
         )
@@ -340,7 +339,7 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
             else "️∞"
         )
         dailyll = (
-            get_readable_file_size(await getdailytasks(user_id, check_leech=True))
+            get_readable_file_size(quota_ledger.usage(user_id)["leech"])
             if config_dict["DAILY_LEECH_LIMIT"] and user_id != OWNER_ID
             else "∞"
         )
@@ -821,6 +820,8 @@ async def add_rclone(client, message, pre_event):
         await mkdir(path)
     des_dir = ospath.join(path, f"{user_id}.conf")
     await message.download(file_name=des_dir)
+    await rclone_daemons.close(f"rclone/{user_id}.conf")
+    rclone_list_cache.invalidate_config(f"rclone/{user_id}.conf")
     update_user_ldata(user_id, "rclone", f"rclone/{user_id}.conf")
     await deleteMessage(message)
     await update_user_settings(pre_event, "rcc", "mirror")
@@ -1054,6 +1055,8 @@ async def edit_user_settings(client, query):
         if await aiopath.exists(rclone_path):
             await query.answer()
             await aioremove(rclone_path)
+            await rclone_daemons.close(rclone_path)
+            rclone_list_cache.invalidate_config(rclone_path)
             update_user_ldata(user_id, "rclone", "")
             await update_user_settings(query, "rcc", "mirror")
             if DATABASE_URL:
@@ -1188,12 +1191,20 @@ async def send_users_settings(client, message):
         and not reply_to.from_user.is_bot
     ):
         userid = reply_to.from_user.id
+    if userid and DATABASE_URL:
+        await DbManger().load_user(int(userid))
     if not userid:
-        msg = f"<u><b>Total Users / Chats Data Saved :</b> {len(user_data)}</u>"
+        users = user_data
+        if DATABASE_URL:
+            # Only access flags of users that weren't active are kept in memory.
+            users = await DbManger().get_users()
+            for user, data in user_data.items():
+                users.setdefault(user, {}).update(data)
+        msg = f"<u><b>Total Users / Chats Data Saved :</b> {len(users)}</u>"
         buttons = ButtonMaker()
         buttons.ibutton("Close", f"userset {message.from_user.id} close")
         button = buttons.build_menu(1)
-        for user, data in user_data.items():
+        for user, data in users.items():
             msg += f"\n\n<code>{user}</code>:"
             if data:
                 for key, value in data.items():
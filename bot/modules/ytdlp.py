@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 from pyrogram.filters import command, regex, user
-from asyncio import sleep, wait_for, Event, wrap_future
+from asyncio import wait_for, Event, wrap_future
 from aiohttp import ClientSession
 from aiofiles.os import path as aiopath
 from yt_dlp import YoutubeDL
 from functools import partial
 from time import time
 
-from bot import DOWNLOAD_DIR, bot, categories_dict, config_dict, user_data, LOGGER
+from bot import (
+    DOWNLOAD_DIR,
+    bot,
+    bot_loop,
+    categories_dict,
+    config_dict,
+    user_data,
+    LOGGER,
+    DATABASE_URL,
+)
 from bot.helper.ext_utils.task_manager import task_utils
+from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.telegram_helper.message_utils import (
     sendMessage,
     editMessage,
@@ -42,6 +52,8 @@ from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.listeners.tasks_listener import MirrorLeechListener
 from bot.helper.ext_utils.help_messages import YT_HELP_MESSAGE
 from bot.helper.ext_utils.bulk_links import extract_bulk_links
+from bot.helper.ext_utils.batch_manager import BatchJob
+from bot.helper.ext_utils.same_dir import SameDir
 
 
 @new_task
@@ -272,7 +284,7 @@ async def _mdisk(link, name):
 
 
 @new_task
-async def _ytdl(client, message, isLeech=False, sameDir=None, bulk=[]):
+async def _ytdl(client, message, isLeech=False, sameDir=None, uid=None):
     text = message.text.split("\n")
     input_list = text[0].split(" ")
     qual = ""
@@ -343,11 +355,16 @@ async def _ytdl(client, message, isLeech=False, sameDir=None, bulk=[]):
     if drive_id and is_gdrive_link(drive_id):
         drive_id = GoogleDriveHelper.getIdFromUrl(drive_id)
 
+    uid = uid or message.id
+
     if folder_name and not isBulk:
         folder_name = f"/{folder_name}"
         if sameDir is None:
-            sameDir = {"total": multi, "tasks": set(), "name": folder_name}
-        sameDir["tasks"].add(message.id)
+            sameDir = SameDir(multi, folder_name)
+        await sameDir.add(uid)
+
+    def submit(item, item_uid):
+        return _ytdl(client, item, isLeech, sameDir, item_uid)
 
     if isBulk:
         try:
@@ -360,50 +377,28 @@ async def _ytdl(client, message, isLeech=False, sameDir=None, bulk=[]):
                 "Reply to text file or tg message that have links seperated by new line!",
             )
             return
-        b_msg = input_list[:1]
-        b_msg.append(f"{bulk[0]} -i {len(bulk)}")
-        nextmsg = await sendMessage(message, " ".join(b_msg))
-        nextmsg = await client.get_messages(
-            chat_id=message.chat.id, message_ids=nextmsg.id
-        )
-        nextmsg.from_user = message.from_user
-        _ytdl(client, nextmsg, isLeech, sameDir, bulk)
+        await BatchJob.from_links(message, bulk, submit, sameDir).run()
         return
 
-    if len(bulk) != 0:
-        del bulk[0]
-
-    @new_task
-    async def __run_multi():
-        if multi <= 1:
-            return
-        await sleep(5)
-        if len(bulk) != 0:
-            msg = input_list[:1]
-            msg.append(f"{bulk[0]} -i {multi - 1}")
-            nextmsg = await sendMessage(message, " ".join(msg))
-        else:
-            msg = [s.strip() for s in input_list]
-            index = msg.index("-i")
-            msg[index + 1] = f"{multi - 1}"
-            nextmsg = await client.get_messages(
-                chat_id=message.chat.id, message_ids=message.reply_to_message_id + 1
-            )
-            nextmsg = await sendMessage(nextmsg, " ".join(msg))
-        nextmsg = await client.get_messages(
-            chat_id=message.chat.id, message_ids=nextmsg.id
+    batch = None
+    if multi > 1 and message.reply_to_message_id:
+        batch = await BatchJob.from_replies(
+            client, message, multi, submit, sameDir
         )
-        if folder_name:
-            sameDir["tasks"].add(nextmsg.id)
-        nextmsg.from_user = message.from_user
-        await sleep(5)
-        _ytdl(client, nextmsg, isLeech, sameDir, bulk)
+        if sameDir:
+            await sameDir.shrink(multi - 1 - len(batch))
+
+    def __run_multi():
+        if batch is not None:
+            bot_loop.create_task(batch.run())
 
-    path = f"{DOWNLOAD_DIR}{message.id}{folder_name}"
+    path = f"{DOWNLOAD_DIR}{uid}{folder_name}"
 
     if len(text) > 1 and text[1].startswith("Tag: "):
         tag, id_ = text[1].split("Tag: ")[1].split()
         message.from_user = await client.get_users(id_)
+        if DATABASE_URL:
+            await DbManger().load_user(message.from_user.id)
         try:
             await message.unpin()
         except Exception:
@@ -549,6 +544,7 @@ async def _ytdl(client, message, isLeech=False, sameDir=None, bulk=[]):
         isYtdlp=True,
         source_url=link,
         leech_utils={"screenshots": sshots, "thumb": thumb},
+        uid=uid,
     )
 
     if "mdisk.me" in link:
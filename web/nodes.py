@@ -1,4 +1,3 @@
-from anytree import NodeMixin
 from re import findall as re_findall
 from os import environ
 
@@ -9,33 +8,49 @@ elif not DOWNLOAD_DIR.endswith("/"):
     DOWNLOAD_DIR += "/"
 
 
-class TorNode(NodeMixin):
+class TorNode:
+    __slots__ = (
+        "name",
+        "is_folder",
+        "is_file",
+        "children",
+        "folders",
+        "size",
+        "priority",
+        "file_id",
+        "progress",
+    )
+
     def __init__(
         self,
         name,
         is_folder=False,
         is_file=False,
         parent=None,
-        size=None,
+        size=0,
         priority=None,
         file_id=None,
-        progress=None,
+        progress=0,
     ):
-        super().__init__()
         self.name = name
         self.is_folder = is_folder
         self.is_file = is_file
-
+        self.children = []
+        # Sub folders by name, so adding a file doesn't scan its siblings.
+        self.folders = {}
+        self.size = size
+        self.priority = priority
+        self.file_id = file_id
+        self.progress = progress
         if parent is not None:
-            self.parent = parent
-        if size is not None:
-            self.size = size
-        if priority is not None:
-            self.priority = priority
-        if file_id is not None:
-            self.file_id = file_id
-        if progress is not None:
-            self.progress = progress
+            parent.children.append(self)
+            if is_folder:
+                parent.folders[name] = self
+
+    def folder(self, name):
+        if (node := self.folders.get(name)) is None:
+            node = TorNode(name, is_folder=True, parent=self)
+        return node
 
 
 def qb_get_folders(path):
@@ -47,122 +62,82 @@ def get_folders(path):
     return fs.split("/")
 
 
+def add_file(root, folders, **kwargs):
+    node = root
+    for name in folders[:-1]:
+        node = node.folder(name)
+    TorNode(folders[-1], is_file=True, parent=node, **kwargs)
+
+
+def aggregate(root):
+    """Set the size and progress of every folder from its files, bottom up."""
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if not visited:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.folders.values())
+            continue
+        size = done = 0
+        for child in node.children:
+            size += child.size
+            done += child.size * child.progress
+        node.size = size
+        node.progress = round(done / size, 5) if size else 0
+
+
 def make_tree(res, aria2=False):
-    parent = TorNode("Torrent")
+    parent = TorNode("Torrent", is_folder=True)
     if not aria2:
         for i in res:
-            folders = qb_get_folders(i.name)
-            if len(folders) > 1:
-                previous_node = parent
-                for j in range(len(folders) - 1):
-                    current_node = next(
-                        (k for k in previous_node.children if k.name == folders[j]),
-                        None,
-                    )
-                    if current_node is None:
-                        previous_node = TorNode(
-                            folders[j], parent=previous_node, is_folder=True
-                        )
-                    else:
-                        previous_node = current_node
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=previous_node,
-                    size=i.size,
-                    priority=i.priority,
-                    file_id=i.id,
-                    progress=round(i.progress * 100, 5),
-                )
-            else:
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=parent,
-                    size=i.size,
-                    priority=i.priority,
-                    file_id=i.id,
-                    progress=round(i.progress * 100, 5),
-                )
+            add_file(
+                parent,
+                qb_get_folders(i.name),
+                size=i.size,
+                priority=i.priority,
+                file_id=i.id,
+                progress=round(i.progress * 100, 5),
+            )
     else:
         for i in res:
-            folders = get_folders(i["path"])
-            priority = 1
-            if i["selected"] == "false":
-                priority = 0
-            if len(folders) > 1:
-                previous_node = parent
-                for j in range(len(folders) - 1):
-                    current_node = next(
-                        (k for k in previous_node.children if k.name == folders[j]),
-                        None,
-                    )
-                    if current_node is None:
-                        previous_node = TorNode(
-                            folders[j], parent=previous_node, is_folder=True
-                        )
-                    else:
-                        previous_node = current_node
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=previous_node,
-                    size=i["length"],
-                    priority=priority,
-                    file_id=i["index"],
-                    progress=round(
-                        (int(i["completedLength"]) / int(i["length"])) * 100, 5
-                    ),
-                )
-            else:
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=parent,
-                    size=i["length"],
-                    priority=priority,
-                    file_id=i["index"],
-                    progress=round(
-                        (int(i["completedLength"]) / int(i["length"])) * 100, 5
-                    ),
-                )
-    return create_list(parent, ["", 0])
-
-
-"""
-def print_tree(parent):
-    for pre, _, node in RenderTree(parent):
-        treestr = u"%s%s" % (pre, node.name)
-        print(treestr.ljust(8), node.is_folder, node.is_file)
-"""
-
-
-def create_list(par, msg):
+            length = int(i["length"])
+            add_file(
+                parent,
+                get_folders(i["path"]),
+                size=length,
+                priority=0 if i["selected"] == "false" else 1,
+                file_id=i["index"],
+                progress=(
+                    round((int(i["completedLength"]) / length) * 100, 5)
+                    if length
+                    else 0
+                ),
+            )
+    aggregate(parent)
+    return parent
+
+
+def iter_list(par, counter=None):
+    """Yield the HTML list of a tree piece by piece, for a streamed response."""
+    if counter is None:
+        counter = [0]
     if par.name != ".unwanted":
-        msg[0] += "<ul>"
+        yield "<ul>"
     for i in par.children:
+        yield "<li>"
         if i.is_folder:
-            msg[0] += "<li>"
             if i.name != ".unwanted":
-                msg[
-                    0
-                ] += f'<input type="checkbox" name="foldernode_{msg[1]}"> <label for="{i.name}">{i.name}</label>'
-            create_list(i, msg)
-            msg[0] += "</li>"
-            msg[1] += 1
+                yield f'<input type="checkbox" name="foldernode_{counter[0]}"> <label data-size="{i.size}" for="{i.name}">{i.name}</label> / {i.progress}%'
+            yield from iter_list(i, counter)
+            counter[0] += 1
         else:
-            msg[0] += "<li>"
-            if i.priority == 0:
-                msg[
-                    0
-                ] += f'<input type="checkbox" name="filenode_{i.file_id}" data-size="{i.size}"> <label data-size="{i.size}" for="filenode_{i.file_id}">{i.name}</label> / {i.progress}%'
-            else:
-                msg[
-                    0
-                ] += f'<input type="checkbox" checked name="filenode_{i.file_id}" data-size="{i.size}"> <label data-size="{i.size}" for="filenode_{i.file_id}">{i.name}</label> / {i.progress}%'
-            msg[0] += f'<input type="hidden" value="off" name="filenode_{i.file_id}">'
-            msg[0] += "</li>"
-
+            checked = "" if i.priority == 0 else " checked"
+            yield f'<input type="checkbox"{checked} name="filenode_{i.file_id}" data-size="{i.size}"> <label data-size="{i.size}" for="filenode_{i.file_id}">{i.name}</label> / {i.progress}%'
+            yield f'<input type="hidden" value="off" name="filenode_{i.file_id}">'
+        yield "</li>"
     if par.name != ".unwanted":
-        msg[0] += "</ul>"
-    return msg
+        yield "</ul>"
+
+
+def create_list(par):
+    return "".join(iter_list(par))
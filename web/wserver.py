@@ -1,12 +1,13 @@
 from logging import getLogger, FileHandler, StreamHandler, INFO, basicConfig
 from time import sleep
+from itertools import chain
 from qbittorrentapi import NotFound404Error, Client as qbClient
 from aria2p import API as ariaAPI, Client as ariaClient
 from flask import Flask, request, Response
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.serving import WSGIRequestHandler
 
-from web.nodes import make_tree
+from web.nodes import make_tree, iter_list
 
 app = Flask(__name__)
 
@@ -736,14 +737,15 @@ def list_torrent_contents(id_):
     if len(id_) > 20:
         client = qbClient(host="localhost", port="8090")
         res = client.torrents_files(torrent_hash=id_)
-        cont = make_tree(res)
+        tree = make_tree(res)
         client.auth_log_out()
     else:
         res = aria2.client.get_files(id_)
-        cont = make_tree(res, True)
-    return page.replace("{My_content}", cont[0]).replace(
+        tree = make_tree(res, True)
+    head, tail = page.replace(
         "{form_url}", f"/app/files/{id_}?pin_code={pincode}"
-    )
+    ).split("{My_content}", 1)
+    return Response(chain((head,), iter_list(tree), (tail,)), mimetype="text/html")
 
 
 @app.route("/app/files/<string:id_>", methods=["POST"])